@@ -1,64 +1,197 @@
-from flask import Flask, render_template, request, jsonify
-import speech_recognition as sr
-import pyttsx3
+from flask import Flask, Blueprint, current_app, render_template, request, jsonify, Response, stream_with_context
 import datetime
+import os
 import webbrowser
-import wikipediaapi
 import time
-import os
 import subprocess
-import pyautogui
-import requests
-import json
-from pathlib import Path
-import re
-import psutil
-import ctypes
 import threading
+import random
+import uuid
+
+from lazy import lazy_import
+import calc
+from intents import INTENTS, IntentMatcher, KEYBOARD, text_after
+from process_table import ProcessTable
+from speech import SpeechQueue
+from audio_cache import CachingBackend
+from capture import StreamingListener, MicrophoneSource
+from scheduler import RequestScheduler, SchedulerBusy
+from events import EventBus, request_context, current_request
+from macros import MacroStore, validate_commands, validate_speak
+from noise import NoiseEstimator
+from metrics import Metrics
+from screenshots import BURST_MARGIN, ScreenshotSaver, parse_burst_count, parse_interval
+from recognition import HedgedRecognizer, default_backends
+from telemetry import SystemMonitor, describe_cpu, describe_memory, describe_disk, describe_battery
+from history import CommandHistory
+from fuzzy import FuzzyMatcher, APP_CUTOFF, intent_phrases
+from executor import ActionExecutor
+from plans import split_command, needs_window, not_understood
+
+# Heavy dependencies load on first use by the handlers that need them
+sr = lazy_import("speech_recognition")
+pyautogui = lazy_import("pyautogui")
+
+bp = Blueprint('assistant', __name__)
+
+# Keyboard shortcuts handled by the web assistant: intent name -> (keys, reply)
+HOTKEY_COMMANDS = {
+    "copy": (('ctrl', 'c'), "Copied."),
+    "paste": (('ctrl', 'v'), "Pasted."),
+    "save": (('ctrl', 's'), "Saved."),
+}
+
+# Applications opened by name: spoken name -> executable
+QUICK_APPS = {
+    "notepad": "notepad.exe",
+    "calculator": "calc.exe",
+    "chrome": "chrome.exe",
+    "edge": "msedge.exe",
+    "explorer": "explorer.exe",
+}
 
-app = Flask(__name__)
+# Seconds a launch is waited for before the reply, so one that fails at once is reported
+LAUNCH_WAIT = 2.0
+
+# In a compound command, seconds to wait for an opened application before
+# typing into it, and for its window to take focus once its process is up
+APP_WAIT = 8.0
+WINDOW_SETTLE = 0.5
+
+# Action names reported to the frontend where they differ from the intent name
+ACTION_NAMES = {
+    "web_search": "google_search",
+}
+
+# Fixed replies whose audio is rendered once at startup and replayed from the cache
+STATIC_PHRASES = [reply for _, reply in HOTKEY_COMMANDS.values()] + [
+    "Hello! I'm Chanakya. It's nice to hear from you.",
+    "Volume increased.",
+    "Volume decreased.",
+    "Volume muted.",
+    "Screenshot taken and saved to desktop.",
+    "What would you like to search on Wikipedia?",
+    "I'm not sure how to help with that.",
+]
+
+JOKES = [
+    "Why don't scientists trust atoms? Because they make up everything!",
+    "Why did the scarecrow win an award? He was outstanding in his field!",
+    "Why don't programmers like nature? It has too many bugs!"
+]
 
 class VoiceAssistantWeb:
-    def __init__(self):
+    def __init__(self, speech_backend=None, audio_source=None, events=None, metrics=None, system=None,
+                 history=None):
         print("Initializing web assistant...")
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 180)
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.metrics = metrics if metrics is not None else Metrics()
+        # Sampled in the background from the first question or /system request
+        self.system = system if system is not None else SystemMonitor()
+        # Commands that were understood, for /suggest
+        self.history = history if history is not None else CommandHistory()
+        backend = speech_backend if speech_backend is not None else CachingBackend(rate=180, prewarm=STATIC_PHRASES)
+        # The engine opens on the speech thread; replies queued meanwhile wait for it
+        self.speech = SpeechQueue(backend).start(wait=False)
+        # Stage events for the browser; see /events
+        self.events = events if events is not None else EventBus()
+        self.speech.on_status = self.publish_speech_status
         self.is_listening = False
         
-        # Calibrate microphone
-        try:
-            with self.microphone as source:
-                print("Calibrating microphone...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
-                print("Microphone calibrated.")
-        except Exception as e:
-            print(f"Could not access microphone: {e}")
+        # The microphone is opened and calibrated by the first /listen
+        self.microphone = None
+        self._recognizer = None
+        self._microphone_lock = threading.Lock()
+        
+        # Saved between runs and adapted from the quiet between commands
+        self.noise = NoiseEstimator()
         
-        self.wiki_api = wikipediaapi.Wikipedia(
-            user_agent='VoiceAssistant/1.0',
-            language='en',
-            extract_format=wikipediaapi.ExtractFormat.WIKI
+        # Each phrase goes to every configured recognizer at once; the first
+        # confident transcript wins, and nothing waits past the deadline
+        self.recognition = HedgedRecognizer(default_backends(lambda: self.recognizer), metrics=self.metrics)
+
+        # Phrases are recognized while capture continues
+        self.listener = StreamingListener(
+            audio_source or self.open_microphone,
+            self.recognition.recognize,
+            energy_threshold=self.noise.threshold,
+            timeout=5,
+            phrase_time_limit=5,
+            metrics=self.metrics,
         )
+        self.listener.on_silence = self.noise.observe_frame
+        self.listener.on_no_match = self.noise.observe_segment
+        self.noise.on_update = lambda threshold: setattr(self.listener, 'energy_threshold', threshold)
+        # Capture callbacks run on the listener's threads, so they are tagged
+        # with the request that holds the microphone
+        self.capture_request = None
+        self.listener.on_speech_start = lambda now: self.events.publish("speech_detected", self.capture_request)
+        self.listener.on_segment = lambda segment: self.events.publish(
+            "recognizing", self.capture_request, duration=round(segment.duration, 2))
+        self.listener.on_transcript = lambda text: self.events.publish("transcript", self.capture_request, text=text)
+        
+        # Refreshed in the background once a command first needs it
+        self.processes = ProcessTable()
+        
+        # Encoded and saved off the request thread
+        self.screenshots = ScreenshotSaver(metrics=self.metrics)
+        
+        # Key presses and launches run off the request thread, with timeouts;
+        # see /actions
+        self.actions = ActionExecutor(metrics=self.metrics)
+        # The actions submitted by the compound command running on this
+        # thread, so a step that fails cancels only the ones after it, and
+        # the name of the program its last launch() started
+        self.plan = threading.local()
+        
+        self.intent_handlers = self.build_intent_handlers()
+        # Only the intents handled here are matched, so a command whose best
+        # intent has no web handler goes to the next best ("open youtube"
+        # opens it as an application, "close tab" closes it)
+        handled = [intent for intent in INTENTS if intent.name in self.intent_handlers]
+        self.intents = IntentMatcher(handled)
+        self.fuzzy_intents = FuzzyMatcher(intent_phrases(handled))
+        self.quick_apps = FuzzyMatcher([(name, name) for name in QUICK_APPS], cutoff=APP_CUTOFF)
+
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    def open_microphone(self):
+        with self._microphone_lock:
+            if self.microphone is None:
+                self.microphone = sr.Microphone()
+                if not self.noise.calibrated:
+                    try:
+                        print("Calibrating microphone...")
+                        self.noise.calibrate(MicrophoneSource(self.microphone), duration=1.0)
+                        print("Microphone calibrated.")
+                    except Exception as e:
+                        print(f"Could not access microphone: {e}")
+        return MicrophoneSource(self.microphone)
 
     def speak(self, text):
         print(f"Assistant: {text}")
-        try:
-            self.engine.say(text)
-            self.engine.runAndWait()
-        except Exception as e:
-            print(f"Error during speech: {e}")
+        # Queued for the speech thread so the HTTP response doesn't wait for it
+        self.speech.say(text, tag=current_request())
+
+    def publish_speech_status(self, utterance):
+        if utterance.speaking_time is not None:
+            self.metrics.observe("tts", utterance.speaking_time)
+        if utterance.status == "failed":
+            self.metrics.error("tts", "failed")
+        event = "speaking" if utterance.status == "speaking" else "spoken"
+        self.events.publish(event, utterance.tag, text=utterance.text, status=utterance.status)
 
     def listen_for_command(self):
         command = None
+        self.is_listening = True
+        self.capture_request = current_request()
+        self.events.publish("listening")
         try:
-            with self.microphone as source:
-                print("Listening...")
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-            
-            print("Recognizing...")
-            command = self.recognizer.recognize_google(audio)
+            print("Listening...")
+            command = self.listener.listen()
             command = command.lower()
             print(f"User said: {command}")
         except sr.WaitTimeoutError:
@@ -69,186 +202,521 @@ class VoiceAssistantWeb:
             print(f"Could not request results: {e}")
         except Exception as e:
             print(f"Error: {e}")
+        finally:
+            self.is_listening = False
+            self.capture_request = None
         
         return command
 
-    def process_command(self, command):
+    def process_command(self, command, speak=True):
         if command is None:
             return {"status": "no_command", "response": "I didn't hear anything."}
         
-        response = ""
-        action = ""
-        
-        # Core Commands
-        if "hello" in command or "hi" in command:
-            response = "Hello! I'm Chanakya. It's nice to hear from you."
-            action = "greeting"
-        
-        elif "time" in command:
-            now = datetime.datetime.now().strftime("%I:%M %p")
-            response = f"The current time is {now}."
-            action = "time"
-        
-        elif "date" in command:
-            now = datetime.datetime.now().strftime("%B %d, %Y")
-            response = f"Today is {now}."
-            action = "date"
-        
-        elif "open" in command and "windows" not in command:
-            app_name = command.replace("open", "").strip()
-            self.open_application(app_name)
-            response = f"Opening {app_name}."
-            action = "open_app"
-        
-        elif "close" in command:
-            app_name = command.replace("close", "").strip()
-            self.close_application(app_name)
-            response = f"Closing {app_name}."
-            action = "close_app"
-        
-        elif "list windows" in command:
-            windows = self.list_windows()
-            response = f"Open applications: {', '.join(windows[:5])}"
-            action = "list_windows"
-        
-        elif "volume up" in command:
-            for _ in range(5):
-                pyautogui.press("volumeup")
-            response = "Volume increased."
-            action = "volume_up"
-        
-        elif "volume down" in command:
-            for _ in range(5):
-                pyautogui.press("volumedown")
-            response = "Volume decreased."
-            action = "volume_down"
-        
-        elif "mute" in command:
-            pyautogui.press("volumemute")
-            response = "Volume muted."
-            action = "mute"
-        
-        elif "screenshot" in command:
-            self.take_screenshot()
-            response = "Screenshot taken and saved to desktop."
-            action = "screenshot"
-        
-        elif "wikipedia" in command:
-            response = "What would you like to search on Wikipedia?"
-            action = "wikipedia"
-        
-        elif "search for" in command or "google" in command:
-            query = command.replace("search for", "").replace("google", "").strip()
-            webbrowser.open(f"https://www.google.com/search?q={query}")
-            response = f"Searching Google for {query}."
-            action = "google_search"
-        
-        elif "joke" in command:
-            jokes = [
-                "Why don't scientists trust atoms? Because they make up everything!",
-                "Why did the scarecrow win an award? He was outstanding in his field!",
-                "Why don't programmers like nature? It has too many bugs!"
-            ]
-            import random
-            response = random.choice(jokes)
-            action = "joke"
-        
-        elif "copy" in command:
-            pyautogui.hotkey('ctrl', 'c')
-            response = "Copied."
-            action = "copy"
-        
-        elif "paste" in command:
-            pyautogui.hotkey('ctrl', 'v')
-            response = "Pasted."
-            action = "paste"
-        
-        elif "save" in command:
-            pyautogui.hotkey('ctrl', 's')
-            response = "Saved."
-            action = "save"
-        
-        else:
+        with self.metrics.time("dispatch"):
+            # "open notepad, type hello and save it" is one plan of three steps
+            plan = split_command(command, self.intents)
+            match = self.intents.match(command) if plan is None else None
+            if plan is None and match is None:
+                # A misheard phrase ("volume app") is read as the closest known one
+                corrected = self.fuzzy_intents.correct(command)
+                if corrected is not None and self.intents.match(corrected):
+                    command, match = corrected, self.intents.match(corrected)
+        if plan is not None and not_understood(plan):
+            # Running only the steps that were understood would leave the job half done
+            self.metrics.error("dispatch", "no_intent")
+            parts = " or ".join(f"'{text}'" for text in not_understood(plan))
+            response = f"Sorry, I didn't understand {parts}, so I haven't done any of it."
+            if speak:
+                self.speak(response)
+            return {"status": "success", "response": response, "action": "unknown", "command": command}
+        if plan is not None:
+            self.events.publish("executing", command=command, intent="plan")
+            self.history.record(command)
+            steps = self.run_plan(plan)
+            response = " ".join(step["response"] for step in steps)
+            if speak:
+                self.speak(response)
+            return {"status": "success", "response": response, "action": "plan", "command": command, "steps": steps}
+        handler = self.intent_handlers.get(match.name) if match else None
+        self.events.publish("executing", command=command, intent=match.name if match else None)
+        if handler is None:
+            self.metrics.error("dispatch", "no_intent")
             response = "I'm not sure how to help with that."
             action = "unknown"
+        else:
+            self.history.record(command)
+            with self.metrics.time("action", match.name):
+                response = handler(command, match)
+            action = ACTION_NAMES.get(match.name, match.name)
         
-        self.speak(response)
+        if speak:
+            self.speak(response)
         return {"status": "success", "response": response, "action": action, "command": command}
 
-    def open_application(self, app_name):
-        quick_apps = {
-            "notepad": "notepad.exe",
-            "calculator": "calc.exe",
-            "chrome": "chrome.exe",
-            "edge": "msedge.exe",
-            "explorer": "explorer.exe"
+    def run_plan(self, plan):
+        # Steps run back to back; their key presses keep their order on the
+        # executor, and only wait for an application a step before opened
+        steps = []
+        self.plan.actions = []
+        try:
+            for position, step in enumerate(plan):
+                waits = step.match.name == "open_app" and needs_window(plan, position, self.intents.resources)
+                before = self.processes.snapshot(max_age=0) if waits else None
+                self.plan.launched = None
+                with self.metrics.time("action", step.match.name):
+                    response = self.intent_handlers[step.match.name](step.text, step.match)
+                steps.append({"command": step.text, "action": ACTION_NAMES.get(step.match.name, step.match.name),
+                              "response": response})
+                launched = self.plan.launched
+                if waits and launched:
+                    self.wait_for_window(launched, before.find(launched))
+        finally:
+            self.plan.actions = None
+        return steps
+
+    def resources_for(self, command):
+        # A compound command holds the devices of all of its steps
+        plan = split_command(command, self.intents)
+        if plan is None:
+            return self.intents.resources_for(command)
+        return tuple(sorted({resource for step in plan if step.match is not None
+                             for resource in self.intents.resources[step.match.name]}))
+
+    def build_intent_handlers(self):
+        handlers = {
+            "greeting": lambda command, match: "Hello! I'm Chanakya. It's nice to hear from you.",
+            "time": lambda command, match: f"The current time is {datetime.datetime.now().strftime('%I:%M %p')}.",
+            "date": lambda command, match: f"Today is {datetime.datetime.now().strftime('%B %d, %Y')}.",
+            "open_app": lambda command, match: self.handle_open(command),
+            "close_app": lambda command, match: self.handle_close(command),
+            "list_windows": lambda command, match: f"Open applications: {', '.join(self.list_windows()[:5])}",
+            "volume_up": lambda command, match: self.press_volume(match.name, "volumeup", 5, "Volume increased."),
+            "volume_down": lambda command, match: self.press_volume(match.name, "volumedown", 5, "Volume decreased."),
+            "mute": lambda command, match: self.press_volume(match.name, "volumemute", 1, "Volume muted."),
+            "screenshot": lambda command, match: self.handle_screenshot(),
+            "screenshot_burst": lambda command, match: self.handle_screenshot_burst(command),
+            "wikipedia": lambda command, match: "What would you like to search on Wikipedia?",
+            "web_search": lambda command, match: self.handle_search(command),
+            "joke": lambda command, match: random.choice(JOKES),
+            "calculate": lambda command, match: self.handle_calculate(command),
+            "battery": lambda command, match: self.report_system(describe_battery),
+            "cpu": lambda command, match: self.report_system(describe_cpu),
+            "memory": lambda command, match: self.report_system(describe_memory),
+            "disk": lambda command, match: self.report_system(describe_disk),
+            "type_text": lambda command, match: self.type_text(text_after(command, match.end)),
+            "cancel": lambda command, match: self.cancel_actions(),
         }
-        
-        for app_key, app_exe in quick_apps.items():
+        for name in HOTKEY_COMMANDS:
+            handlers[name] = lambda command, match: self.press_hotkey(match.name)
+        return handlers
+
+    def handle_open(self, command):
+        app_name = command.replace("open", "").strip()
+        return f"Opening {self.open_application(app_name)}."
+
+    def handle_close(self, command):
+        app_name = command.replace("close", "").strip()
+        self.close_application(app_name)
+        return f"Closing {app_name}."
+
+    def act(self, intent, fn, timeout=None, resources=None):
+        # The outcome reaches the browser as an "action" event of the request
+        request = current_request()
+        if resources is None:
+            resources = self.intents.resources.get(intent, ())
+        action = self.actions.submit(intent, fn, resources, timeout)
+        action.add_done_callback(lambda action: self.events.publish("action", request, **action.as_dict()))
+        plan_actions = getattr(self.plan, "actions", None)
+        if plan_actions is not None:
+            plan_actions.append(action)
+        return action
+
+    def cancel_actions(self):
+        cancelled = self.actions.cancel_pending()
+        if not cancelled:
+            return "There is nothing to cancel."
+        return f"Cancelled {', '.join(sorted({action.name.replace('_', ' ') for action in cancelled}))}."
+
+    def press_volume(self, intent, key, presses, reply):
+        def press():
+            for _ in range(presses):
+                pyautogui.press(key)
+        self.act(intent, press)
+        return reply
+
+    def handle_screenshot(self):
+        shot = self.screenshots.capture()
+        return f"Screenshot taken and saved to desktop as {shot.name}."
+
+    def handle_screenshot_burst(self, command):
+        # On the action executor, so the request returns while the burst runs
+        count = parse_burst_count(command)
+        interval = parse_interval(command)
+        self.act("screenshot_burst", lambda: self.screenshots.burst(count, interval),
+                 timeout=count * interval + BURST_MARGIN)
+        return f"Taking {count} screenshots, one every {calc.format_number(interval)} seconds."
+
+    def report_system(self, describe):
+        try:
+            return describe(self.system) or "System information is not available yet."
+        except ImportError:
+            return "System monitoring requires the psutil library. Install it with: pip install psutil"
+
+    def handle_search(self, command):
+        query = command.replace("search for", "").replace("google", "").strip()
+        self.act("web_search", lambda: webbrowser.open(f"https://www.google.com/search?q={query}"))
+        return f"Searching Google for {query}."
+
+    def handle_calculate(self, command):
+        try:
+            return f"The result is {calc.format_number(calc.calculate(command))}"
+        except calc.CalculationError as e:
+            return str(e)
+
+    def type_text(self, text):
+        if not text:
+            return "What should I type?"
+        self.act("type_text", lambda: pyautogui.write(text))
+        return f"Typing {text}."
+
+    def press_hotkey(self, name):
+        keys, reply = HOTKEY_COMMANDS[name]
+        self.act(name, lambda: pyautogui.hotkey(*keys))
+        return reply
+
+    def open_application(self, app_name):
+        for app_key, app_exe in QUICK_APPS.items():
             if app_key in app_name.lower():
-                subprocess.Popen(app_exe, shell=True)
-                return
+                self.launch(app_exe)
+                return app_name
+        
+        # A misheard name ("crome") opens the closest quick app
+        closest = self.quick_apps.match(app_name)
+        if closest:
+            self.launch(QUICK_APPS[closest.label])
+            return closest.label
         
-        subprocess.Popen(app_name, shell=True)
+        self.launch(app_name)
+        return app_name
+
+    def launch(self, target):
+        # Waits briefly so a command that fails at once is reported as an error
+        self.plan.launched = os.path.splitext(os.path.basename(target))[0]
+        return self.act("open_app", lambda: subprocess.Popen(target, shell=True)).wait(timeout=LAUNCH_WAIT)
+
+    def wait_for_window(self, name, running):
+        # Holds the keyboard until a new process of name is up, so the keys
+        # of the next steps reach its window; if it never comes up, the
+        # actions the plan queued after this wait are cancelled instead
+        plan_actions = getattr(self.plan, "actions", None)
+        if plan_actions is None:
+            plan_actions = []
+        later = len(plan_actions) + 1
+        def wait():
+            if not self.processes.wait_for(name, APP_WAIT, exclude=running):
+                for action in plan_actions[later:]:
+                    self.actions.cancel(action)
+                raise RuntimeError(f"{name} didn't start within {APP_WAIT:g} s")
+            time.sleep(WINDOW_SETTLE)
+        self.act("wait_for_window", wait, timeout=APP_WAIT + WINDOW_SETTLE + 1, resources=KEYBOARD)
 
     def close_application(self, app_name):
         if not app_name or app_name == "window":
-            pyautogui.hotkey('alt', 'f4')
+            self.act("close_app", lambda: pyautogui.hotkey('alt', 'f4'), resources=KEYBOARD)
             return
         
-        for proc in psutil.process_iter(['name']):
-            try:
-                if app_name.lower() in proc.info['name'].lower():
-                    proc.terminate()
-                    break
-            except:
-                pass
+        self.act("close_app", lambda: self.processes.terminate(app_name), timeout=5).wait()
 
     def list_windows(self):
-        windows = []
-        for proc in psutil.process_iter(['name']):
+        snapshot = self.processes.snapshot()
+        print(f"Process snapshot is {snapshot.age:.1f}s old.")
+        return snapshot.applications()
+
+
+class AssistantServices:
+    """
+    Per-app state behind the routes. The assistant (speech engine,
+    microphone, process table) is built by the first request that needs it.
+    """
+
+    def __init__(self, speech_backend=None, audio_source=None):
+        self.speech_backend = speech_backend
+        self.audio_source = audio_source
+        self.events = EventBus()
+        self.metrics = Metrics()
+        # The microphone is captured by one request at a time; typed commands run
+        # concurrently unless they drive the same device (see Intent.resources)
+        self.scheduler = RequestScheduler(workers=4, max_waiting=8)
+        self.macros = MacroStore()
+        self.system = SystemMonitor()
+        self._history = None
+        self._assistant = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self._assistant is not None
+
+    @property
+    def history(self):
+        # Opened on first use; the trie loads in the background
+        if self._history is None:
+            with self._lock:
+                if self._history is None:
+                    self._history = CommandHistory().start()
+        return self._history
+
+    @property
+    def assistant(self):
+        if self._assistant is None:
+            history = self.history
+            with self._lock:
+                if self._assistant is None:
+                    self._assistant = VoiceAssistantWeb(self.speech_backend, self.audio_source, self.events,
+                                                        self.metrics, self.system, history)
+        return self._assistant
+
+def services():
+    return current_app.extensions['chanakya']
+
+def create_app(speech_backend=None, audio_source=None):
+    """
+    Builds the Flask app. Nothing heavy happens here: the assistant and its
+    dependencies load on the first request that uses them.
+    """
+    app = Flask(__name__)
+    app.extensions['chanakya'] = AssistantServices(speech_backend, audio_source)
+    app.register_blueprint(bp)
+    return app
+
+def busy_response(error):
+    services().events.publish("busy", retry_after=error.retry_after)
+    response = jsonify({"status": "busy", "response": str(error), "retry_after": error.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def new_request_id():
+    data = request.get_json(silent=True) or {}
+    return str(data.get('request_id') or uuid.uuid4().hex[:12])
+
+def respond(result):
+    # The final result is pushed to the event stream as well as returned
+    services().events.publish("result", result=result)
+    return jsonify(result)
+
+def run_command(command):
+    assistant = services().assistant
+    # A new command interrupts whatever is still being said
+    assistant.speech.cancel()
+    return assistant.process_command(command)
+
+def run_batch(commands, speak="all", stop_on_error=False):
+    """
+    Runs commands in order and returns a result per command with its timings.
+    speak is "all", "last" (only the final reply) or "none".
+    """
+    assistant = services().assistant
+    scheduler = services().scheduler
+    assistant.speech.cancel()
+    results = []
+    batch_start = time.perf_counter()
+    for position, command in enumerate(commands):
+        command = command.lower()
+        timing = {}
+        def execute_one():
+            run_start = time.perf_counter()
             try:
-                proc_name = proc.info['name']
-                if proc_name.endswith('.exe') and proc_name not in windows:
-                    windows.append(proc_name.replace('.exe', ''))
-            except:
-                pass
-        return [w for w in windows if w.lower() not in ['svchost', 'system', 'registry']]
-
-    def take_screenshot(self):
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        desktop = Path.home() / "Desktop"
-        screenshot_path = desktop / f"screenshot_{timestamp}.png"
-        screenshot = pyautogui.screenshot()
-        screenshot.save(screenshot_path)
-
-assistant = VoiceAssistantWeb()
-
-@app.route('/')
+                return assistant.process_command(command, speak=speak == "all")
+            finally:
+                timing["run"] = time.perf_counter() - run_start
+        start = time.perf_counter()
+        try:
+            # The first command is admitted like any request; the rest ride on that admission
+            result = scheduler.run(execute_one, assistant.resources_for(command), force=position > 0)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            result = {"status": "error", "response": f"Error: {str(e)}", "command": command}
+        elapsed = time.perf_counter() - start
+        run = timing.get("run", elapsed)
+        result["wait_ms"] = round((elapsed - run) * 1000, 2)
+        result["run_ms"] = round(run * 1000, 2)
+        results.append(result)
+        if stop_on_error and (result["status"] != "success" or result.get("action") == "unknown"):
+            break
+
+    if speak == "last" and results:
+        assistant.speak(results[-1]["response"])
+    succeeded = sum(1 for result in results if result["status"] == "success" and result.get("action") != "unknown")
+    return {
+        "status": "success" if succeeded == len(commands) else "partial",
+        "results": results,
+        "completed": len(results),
+        "succeeded": succeeded,
+        "total_ms": round((time.perf_counter() - batch_start) * 1000, 2),
+    }
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/listen', methods=['POST'])
+@bp.route('/listen', methods=['POST'])
 def listen():
-    try:
-        command = assistant.listen_for_command()
-        if command:
-            result = assistant.process_command(command)
-            return jsonify(result)
-        else:
-            return jsonify({"status": "no_command", "response": "I didn't hear anything. Please try again."})
-    except Exception as e:
-        return jsonify({"status": "error", "response": f"Error: {str(e)}"})
+    with request_context(new_request_id()):
+        services().events.publish("queued")
+        scheduler = services().scheduler
+        try:
+            assistant = services().assistant
+            command = scheduler.run(assistant.listen_for_command, resources=("microphone",))
+            if command:
+                # Already admitted once, so the command only waits for its devices
+                result = scheduler.run(lambda: run_command(command), assistant.resources_for(command), force=True)
+                return respond(result)
+            else:
+                return respond({"status": "no_command", "response": "I didn't hear anything. Please try again."})
+        except SchedulerBusy as e:
+            return busy_response(e)
+        except Exception as e:
+            return respond({"status": "error", "response": f"Error: {str(e)}"})
 
-@app.route('/execute', methods=['POST'])
+@bp.route('/execute', methods=['POST'])
 def execute():
+    with request_context(new_request_id()):
+        try:
+            data = request.json
+            command = data.get('command', '').lower()
+            assistant = services().assistant
+            result = services().scheduler.run(lambda: run_command(command), assistant.resources_for(command))
+            return respond(result)
+        except SchedulerBusy as e:
+            return busy_response(e)
+        except Exception as e:
+            return respond({"status": "error", "response": f"Error: {str(e)}"})
+
+@bp.route('/execute/batch', methods=['POST'])
+def execute_batch():
+    with request_context(new_request_id()):
+        data = request.get_json(silent=True) or {}
+        try:
+            commands = validate_commands(data.get('commands'))
+            speak = validate_speak(data.get('speak', 'all'))
+        except ValueError as e:
+            return jsonify({"status": "error", "response": str(e)}), 400
+        try:
+            return respond(run_batch(commands, speak, bool(data.get('stop_on_error', False))))
+        except SchedulerBusy as e:
+            return busy_response(e)
+
+@bp.route('/macros')
+def list_macros():
+    macros = services().macros
+    return jsonify({name: macros.get(name) for name in macros.names()})
+
+@bp.route('/macros/<name>', methods=['GET', 'PUT', 'DELETE'])
+def macro(name):
+    macros = services().macros
+    if request.method == 'PUT':
+        data = request.get_json(silent=True) or {}
+        try:
+            saved = macros.save(name, data.get('commands'), data.get('speak', 'all'), data.get('stop_on_error', False))
+        except ValueError as e:
+            return jsonify({"status": "error", "response": str(e)}), 400
+        return jsonify({"status": "success", "macro": saved})
+    if request.method == 'DELETE':
+        if not macros.delete(name):
+            return jsonify({"status": "error", "response": f"No macro named {name}."}), 404
+        return jsonify({"status": "success"})
+    saved = macros.get(name)
+    if saved is None:
+        return jsonify({"status": "error", "response": f"No macro named {name}."}), 404
+    return jsonify(saved)
+
+@bp.route('/macros/<name>/run', methods=['POST'])
+def run_macro(name):
+    saved = services().macros.get(name)
+    if saved is None:
+        return jsonify({"status": "error", "response": f"No macro named {name}."}), 404
+    with request_context(new_request_id()):
+        # Options in the request body override the saved ones for this run
+        data = request.get_json(silent=True) or {}
+        try:
+            speak = validate_speak(data.get('speak', saved['speak']))
+        except ValueError as e:
+            return jsonify({"status": "error", "response": str(e)}), 400
+        try:
+            return respond(run_batch(saved['commands'], speak, bool(data.get('stop_on_error', saved['stop_on_error']))))
+        except SchedulerBusy as e:
+            return busy_response(e)
+
+@bp.route('/events')
+def events():
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(
+        stream_with_context(services().events.stream(last_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@bp.route('/speech/stats')
+def speech_stats():
+    if not services().started:
+        return jsonify({})
+    cache = getattr(services().assistant.speech.backend, "cache", None)
+    return jsonify(cache.stats() if cache is not None else {})
+
+@bp.route('/screenshots/stats')
+def screenshot_stats():
+    if not services().started:
+        return jsonify({})
+    return jsonify(services().assistant.screenshots.stats())
+
+@bp.route('/recognition/stats')
+def recognition_stats():
+    if not services().started:
+        return jsonify({})
+    return jsonify(services().assistant.recognition.stats())
+
+@bp.route('/actions')
+def action_stats():
+    if not services().started:
+        return jsonify({})
+    return jsonify(services().assistant.actions.stats())
+
+@bp.route('/suggest')
+def suggest():
+    # Past commands starting with ?q=, most frequent and recent first
+    prefix = request.args.get('q', '')
+    if not prefix.strip():
+        return jsonify({"suggestions": []})
+    try:
+        limit = max(1, int(request.args.get('limit', 8)))
+    except ValueError:
+        return jsonify({"status": "error", "response": "limit must be a number"}), 400
+    return jsonify({"suggestions": services().history.suggest(prefix, limit)})
+
+@bp.route('/system')
+def system_status():
+    # Current reading, averages and samples over ?window= seconds (default 60)
     try:
-        data = request.json
-        command = data.get('command', '').lower()
-        result = assistant.process_command(command)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({"status": "error", "response": f"Error: {str(e)}"})
+        window = min(float(request.args.get('window', 60)), 3600)
+        return jsonify(services().system.snapshot(window))
+    except ValueError:
+        return jsonify({"status": "error", "response": "window must be a number of seconds"}), 400
+    except ImportError:
+        return jsonify({"status": "error", "response": "System monitoring requires psutil."}), 503
+
+@bp.route('/metrics')
+def metrics():
+    return Response(services().metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/scheduler')
+def scheduler_stats():
+    stats = services().scheduler.stats()
+    stats["listening"] = services().started and services().assistant.is_listening
+    return jsonify(stats)
+
+app = create_app()
 
 if __name__ == '__main__':
     print("Starting Chanakya - Voice Assistant Web Interface...")
@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+
+from dir_index import DirectoryIndex, trigrams
+from fuzzy import APP_CUTOFF, FuzzyMatcher
+from settings import data_path
+
+# Executables are found at most this many directory levels below a search root
+MAX_DEPTH = 3
+
+APPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apps (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    root INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS apps_dir ON apps (dir);
+"""
+
+
+def default_search_roots():
+    """
+    Returns the directories searched for installed applications.
+    CHANAKYA_APP_ROOTS (separated by os.pathsep) overrides the Windows defaults.
+    """
+    configured = os.environ.get("CHANAKYA_APP_ROOTS")
+    if configured:
+        return [Path(root) for root in configured.split(os.pathsep) if root]
+    return [
+        Path(os.environ.get('ProgramFiles', 'C:\\Program Files')),
+        Path(os.environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)')),
+        Path(os.environ.get('LOCALAPPDATA', '')),
+        Path(os.environ.get('APPDATA', '')),
+        Path.home() / 'AppData' / 'Local' / 'Programs',
+    ]
+
+
+class AppIndex(DirectoryIndex):
+    """
+    Persistent index of installed applications, name -> executable path.
+
+    The executables below the search roots are indexed incrementally (see
+    DirectoryIndex); lookups are served from an in-memory name table with
+    a trigram index.
+    """
+
+    SCHEMA = APPS_SCHEMA
+    FILES_TABLE = "apps"
+    DESCRIPTION = "application index"
+
+    def __init__(self, roots=None, db_path=None, extensions=(".exe",), max_depth=MAX_DEPTH):
+        # name -> [(root rank, path)] and trigram -> {name}
+        self._names = {}
+        self._trigrams = {}
+        # (name table, FuzzyMatcher over its names), built on first closest()
+        self._fuzzy = None
+        super().__init__(default_search_roots() if roots is None else roots,
+                         db_path or data_path("app_index.sqlite3"), extensions, max_depth)
+
+    def _load(self, db):
+        """
+        Rebuilds the in-memory lookup tables from the database.
+        """
+        names = {}
+        grams = {}
+        for name, path, root in db.execute("SELECT name, path, root FROM apps"):
+            names.setdefault(name, []).append((root, path))
+        for name, entries in names.items():
+            entries.sort(key=lambda entry: (entry[0], len(entry[1])))
+            for gram in trigrams(name):
+                grams.setdefault(gram, set()).add(name)
+        # Swapped in one step so concurrent lookups never see a partial table
+        self._names, self._trigrams = names, grams
+
+    def _empty(self):
+        return not self._names
+
+    def _index_files(self, db, directory, rank, files, context):
+        apps = [(entry.path, directory, os.path.splitext(entry.name)[0].lower(), rank) for entry in files]
+        db.execute("DELETE FROM apps WHERE dir = ?", (directory,))
+        db.executemany("INSERT OR REPLACE INTO apps (path, dir, name, root) VALUES (?, ?, ?, ?)", apps)
+
+    def lookup(self, app_name, timeout=None):
+        """
+        Returns the path of the application best matching app_name, or None.
+
+        An exact name wins, then names starting with app_name, then names
+        containing it, then the longest name contained in app_name. Waits up
+        to timeout seconds for the first build if the index is still empty.
+        """
+        query = app_name.lower().strip()
+        if not query:
+            return None
+        if not self._ready.is_set():
+            self._ready.wait(timeout)
+
+        names = self._names
+        if query in names:
+            return names[query][0][1]
+
+        if len(query) >= 3:
+            candidates = None
+            for gram in trigrams(query):
+                postings = self._trigrams.get(gram)
+                if not postings:
+                    candidates = None
+                    break
+                candidates = set(postings) if candidates is None else candidates & postings
+            candidates = [name for name in candidates or () if query in name]
+        else:
+            candidates = [name for name in names if query in name]
+
+        if candidates:
+            best = min(candidates, key=lambda name: (not name.startswith(query), names[name][0][0], len(name)))
+            return names[best][0][1]
+
+        # The spoken name may carry extra words ("open photoshop please")
+        for size in range(len(query) - 1, 2, -1):
+            for start in range(len(query) - size + 1):
+                entries = names.get(query[start:start + size])
+                if entries:
+                    return entries[0][1]
+        return None
+
+    def closest(self, app_name):
+        """
+        Returns the FuzzyMatch of the indexed name closest to a misheard
+        app_name ("fire fox" for firefox), or None. Use it when lookup()
+        finds nothing; the match's label is the name to look up.
+        """
+        names = self._names
+        fuzzy = self._fuzzy
+        if fuzzy is None or fuzzy[0] is not names:
+            fuzzy = self._fuzzy = (names, FuzzyMatcher([(name, name) for name in names], cutoff=APP_CUTOFF))
+        return fuzzy[1].match(app_name)
@@ -0,0 +1,301 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+from settings import data_path
+from speech import Pyttsx3Backend
+
+# Replies with a number in them (times, dates, readings, counts) change
+# from one call to the next, so their audio is not worth keeping
+VOLATILE_PATTERN = re.compile(r"\d")
+
+
+class AudioCache:
+    """
+    Synthesized audio keyed by (text, voice, rate).
+
+    Recently used clips stay in an in-memory LRU; clips are also kept on
+    disk so the cache survives restarts, until they go unused for max_age
+    seconds or the least recently used are evicted to keep the directory
+    under max_disk_bytes. Counters record hits, misses and the synthesis
+    time the hits saved.
+    """
+
+    def __init__(self, directory=None, max_items=128, max_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=64 * 1024 * 1024, max_age=30 * 24 * 3600):
+        self.directory = directory if directory is not None else data_path("audio_cache")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        # Synthesis time of every stored clip, so a hit knows what it saved
+        self._index_path = os.path.join(self.directory, "index.json")
+        try:
+            with open(self._index_path) as f:
+                self._synth_seconds = json.load(f)
+        except (OSError, ValueError):
+            self._synth_seconds = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.synth_seconds = 0.0
+        self.saved_seconds = 0.0
+        self.evicted = 0
+        self.evict()
+
+    @staticmethod
+    def key(text, voice, rate):
+        """
+        Returns the cache key for a phrase spoken with a voice and rate.
+        """
+        raw = f"{voice or 'default'}\0{rate}\0{text.strip()}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        """
+        Returns where the clip for key is stored on disk.
+        """
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, key):
+        """
+        Returns the audio bytes for key, or None on a miss.
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_seconds += self._synth_seconds.get(key, 0.0)
+                return data
+
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+            # The file's mtime is its last use, which eviction goes by
+            os.utime(self.path(key))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self.saved_seconds += self._synth_seconds.get(key, 0.0)
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data, synth_seconds=0.0):
+        """
+        Stores freshly synthesized audio in memory and on disk.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        with self._lock:
+            self.synth_seconds += synth_seconds
+            self._synth_seconds[key] = synth_seconds
+            self._remember(key, data)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the clips on disk unused for max_age seconds, then the least
+        recently used until the rest fit in max_disk_bytes, and saves the
+        index. Returns how many were deleted.
+        """
+        clips = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".wav"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                clips.append((stat.st_mtime, stat.st_size, entry.name[:-len(".wav")]))
+        clips.sort(reverse=True)
+
+        now = time.time()
+        kept_bytes = 0
+        evicted = []
+        for used_at, size, key in clips:
+            if now - used_at > self.max_age or kept_bytes + size > self.max_disk_bytes:
+                evicted.append(key)
+            else:
+                kept_bytes += size
+        for key in evicted:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+        with self._lock:
+            self.evicted += len(evicted)
+            for key in evicted:
+                self._synth_seconds.pop(key, None)
+            index = dict(self._synth_seconds)
+        with open(self._index_path, "w") as f:
+            json.dump(index, f)
+        return len(evicted)
+
+    def _remember(self, key, data):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory and (len(self._memory) > self.max_items or self._memory_bytes > self.max_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the synthesis time saved.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "evicted": self.evicted,
+                "synth_seconds": round(self.synth_seconds, 3),
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+class SimpleAudioPlayer:
+    """
+    Plays WAV bytes with simpleaudio; playback stops as soon as interrupt is set.
+    """
+
+    def __init__(self):
+        import simpleaudio
+        self._simpleaudio = simpleaudio
+
+    def play(self, data, interrupt):
+        with wave.open(io.BytesIO(data)) as clip:
+            frames = clip.readframes(clip.getnframes())
+            playback = self._simpleaudio.play_buffer(
+                frames, clip.getnchannels(), clip.getsampwidth(), clip.getframerate()
+            )
+        while playback.is_playing():
+            if interrupt.wait(0.02):
+                playback.stop()
+                break
+
+
+class WinsoundPlayer:
+    """
+    Plays WAV bytes with winsound. Playing from memory is synchronous, so an
+    interrupt only takes effect between clips.
+    """
+
+    def __init__(self):
+        import winsound
+        self._winsound = winsound
+
+    def play(self, data, interrupt):
+        if not interrupt.is_set():
+            self._winsound.PlaySound(data, self._winsound.SND_MEMORY | self._winsound.SND_NODEFAULT)
+
+
+def default_player():
+    """
+    Returns the best available WAV player, or None if there is none.
+    """
+    for player in (SimpleAudioPlayer, WinsoundPlayer):
+        try:
+            return player()
+        except ImportError:
+            continue
+    return None
+
+
+class CachingBackend(Pyttsx3Backend):
+    """
+    pyttsx3 backend that renders each phrase to a WAV file once and replays
+    it from the AudioCache afterwards.
+
+    Only fixed phrases (the prewarm list) and phrases heard before are
+    cached; one-off replies, and replies with a number in them such as
+    the current time, are spoken directly.
+    Phrases passed as prewarm are rendered while the speech thread is idle.
+    Without a WAV player it speaks through the engine like Pyttsx3Backend.
+    """
+
+    def __init__(self, rate=180, voice=None, cache=None, player=None, prewarm=(), max_seen=1024):
+        super().__init__(rate=rate, voice=voice)
+        self.cache = cache if cache is not None else AudioCache()
+        self.player = player if player is not None else default_player()
+        self._prewarm = list(prewarm)
+        self._static = set(prewarm)
+        self._seen = set()
+        self.max_seen = max_seen
+
+    def say(self, text, interrupt):
+        if self.player is None:
+            return super().say(text, interrupt)
+        if text not in self._static:
+            if VOLATILE_PATTERN.search(text):
+                return super().say(text, interrupt)
+            if text not in self._seen:
+                if len(self._seen) >= self.max_seen:
+                    self._seen.clear()
+                self._seen.add(text)
+                return super().say(text, interrupt)
+        self.player.play(self.render(text), interrupt)
+
+    def render(self, text):
+        """
+        Returns the audio for text, synthesizing and storing it on a miss.
+        """
+        key = self.cache.key(text, self.voice, self.rate)
+        data = self.cache.get(key)
+        if data is None:
+            data = self._synthesize(key, text)
+        return data
+
+    def _synthesize(self, key, text):
+        start = time.perf_counter()
+        path = self.cache.path(key)
+        self.engine.save_to_file(text, path)
+        self.engine.runAndWait()
+        with open(path, "rb") as f:
+            data = f.read()
+        self.cache.put(key, data, time.perf_counter() - start)
+        return data
+
+    def idle(self):
+        """
+        Renders one phrase still waiting to be prewarmed.
+        Returns True while more are left.
+        """
+        if self.player is None or not self._prewarm:
+            return False
+        text = self._prewarm.pop(0)
+        key = self.cache.key(text, self.voice, self.rate)
+        if not os.path.exists(self.cache.path(key)):
+            try:
+                self._synthesize(key, text)
+            except Exception as e:
+                print(f"Error prewarming speech for '{text}': {e}")
+        return bool(self._prewarm)
@@ -0,0 +1,115 @@
+"""
+Action executor benchmark: how long commands hold the dispatch thread when actions are slow or hang.
+
+Runs a stream of commands whose actions take a few milliseconds (key
+presses), tens of milliseconds (launches) or, for one in --hang-every,
+far longer than their timeout (a browser that never returns). Each
+command is dispatched the old way, calling the action inline, and
+through the ActionExecutor, and the time until the next command can be
+dispatched is reported, with the executor's queue and run times and
+whether key presses kept their order.
+
+    python benchmarks/bench_actions.py [--commands 200] [--hang-every 25] [--hang-s 2]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executor import ActionExecutor, ActionTimeout
+from intents import KEYBOARD, PROCESSES
+
+# (name, resources, seconds the action takes)
+KINDS = (
+    ("press_hotkey", KEYBOARD, 0.002),
+    ("volume_up", KEYBOARD, 0.005),
+    ("open_app", PROCESSES, 0.03),
+    ("web_search", (), 0.02),
+)
+
+
+def build_commands(count, hang_every, hang_s, rng):
+    commands = []
+    for index in range(count):
+        name, resources, seconds = rng.choice(KINDS)
+        if hang_every and index % hang_every == hang_every - 1:
+            name, resources, seconds = "web_search", (), hang_s
+        commands.append((index, name, resources, seconds))
+    return commands
+
+
+def percentiles(values):
+    values = sorted(values)
+    return values[len(values) // 2], values[int(len(values) * 0.99)], values[-1]
+
+
+def run_inline(commands):
+    held = []
+    for _, _, _, seconds in commands:
+        start = time.perf_counter()
+        time.sleep(seconds)
+        held.append((time.perf_counter() - start) * 1000)
+    return held
+
+
+def run_executor(commands, timeout):
+    executor = ActionExecutor(timeout=timeout)
+    pressed = []
+    held = []
+    actions = []
+    for index, name, resources, seconds in commands:
+        def action(index=index, resources=resources, seconds=seconds):
+            if KEYBOARD[0] in resources:
+                pressed.append(index)
+            time.sleep(seconds)
+        start = time.perf_counter()
+        actions.append(executor.submit(name, action, resources))
+        held.append((time.perf_counter() - start) * 1000)
+
+    timed_out = 0
+    for action in actions:
+        try:
+            action.wait()
+        except ActionTimeout:
+            timed_out += 1
+    keyboard = [index for index, _, resources, _ in commands if KEYBOARD[0] in resources]
+    return held, executor.stats(), timed_out, pressed == keyboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--hang-every", type=int, default=25, help="every Nth action hangs (0 for none)")
+    parser.add_argument("--hang-s", type=float, default=2.0, help="how long a hung action blocks")
+    parser.add_argument("--timeout", type=float, default=0.5, help="executor timeout per action")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    commands = build_commands(args.commands, args.hang_every, args.hang_s, random.Random(args.seed))
+    hung = sum(1 for command in commands if command[3] == args.hang_s)
+    print(f"{len(commands)} commands, {hung} hanging for {args.hang_s:g} s")
+
+    start = time.perf_counter()
+    inline = run_inline(commands)
+    inline_wall = time.perf_counter() - start
+
+    start = time.perf_counter()
+    held, stats, timed_out, ordered = run_executor(commands, args.timeout)
+    executor_wall = time.perf_counter() - start
+
+    print(f"\n{'dispatch thread held':<28} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'all done s':>11}")
+    for name, values, wall in (("inline", inline, inline_wall), ("action executor", held, executor_wall)):
+        p50, p99, worst = percentiles(values)
+        print(f"{name:<28} {p50:>9.3f} {p99:>9.3f} {worst:>9.1f} {wall:>11.2f}")
+
+    print(f"\nexecutor: queue p50 {stats['queue_ms_p50']} ms, p95 {stats['queue_ms_p95']} ms; "
+          f"run p50 {stats['run_ms_p50']} ms, p95 {stats['run_ms_p95']} ms")
+    print(f"timed out: {timed_out} (abandoned after {args.timeout:g} s), "
+          f"key presses in submission order: {'yes' if ordered else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
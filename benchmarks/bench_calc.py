@@ -0,0 +1,154 @@
+"""
+Calculator fuzz suite and worst-case timing for calc.calculate.
+
+Checks a table of spoken and written calculations against their expected
+results, then evaluates random and adversarial inputs (power towers like
+"9**9**9", deep nesting, huge operands, long chains, junk) and verifies
+that each one either returns a number or raises CalculationError, and
+that none takes longer than --max-ms.
+
+    python benchmarks/bench_calc.py [--cases 20000] [--seed 1] [--max-ms 5]
+
+Exits with status 1 on a wrong result, an unexpected exception or a slow case.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc import CalculationError, calculate
+
+EXPECTED = [
+    ("calculate 25 * 4", 100),
+    ("twenty five times four", 100),
+    ("what is 9 times 8", 72),
+    ("calculate 12 plus 7", 19),
+    ("one hundred and five plus three thousand two hundred", 3305),
+    ("a thousand minus one", 999),
+    ("two to the power of ten", 1024),
+    ("three point one four times two", 6.28),
+    ("10 divided by 4", 2.5),
+    ("100 over 8", 12.5),
+    ("1,000 into 3", 3000),
+    ("square root of 144", 12),
+    ("5 squared plus 1", 26),
+    ("2 cubed", 8),
+    ("(1 + 2) * 3", 9),
+    ("2 + 3 * 4", 14),
+    ("-2 ^ 2", -4),
+    ("2 ^ 3 ^ 2", 512),
+    ("17 mod 5", 2),
+    ("negative six times seven", -42),
+    ("two lakh plus five", 200005),
+]
+
+ADVERSARIAL = [
+    "9**9**9", "9^9^9^9", "10 ** 1000000", "2 ** 2 ** 2 ** 2 ** 2 ** 2",
+    "99999999999999 ** 99", "0.0001 ** -1000", "(((((((((((((((((((((((((((((((((((1)))))))))))))))))))))))))))))))))))",
+    "-" * 250 + "1", "1" + "*99999" * 40, "9" * 400, "2 ^ " * 70 + "2",
+    "square root of " * 20 + "2", "10 / 0", "0 ^ -1", "(-8) ^ 0.5", "calculate", ")(", "1 + + + 2",
+    "one hundred thousand million billion trillion squared cubed squared cubed",
+]
+
+OPERATORS = ["+", "-", "*", "/", "%", "**", "^", " plus ", " minus ", " times ", " divided by ",
+             " to the power of ", " mod ", " into "]
+NUMBER_WORDS = ["one", "twenty", "ninety nine", "a hundred", "three thousand", "seven million",
+                "four point two", "twelve", "zero"]
+
+
+def random_operand(rng, depth):
+    roll = rng.random()
+    if depth < 6 and roll < 0.15:
+        return f"({random_expression(rng, depth + 1)})"
+    if roll < 0.25:
+        return rng.choice(NUMBER_WORDS)
+    if roll < 0.35:
+        return rng.choice(["-", "square root of ", "negative "]) + random_operand(rng, depth + 1)
+    if roll < 0.45:
+        return f"{rng.uniform(0, 1000):.{rng.randint(0, 4)}f}"
+    return str(rng.choice([0, 1, 2, 3, 7, 9, 10, 99, 12345, 10 ** rng.randint(0, 18)]))
+
+
+def random_expression(rng, depth=0):
+    parts = [random_operand(rng, depth)]
+    for _ in range(rng.randint(0, 8)):
+        parts.append(rng.choice(OPERATORS))
+        parts.append(random_operand(rng, depth))
+    text = "".join(parts)
+    if rng.random() < 0.05:
+        position = rng.randrange(len(text) + 1)
+        text = text[:position] + rng.choice("()+*^.,x abc") + text[position:]
+    return text
+
+
+def timed(text, runs=3):
+    """
+    Returns (outcome, seconds); outcome is the result, the CalculationError
+    or any other exception. seconds is the best of runs, so scheduler
+    noise isn't mistaken for a slow input.
+    """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            outcome = calculate(text)
+        except Exception as e:
+            outcome = e
+        best = min(best, time.perf_counter() - start)
+    return outcome, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=20000, help="random expressions to evaluate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-ms", type=float, default=5.0, help="fail if any case takes longer (best of 3)")
+    args = parser.parse_args()
+
+    failures = []
+    for text, expected in EXPECTED:
+        outcome, _ = timed(text, runs=1)
+        if isinstance(outcome, Exception) or not math.isclose(outcome, expected):
+            failures.append(f"{text!r}: expected {expected}, got {outcome!r}")
+
+    rng = random.Random(args.seed)
+    inputs = [("adversarial", text) for text in ADVERSARIAL]
+    inputs += [("random", random_expression(rng)) for _ in range(args.cases)]
+
+    timings = []
+    outcomes = {"result": 0, "rejected": 0}
+    for kind, text in inputs:
+        outcome, seconds = timed(text)
+        timings.append((seconds, kind, text))
+        if isinstance(outcome, CalculationError):
+            outcomes["rejected"] += 1
+        elif isinstance(outcome, Exception):
+            failures.append(f"{text[:60]!r}: {type(outcome).__name__}: {outcome}")
+        else:
+            outcomes["result"] += 1
+        if seconds * 1000 > args.max_ms:
+            failures.append(f"{text[:60]!r}: took {seconds * 1000:.2f} ms")
+
+    timings.sort()
+    times_ms = [seconds * 1000 for seconds, _, _ in timings]
+    print(f"Checked {len(EXPECTED)} expected results and {len(inputs)} fuzz inputs "
+          f"({outcomes['result']} evaluated, {outcomes['rejected']} rejected)")
+    print(f"  p50 {times_ms[len(times_ms) // 2]:.3f} ms   p99 {times_ms[int(len(times_ms) * 0.99)]:.3f} ms   "
+          f"max {times_ms[-1]:.3f} ms")
+    print("Slowest inputs:")
+    for seconds, kind, text in timings[-5:][::-1]:
+        print(f"  {seconds * 1000:7.3f} ms  {kind:<11} {text[:60]!r}")
+
+    if failures:
+        print(f"\n{len(failures)} failures:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Microbenchmark: compiled intent matcher vs. the original substring chain.
+
+Dispatches a synthetic corpus of commands through both and reports the
+per-command latency, best of --repeats runs, and how many commands the
+two route differently. Exits with status 1 if the matcher gets any of
+EXPECTED wrong.
+
+    python benchmarks/bench_dispatch.py [--count 100000] [--seed 7] [--repeats 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import IntentMatch, IntentMatcher
+
+SAMPLE_COMMANDS = [
+    "hello", "hi there", "what's the time", "what time is it", "what's the date",
+    "open chrome", "open visual studio code", "close notepad", "close window",
+    "list windows", "show windows", "switch to spotify", "minimize window",
+    "copy this", "paste it", "copy and paste", "cut", "undo that", "redo",
+    "save the file", "select all", "find the word", "print this page",
+    "new tab", "close tab", "refresh the page", "open task manager",
+    "lock the computer", "next window", "volume up", "decrease volume", "mute",
+    "shutdown", "restart the pc", "hibernate", "take screenshot",
+    "create file", "make folder", "take note", "remember this",
+    "what's the weather", "calculate 12 plus 7", "what is 9 times 8",
+    "play music", "tell me a joke", "latest headlines", "battery status",
+    "how is the cpu", "open youtube", "open gmail", "who are you",
+    "search for python tutorials", "google flask streaming", "wikipedia",
+    "this is sometimes tricky", "please stop", "goodbye",
+    "something completely unrelated to any command",
+]
+
+# command -> the match it must get
+EXPECTED = {
+    "memory usage": IntentMatch("memory", "memory usage", 0, 2),
+    "show me the memory usage": IntentMatch("memory", "memory usage", 3, 5),
+    "open task manager": IntentMatch("task_manager", "task manager", 1, 3),
+    "open youtube": IntentMatch("open_website", "open youtube", 0, 2),
+    "open notepad": IntentMatch("open_app", "open", 0, 1),
+    "type hello world": IntentMatch("type_text", "type", 0, 1),
+    "what type of processor is this": IntentMatch("cpu", "processor", 3, 4),
+    "what is 9 times 8": IntentMatch("calculate", "what is", 0, 2),
+}
+
+FILLER = ["please", "now", "could you", "for me", "quickly", "again", "thanks"]
+
+
+def legacy_dispatch(command):
+    """
+    The original process_command chain from voice.py, reduced to intent names.
+    """
+    if "hello" in command or "hi" in command:
+        return "greeting"
+    elif "what's the time" in command or "what time is it" in command:
+        return "time"
+    elif "wikipedia" in command:
+        return "wikipedia"
+    elif "search for" in command:
+        return "web_search"
+    elif "google" in command:
+        return "web_search"
+    elif "open" in command:
+        return "open_app"
+    elif "close" in command:
+        return "close_app"
+    elif "list windows" in command or "show windows" in command or "open windows" in command:
+        return "list_windows"
+    elif "switch to" in command or "switch window" in command:
+        return "switch_window"
+    elif "minimize window" in command or "minimize" in command:
+        return "minimize"
+    elif "maximize window" in command or "maximize" in command:
+        return "maximize"
+    elif "copy" in command and "paste" not in command:
+        return "copy"
+    elif "paste" in command:
+        return "paste"
+    elif "cut" in command:
+        return "cut"
+    elif "undo" in command:
+        return "undo"
+    elif "redo" in command:
+        return "redo"
+    elif "save" in command and "screenshot" not in command:
+        return "save"
+    elif "select all" in command:
+        return "select_all"
+    elif "find" in command or "search" in command and "google" not in command and "for" not in command:
+        return "find"
+    elif "print" in command:
+        return "print"
+    elif "new tab" in command:
+        return "new_tab"
+    elif "close tab" in command:
+        return "close_tab"
+    elif "refresh" in command or "reload" in command:
+        return "refresh"
+    elif "task manager" in command or "open task manager" in command:
+        return "task_manager"
+    elif "lock" in command and "computer" in command:
+        return "lock_computer"
+    elif "switch application" in command or "next window" in command:
+        return "switch_application"
+    elif "volume up" in command or "increase volume" in command:
+        return "volume_up"
+    elif "volume down" in command or "decrease volume" in command:
+        return "volume_down"
+    elif "mute" in command:
+        return "mute"
+    elif "shutdown" in command:
+        return "shutdown"
+    elif "restart" in command:
+        return "restart"
+    elif "sleep" in command or "hibernate" in command:
+        return "sleep"
+    elif "screenshot" in command or "take screenshot" in command:
+        return "screenshot"
+    elif "create file" in command or "make file" in command:
+        return "create_file"
+    elif "create folder" in command or "make folder" in command:
+        return "create_folder"
+    elif "take note" in command or "write note" in command or "remember this" in command:
+        return "take_note"
+    elif "weather" in command:
+        return "weather"
+    elif "calculate" in command or "what is" in command and any(op in command for op in ["+", "-", "*", "/", "plus", "minus", "times", "divided"]):
+        return "calculate"
+    elif "what's the date" in command or "what date is it" in command or "today's date" in command:
+        return "date"
+    elif "play music" in command or "play song" in command:
+        return "play_music"
+    elif "tell joke" in command or "tell me a joke" in command:
+        return "joke"
+    elif "news" in command or "headlines" in command:
+        return "news"
+    elif "battery" in command:
+        return "battery"
+    elif "cpu" in command or "processor" in command:
+        return "cpu"
+    elif "open youtube" in command:
+        return "open_website"
+    elif "open gmail" in command or "open email" in command:
+        return "open_website"
+    elif "open facebook" in command:
+        return "open_website"
+    elif "open twitter" in command:
+        return "open_website"
+    elif "open instagram" in command:
+        return "open_website"
+    elif "who are you" in command or "what is your name" in command:
+        return "who_are_you"
+    elif "exit" in command or "quit" in command or "stop" in command or "goodbye" in command:
+        return "exit"
+    return None
+
+
+def build_corpus(count, seed):
+    """
+    Builds a corpus of commands, some padded with filler words.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        command = rng.choice(SAMPLE_COMMANDS)
+        if rng.random() < 0.5:
+            command = f"{rng.choice(FILLER)} {command} {rng.choice(FILLER)}"
+        corpus.append(command)
+    return corpus
+
+
+def time_dispatch(variants, corpus, repeats=1):
+    """
+    Dispatches every command in the corpus through each of variants, a
+    {name: dispatch} dict, repeats times taking turns so that a slow
+    stretch of the machine hits them all alike. Returns ({name: fastest
+    seconds}, {name: results}).
+    """
+    seconds = {}
+    results = {}
+    for _ in range(repeats):
+        for name, dispatch in variants.items():
+            start = time.perf_counter()
+            results[name] = [dispatch(command) for command in corpus]
+            elapsed = time.perf_counter() - start
+            seconds[name] = min(elapsed, seconds.get(name, elapsed))
+    return seconds, results
+
+
+def check_expected(matcher):
+    """
+    Returns [(command, expected, got)] for the EXPECTED commands the matcher gets wrong.
+    """
+    wrong = []
+    for command, expected in EXPECTED.items():
+        got = matcher.match(command)
+        if got != expected:
+            wrong.append((command, expected, got))
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeats", type=int, default=5, help="runs per variant, the fastest is reported")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count, args.seed)
+
+    start = time.perf_counter()
+    matcher = IntentMatcher(cache_size=0)
+    compile_seconds = time.perf_counter() - start
+    cached_matcher = IntentMatcher()
+
+    seconds, results = time_dispatch(
+        {"legacy": legacy_dispatch, "matcher": matcher.match, "cached": cached_matcher.match}, corpus, args.repeats)
+    legacy_seconds, matcher_seconds, cached_seconds = seconds["legacy"], seconds["matcher"], seconds["cached"]
+    legacy_results = results["legacy"]
+    matcher_results = [match.name if match else None for match in results["matcher"]]
+
+    # Commands that fall through most of the chain are its worst case
+    slow_corpus = [command for command, old in zip(corpus, legacy_results) if old in (None, "exit", "who_are_you")]
+    slow_seconds, _ = time_dispatch({"legacy": legacy_dispatch, "matcher": matcher.match}, slow_corpus, args.repeats)
+    slow_legacy_seconds, slow_matcher_seconds = slow_seconds["legacy"], slow_seconds["matcher"]
+
+    # (old intent, new intent) -> [count, example command]
+    changed = {}
+    for command, old, new in zip(corpus, legacy_results, matcher_results):
+        if old != new:
+            entry = changed.setdefault((old, new), [0, command])
+            entry[0] += 1
+
+    print(f"Commands dispatched: {len(corpus)}")
+    print(f"Matcher compile time: {compile_seconds * 1e3:.3f} ms")
+    print(f"Substring chain:  {legacy_seconds / len(corpus) * 1e6:8.2f} us/command")
+    print(f"Intent matcher:   {matcher_seconds / len(corpus) * 1e6:8.2f} us/command (uncached)")
+    print(f"Intent matcher:   {cached_seconds / len(corpus) * 1e6:8.2f} us/command (cached)")
+    print(f"Speedup: {legacy_seconds / matcher_seconds:.2f}x uncached, {legacy_seconds / cached_seconds:.2f}x cached")
+    if slow_corpus:
+        print(f"End-of-chain commands ({len(slow_corpus)}):")
+        print(f"  Substring chain:  {slow_legacy_seconds / len(slow_corpus) * 1e6:8.2f} us/command")
+        print(f"  Intent matcher:   {slow_matcher_seconds / len(slow_corpus) * 1e6:8.2f} us/command (uncached)")
+    print(f"Commands routed differently: {sum(count for count, _ in changed.values())}")
+    for (old, new), (count, example) in sorted(changed.items(), key=lambda item: -item[1][0]):
+        print(f"  {old} -> {new}: {count} (e.g. {example!r})")
+
+    wrong = check_expected(matcher)
+    print(f"Expected matches: {len(EXPECTED) - len(wrong)}/{len(EXPECTED)}")
+    for command, expected, got in wrong:
+        print(f"  {command!r}: expected {expected}, got {got}")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Fuzzy matching benchmark: accuracy and latency on a labelled corpus of misrecognized commands.
+
+Reads benchmarks/misrecognitions.tsv: transcripts a recognizer got wrong
+("volume app", "take a screen shot", "crome"), each labelled with the
+intent or application meant, or "-" where nothing should be guessed.
+Commands go through the exact intent matcher alone and then with the
+fuzzy fallback the assistant uses; application names through the quick
+apps and an installed-application index (a synthetic install tree of
+--apps executables), then through the fuzzy match over both. Reports
+accuracy, wrong guesses at several cutoffs, and per-query latency with
+and without the result cache, against a difflib loop over the same
+phrases.
+
+    python benchmarks/bench_fuzzy.py [--corpus benchmarks/misrecognitions.tsv] [--apps 2000]
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app_index import AppIndex
+from fuzzy import APP_CUTOFF, CUTOFF, FuzzyMatcher, intent_phrases
+from intents import IntentMatcher, tokenize
+from voice import QUICK_APPS
+
+# Executables of a typical Windows install, under their vendor folders
+INSTALLED = (
+    "Google/Chrome/Application/chrome", "Microsoft/Edge/Application/msedge", "Mozilla Firefox/firefox",
+    "Microsoft Office/root/Office16/winword", "Microsoft Office/root/Office16/excel",
+    "Microsoft Office/root/Office16/powerpnt", "Microsoft Office/root/Office16/outlook",
+    "Microsoft Office/root/Office16/onenote", "Microsoft/Teams/current/teams", "Zoom/bin/zoom",
+    "Discord/app/discord", "Steam/steam", "Spotify/spotify", "VideoLAN/VLC/vlc", "obs-studio/bin/64bit/obs64",
+    "Audacity/audacity", "GIMP 2/bin/gimp-2.10", "Blender Foundation/Blender/blender",
+    "Adobe/Photoshop/photoshop", "Microsoft VS Code/code", "Notepad++/notepad++", "Windows NT/Accessories/wordpad",
+    "7-Zip/7zfm", "PuTTY/putty", "Git/git-bash", "Python/python", "Slack/slack", "WhatsApp/whatsapp",
+)
+SYLLABLES = "ka lo mi ne ru sa te vo xi zu bar con del fin gra hel ion jet kin lum mod nex orb".split()
+SUFFIXES = ("", "", "", "helper", "updater", "uninstall", "service", "launcher", "setup", "crashhandler")
+
+
+def load_corpus(path):
+    """
+    Returns {"intent": [(transcript, expected)], "app": [...]}; expected is None for "-".
+    """
+    corpus = {"intent": [], "app": []}
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            if not line.strip() or line.startswith("#"):
+                continue
+            kind, transcript, expected = line.rstrip("\n").split("\t")
+            corpus[kind].append((transcript, None if expected == "-" else expected))
+    return corpus
+
+
+def build_install_tree(directory, count, rng):
+    """
+    Creates empty executables: the well-known ones plus generated vendor
+    tools up to count. Returns the directory.
+    """
+    paths = list(INSTALLED)
+    while len(paths) < count:
+        vendor = "".join(rng.sample(SYLLABLES, 2)).title()
+        name = "".join(rng.sample(SYLLABLES, rng.randint(2, 3))) + rng.choice(SUFFIXES)
+        paths.append(f"{vendor}/{name}")
+    for path in paths:
+        full = os.path.join(directory, *path.split("/")) + ".exe"
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        open(full, "w").close()
+    return directory
+
+
+def resolve_intent(intents, fuzzy, transcript):
+    match = intents.match(transcript)
+    if match is None and fuzzy is not None:
+        corrected = fuzzy.correct(transcript)
+        if corrected is not None:
+            match = intents.match(corrected)
+    return match.name if match else None
+
+
+def executable_name(path):
+    return os.path.splitext(os.path.basename(path))[0].lower() if path else None
+
+
+def resolve_app(index, quick, transcript, use_fuzzy):
+    """
+    Returns the name of the executable the assistant would open for
+    transcript (as handle_open_application picks it), or None.
+    """
+    for name, executable in QUICK_APPS.items():
+        if name in transcript:
+            return executable_name(executable)
+    found = index.lookup(transcript)
+    if found or not use_fuzzy:
+        return executable_name(found)
+    quick_match = quick.match(transcript)
+    indexed = index.closest(transcript)
+    if indexed and (quick_match is None or indexed.score > quick_match.score):
+        return executable_name(index.lookup(indexed.label))
+    return executable_name(QUICK_APPS[quick_match.label]) if quick_match else None
+
+
+def app_target(index, name):
+    return executable_name(QUICK_APPS.get(name) or index.lookup(name))
+
+
+def tally(results):
+    """
+    Returns (right, wrong guesses, missed) for [(expected, got)].
+    """
+    right = sum(1 for expected, got in results if expected == got)
+    wrong = sum(1 for expected, got in results if got is not None and expected != got)
+    return right, wrong, len(results) - right - wrong
+
+
+def percentiles(values):
+    values = sorted(values)
+    return values[len(values) // 2], values[int(len(values) * 0.99)], values[-1]
+
+
+def timed(function, queries, rounds):
+    times = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            function(query)
+            times.append((time.perf_counter() - start) * 1000)
+    return percentiles(times)
+
+
+def difflib_match(entries, text):
+    """
+    The same windows scored phrase by phrase with difflib, for comparison.
+    """
+    words = tokenize(text)
+    best = (0.0, None)
+    for size in range(1, min(len(words), 5) + 1):
+        for start in range(len(words) - size + 1):
+            window = " ".join(words[start:start + size])
+            matcher = difflib.SequenceMatcher(None, window)
+            for label, phrase in entries:
+                matcher.set_seq1(phrase)
+                if matcher.real_quick_ratio() > best[0] and matcher.ratio() > best[0]:
+                    best = (matcher.ratio(), label)
+    return best[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "benchmarks", "misrecognitions.tsv"))
+    parser.add_argument("--apps", type=int, default=2000, help="executables in the synthetic install tree")
+    parser.add_argument("--rounds", type=int, default=20, help="timing passes over the corpus")
+    parser.add_argument("--seed", type=int, default=6)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    workdir = tempfile.mkdtemp(prefix="chanakya-fuzzy-")
+    root = build_install_tree(os.path.join(workdir, "apps"), args.apps, random.Random(args.seed))
+    index = AppIndex(roots=[root], db_path=os.path.join(workdir, "apps.sqlite3"))
+    index.refresh()
+
+    intents = IntentMatcher()
+    fuzzy = FuzzyMatcher(intent_phrases())
+    quick = FuzzyMatcher([(name, name) for name in QUICK_APPS], cutoff=APP_CUTOFF)
+
+    # Imported first so its import time isn't counted as building the matrices
+    import numpy  # noqa: F401
+    start = time.perf_counter()
+    fuzzy.match("warm up")
+    intent_build = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index.closest("warm up")
+    app_build = (time.perf_counter() - start) * 1000
+    print(f"{len(fuzzy)} intent phrases (matrix built in {intent_build:.1f} ms), "
+          f"{len(index._names)} indexed applications (built in {app_build:.1f} ms)")
+
+    # --- Accuracy ---
+    intent_cases = corpus["intent"]
+    app_cases = [(transcript, app_target(index, expected) if expected else None)
+                 for transcript, expected in corpus["app"]]
+    rows = [
+        ("intents, exact only", [(expected, resolve_intent(intents, None, transcript))
+                                 for transcript, expected in intent_cases]),
+        ("intents, with fuzzy", [(expected, resolve_intent(intents, fuzzy, transcript))
+                                 for transcript, expected in intent_cases]),
+        ("apps, exact only", [(expected, resolve_app(index, quick, transcript, False))
+                              for transcript, expected in app_cases]),
+        ("apps, with fuzzy", [(expected, resolve_app(index, quick, transcript, True))
+                              for transcript, expected in app_cases]),
+    ]
+    print(f"\n{'':<22} {'right':>6} {'wrong':>6} {'missed':>7} {'accuracy':>9}")
+    for name, results in rows:
+        right, wrong, missed = tally(results)
+        print(f"{name:<22} {right:>6} {wrong:>6} {missed:>7} {right / len(results):>9.1%}")
+
+    # Only the guesses the fallback made; a wrong exact match never reaches it
+    print("\nwrong guesses by the fuzzy fallback:")
+    for (transcript, _), (_, before), (expected, got) in zip(intent_cases + app_cases, rows[0][1] + rows[2][1],
+                                                             rows[1][1] + rows[3][1]):
+        if got is not None and got != expected and before is None:
+            print(f"  {transcript!r}: expected {expected or 'nothing'}, got {got}")
+
+    # --- Cutoff sweep ---
+    print(f"\n{'cutoff':>7} {'intents right':>14} {'wrong':>6} {'apps right':>11} {'wrong':>6}")
+    for cutoff in (0.45, 0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8):
+        sweep = FuzzyMatcher(intent_phrases(), cutoff=cutoff)
+        intent_right, intent_wrong, _ = tally([(expected, resolve_intent(intents, sweep, transcript))
+                                               for transcript, expected in intent_cases])
+        quick.cutoff = index._fuzzy[1].cutoff = cutoff
+        quick._cache.clear()
+        index._fuzzy[1]._cache.clear()
+        app_right, app_wrong, _ = tally([(expected, resolve_app(index, quick, transcript, True))
+                                         for transcript, expected in app_cases])
+        marks = " <- intents" * (cutoff == CUTOFF) + " <- apps" * (cutoff == APP_CUTOFF)
+        print(f"{cutoff:>7.2f} {intent_right:>14} {intent_wrong:>6} {app_right:>11} {app_wrong:>6}{marks}")
+
+    # --- Latency ---
+    transcripts = [transcript for transcript, _ in intent_cases]
+    names = [transcript for transcript, _ in corpus["app"]]
+    cold_intents = FuzzyMatcher(intent_phrases(), cache_size=0)
+    cold_apps = FuzzyMatcher([(name, name) for name in index._names], cutoff=APP_CUTOFF, cache_size=0)
+    intent_entries = cold_intents.entries
+    cold_intents.match("warm up")
+    cold_apps.match("warm up")
+    print(f"\n{'per query':<34} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, function, queries, rounds in (
+        ("intents, fuzzy", cold_intents.match, transcripts, args.rounds),
+        ("intents, fuzzy, cached", fuzzy.match, transcripts, args.rounds),
+        ("intents, difflib loop", lambda text: difflib_match(intent_entries, text), transcripts, 1),
+        (f"apps ({len(cold_apps)} names), fuzzy", cold_apps.match, names, args.rounds),
+        (f"apps ({len(cold_apps)} names), difflib loop",
+         lambda text: difflib_match(cold_apps.entries, text), names, 1),
+    ):
+        p50, p99, worst = timed(function, queries, rounds)
+        print(f"{name:<34} {p50:>8.3f} {p99:>8.3f} {worst:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Command history benchmark: autocomplete latency at keystroke rate with a large history.
+
+Builds a synthetic history (default 100k distinct commands in the shapes
+the assistant hears, with Zipf-distributed use counts spread over three
+months), then times loading it into the prefix trie, every prefix of a
+sample of commands typed one key at a time through suggest(), the same
+lookups as an indexed SQL prefix query, and record().
+
+    python benchmarks/bench_history.py [--commands 100000] [--typed 500] [--keep DIR]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import SCHEMA, TOP_K, CommandHistory, next_rank
+
+WORDS = ("weather news music python music cricket india delhi mumbai recipe pasta chicken train ticket "
+         "movie review guitar lesson football score stock price bitcoin history science space rocket "
+         "mars moon solar panel battery laptop phone camera photo edit video song dance yoga health "
+         "sleep coffee tea market report meeting email project deadline budget invoice travel hotel").split()
+APPS = ("notepad calculator chrome edge explorer spotify vlc word excel powerpoint code paint "
+        "terminal outlook teams zoom slack discord steam obs").split()
+SHAPES = (
+    lambda rng: f"open {rng.choice(APPS)}",
+    lambda rng: f"close {rng.choice(APPS)}",
+    lambda rng: f"search for {' '.join(rng.sample(WORDS, rng.randint(1, 4)))}",
+    lambda rng: f"wikipedia {' '.join(rng.sample(WORDS, rng.randint(1, 2)))}",
+    lambda rng: f"play song {' '.join(rng.sample(WORDS, rng.randint(1, 3)))}",
+    lambda rng: f"what is {rng.randint(1, 999)} plus {rng.randint(1, 999)}",
+    lambda rng: f"take note {' '.join(rng.sample(WORDS, rng.randint(2, 5)))}",
+    lambda rng: f"find my note about {rng.choice(WORDS)} {rng.choice(WORDS)}",
+    lambda rng: f"switch to {rng.choice(APPS)}",
+)
+
+
+def build_history(path, count, rng, now):
+    """
+    Writes count distinct commands with their ranks; returns them, most used first.
+    """
+    commands = set()
+    while len(commands) < count:
+        commands.add(rng.choice(SHAPES)(rng))
+    commands = sorted(commands)
+    rng.shuffle(commands)
+    rows = []
+    for position, command in enumerate(commands):
+        uses = max(1, int(200 / (position + 1) ** 0.8))
+        times = sorted(now - rng.uniform(0, 90 * 24 * 3600) for _ in range(uses))
+        rank = None
+        for used in times:
+            rank = next_rank(rank, used)
+        rows.append((command, uses, times[0], times[-1], rank))
+    db = sqlite3.connect(str(path))
+    db.executescript(SCHEMA)
+    db.executemany("INSERT INTO commands VALUES (?, ?, ?, ?, ?)", rows)
+    db.commit()
+    db.close()
+    return commands
+
+
+def percentiles(values):
+    values = sorted(values)
+    return values[len(values) // 2], values[int(len(values) * 0.99)], values[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=100000)
+    parser.add_argument("--typed", type=int, default=500, help="commands typed key by key")
+    parser.add_argument("--keep", help="write the history database in this directory")
+    parser.add_argument("--seed", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="chanakya-history-")
+    path = os.path.join(workdir, "history.sqlite3")
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(args.seed)
+    commands = build_history(path, args.commands, rng, time.time())
+
+    tracemalloc.start()
+    history = CommandHistory(db_path=path)
+    start = time.perf_counter()
+    history.wait_ready()
+    load_s = time.perf_counter() - start
+    memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    print(f"{len(commands)} commands: trie built in {load_s:.2f} s, {memory_mb:.0f} MB")
+
+    # Every prefix a user produces while typing, as the box sends them
+    typed = rng.sample(commands, min(args.typed, len(commands)))
+    prefixes = [command[:length] for command in typed for length in range(1, len(command) + 1)]
+
+    times = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        history.suggest(prefix)
+        times.append((time.perf_counter() - start) * 1000)
+    p50, p99, worst = percentiles(times)
+
+    db = sqlite3.connect(path)
+    sql_times = []
+    for prefix in prefixes[::10]:
+        start = time.perf_counter()
+        db.execute("SELECT command FROM commands WHERE command >= ? AND command < ? ORDER BY rank DESC LIMIT ?",
+                   (prefix, prefix + "\U0010ffff", TOP_K)).fetchall()
+        sql_times.append((time.perf_counter() - start) * 1000)
+    sql_p50, sql_p99, sql_worst = percentiles(sql_times)
+
+    print(f"\n{'lookup':<30} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print(f"{'suggest() on the trie':<30} {p50:>9.4f} {p99:>9.4f} {worst:>9.4f}   ({len(prefixes)} prefixes)")
+    print(f"{'SQL prefix range + sort':<30} {sql_p50:>9.4f} {sql_p99:>9.4f} {sql_worst:>9.4f}   "
+          f"({len(sql_times)} prefixes)")
+
+    record_times = []
+    for command in typed[:200]:
+        start = time.perf_counter()
+        history.record(command)
+        record_times.append((time.perf_counter() - start) * 1000)
+    p50, p99, worst = percentiles(record_times)
+    print(f"{'record()':<30} {p50:>9.4f} {p99:>9.4f} {worst:>9.4f}")
+    print(f"\nsuggest('open') -> {history.suggest('open')[:4]}")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
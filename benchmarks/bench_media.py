@@ -0,0 +1,126 @@
+"""
+Media library benchmark: scan, incremental rescan and fuzzy lookups.
+
+Builds a synthetic library (Artist/Album/NN - Artist - Title.ext, empty
+files, so titles come from file names) and times the first scan, a
+rescan with nothing changed, a rescan after one album changed, and the
+lookups behind "play song X" (with misheard titles), "play artist Y"
+and "shuffle", against the old per-request glob of ~/Music.
+
+    python benchmarks/bench_media.py [--tracks 20000] [--lookups 500] [--keep DIR]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_library import AUDIO_EXTENSIONS, MediaLibrary
+
+SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvwz" for vowel in ("a", "e", "i", "o", "u", "ay")]
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 4
+
+
+def word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+
+def build_library(root, tracks, rng):
+    """
+    Writes the synthetic library; returns [(artist, title)].
+    """
+    songs = []
+    artists = max(1, tracks // (TRACKS_PER_ALBUM * ALBUMS_PER_ARTIST))
+    for _ in range(artists):
+        artist = f"{word(rng).title()} {word(rng).title()}"
+        for album_number in range(ALBUMS_PER_ARTIST):
+            album = root / artist / f"Album {album_number + 1}"
+            album.mkdir(parents=True, exist_ok=True)
+            for track_number in range(TRACKS_PER_ALBUM):
+                title = " ".join(word(rng) for _ in range(rng.randint(1, 4))).capitalize()
+                extension = rng.choice(AUDIO_EXTENSIONS)
+                (album / f"{track_number + 1:02d} - {artist} - {title}{extension}").touch()
+                songs.append((artist, title))
+    return songs
+
+
+def misheard(text, rng):
+    """
+    Drops, doubles or swaps a letter, like a recognizer mishearing a name.
+    """
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return rng.choice((text[:i] + text[i + 1:], text[:i] + text[i] + text[i:],
+                       text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]))
+
+
+def timings_ms(fn, args_list):
+    times = []
+    results = []
+    for args in args_list:
+        start = time.perf_counter()
+        results.append(fn(*args))
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return (times[len(times) // 2], times[int(len(times) * 0.95)], times[-1]), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--keep", help="build the library and index in this directory")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = Path(args.keep or tempfile.mkdtemp(prefix="chanakya-media-"))
+    root = workdir / "Music"
+    rng = random.Random(args.seed)
+    songs = build_library(root, args.tracks, rng)
+    library = MediaLibrary(roots=[root], db_path=workdir / "media_library.sqlite3")
+
+    start = time.perf_counter()
+    library.refresh()
+    first_s = time.perf_counter() - start
+    start = time.perf_counter()
+    unchanged = library.refresh()
+    unchanged_ms = (time.perf_counter() - start) * 1000
+    album = root / songs[0][0] / "Album 1"
+    (album / f"13 - {songs[0][0]} - Bonus track.mp3").touch()
+    start = time.perf_counter()
+    changed = library.refresh()
+    changed_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(library.tracks)} tracks by {len(songs) // (TRACKS_PER_ALBUM * ALBUMS_PER_ARTIST)} artists")
+    print(f"  first scan            {first_s * 1000:9.1f} ms")
+    print(f"  rescan, no changes    {unchanged_ms:9.1f} ms ({unchanged} folders listed)")
+    print(f"  rescan, one new file  {changed_ms:9.1f} ms ({changed} folders listed)")
+
+    picks = [rng.choice(songs) for _ in range(args.lookups)]
+    title_queries = [(misheard(title.lower(), rng),) for _, title in picks]
+    artist_queries = [(misheard(artist.lower(), rng),) for artist, _ in picks]
+    rows = [
+        ("play song X (misheard)", library.find_track, title_queries, [title for _, title in picks],
+         lambda track: track.title if track else None),
+        ("play artist Y (misheard)", library.find_artist, artist_queries, [artist for artist, _ in picks],
+         lambda found: found[0]),
+        ("shuffle", lambda: library.shuffled(), [()] * args.lookups, None, None),
+        ("old glob of the music folder", lambda: list(root.glob("*.mp3")), [()] * min(20, args.lookups), None, None),
+    ]
+    print(f"\n{'lookup':<30} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'found':>7}")
+    for name, fn, args_list, expected, found_name in rows:
+        (p50, p95, worst), results = timings_ms(fn, args_list)
+        accuracy = ""
+        if expected is not None:
+            hits = sum(1 for result, want in zip(results, expected) if found_name(result) == want)
+            accuracy = f"{hits / len(expected):.0%}"
+        print(f"{name:<30} {p50:>9.3f} {p95:>9.3f} {worst:>9.3f} {accuracy:>7}")
+
+
+if __name__ == "__main__":
+    main()
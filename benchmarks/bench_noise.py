@@ -0,0 +1,149 @@
+"""
+Noise calibration replay: fixed vs. adaptive energy threshold on recorded noise.
+
+Plays WAV fixtures (mono, 16-bit) through the speech segmenter in listen
+windows, the way the assistant listens between commands. The fixed run
+calibrates once on the first second; the adaptive run keeps feeding the
+NoiseEstimator and picks up its threshold at every new window. Reports
+the threshold over time and the segments each run cut.
+
+Without fixtures, two are synthesized (noise that gets louder, then
+quieter, with one-second voiced bursts every five seconds) and the
+runs are scored: false segments in noise and missed bursts.
+
+    python benchmarks/bench_noise.py [fixture.wav ...] [--window 5] [--keep DIR]
+"""
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture import VoiceActivitySegmenter, WavSource
+from noise import NoiseEstimator
+
+RATE = 16000
+
+# (name, [(seconds, noise rms)]) - bursts are added every 5 s
+SYNTHETIC_FIXTURES = [
+    ("getting_louder", [(10, 80), (20, 700)]),
+    ("getting_quieter", [(10, 700), (20, 80)]),
+]
+BURST_EVERY_S = 5.0
+BURST_S = 1.0
+BURST_RMS = 4000
+
+
+def synthesize(path, stages, seed=7):
+    """
+    Writes a fixture and returns the (start, end) seconds of its voiced bursts.
+    """
+    rng = random.Random(seed)
+    samples = []
+    bursts = []
+    for seconds, noise_rms in stages:
+        samples.extend(rng.gauss(0, noise_rms) for _ in range(int(seconds * RATE)))
+    total = len(samples) / RATE
+    start = BURST_EVERY_S - BURST_S / 2
+    while start + BURST_S < total:
+        bursts.append((start, start + BURST_S))
+        for i in range(int(start * RATE), int((start + BURST_S) * RATE)):
+            samples[i] += BURST_RMS * math.sqrt(2) * math.sin(2 * math.pi * 220 * i / RATE)
+        start += BURST_EVERY_S
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        out.writeframes(b"".join(struct.pack("<h", max(-32768, min(32767, int(s)))) for s in samples))
+    return bursts
+
+
+def is_burst(segment, bursts):
+    """
+    Stands in for recognition: a segment "has words" if it is a burst cut
+    cleanly, not a burst swallowed by a long stretch of noise.
+    """
+    start, end = segment
+    return end - start <= BURST_S + 1.0 and any(start < b_end + 0.2 and end > b_start - 0.2
+                                                for b_start, b_end in bursts)
+
+
+def replay(path, adaptive, window_s, state_path, bursts=()):
+    """
+    Returns ([(start, end)] segment times, [(time, threshold)] per window).
+    """
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    estimator = NoiseEstimator(path=state_path, save_interval=float("inf"))
+    estimator.calibrate(WavSource(path), duration=1.0)
+
+    segments = []
+    thresholds = []
+    with WavSource(path) as source:
+        frame_s = source.frame_ms / 1000
+        now = 0.0
+        segmenter = None
+        window_end = 0.0
+        while True:
+            if segmenter is None or (now >= window_end and not segmenter.in_speech):
+                segmenter = VoiceActivitySegmenter(source.sample_rate, source.sample_width, source.frame_ms,
+                                                   energy_threshold=estimator.threshold)
+                if adaptive:
+                    segmenter.on_silence = estimator.observe_frame
+                thresholds.append((now, estimator.threshold))
+                window_end = now + window_s
+            frame = source.read()
+            if not frame:
+                break
+            now += frame_s
+            segment = segmenter.feed(frame, now)
+            if segment is not None:
+                times = (segment.speech_started_at, segment.speech_ended_at)
+                segments.append(times)
+                if adaptive and not is_burst(times, bursts):
+                    estimator.observe_segment(segment)
+    return segments, thresholds
+
+
+def score(segments, bursts):
+    false = sum(1 for segment in segments if not is_burst(segment, bursts))
+    missed = sum(1 for burst in bursts if not any(is_burst(segment, [burst]) for segment in segments))
+    return false, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="mono 16-bit WAV files of room noise")
+    parser.add_argument("--window", type=float, default=5.0, help="seconds per listen window")
+    parser.add_argument("--keep", help="write the synthesized fixtures to this directory")
+    args = parser.parse_args()
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="chanakya-noise-")
+    os.makedirs(workdir, exist_ok=True)
+    state_path = os.path.join(workdir, "noise.json")
+
+    fixtures = [(path, None) for path in args.fixtures]
+    if not fixtures:
+        for name, stages in SYNTHETIC_FIXTURES:
+            path = os.path.join(workdir, f"{name}.wav")
+            fixtures.append((path, synthesize(path, stages)))
+
+    for path, bursts in fixtures:
+        print(f"\n{os.path.basename(path)}")
+        for label, adaptive in (("fixed", False), ("adaptive", True)):
+            segments, thresholds = replay(path, adaptive, args.window, state_path, bursts or ())
+            trace = " ".join(f"{threshold:.0f}" for _, threshold in thresholds)
+            line = f"  {label:<9} segments={len(segments):<3}"
+            if bursts is not None:
+                false, missed = score(segments, bursts)
+                line += f" false={false:<3} missed={missed}/{len(bursts)}"
+            print(line + f"  thresholds per window: {trace}")
+
+
+if __name__ == "__main__":
+    main()
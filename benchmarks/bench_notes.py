@@ -0,0 +1,127 @@
+"""
+Notes store benchmark: writes, imports and queries at 100k+ notes.
+
+Generates notes spread over two years, writes them to a voice_notes.txt
+file and imports it into a fresh NotesStore, then times the commands
+that read notes back (find, read last N, date ranges) against a plain
+scan of the text file, which is what finding a note used to mean.
+
+    python benchmarks/bench_notes.py [--notes 100000] [--queries 200] [--keep DIR]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notes import NotesStore
+
+WORDS = ("buy milk call mom dentist appointment meeting project deadline remember password garden "
+         "birthday gift flight hotel booking invoice pay rent doctor gym book read chapter idea app "
+         "python bug fix release review notes lecture exam groceries bread eggs coffee car service "
+         "insurance bank transfer parcel pickup train ticket concert movie dinner lunch recipe").split()
+
+
+def generate(count, rng, now):
+    """
+    Returns [(created_at, text)] oldest first, spread over two years.
+    """
+    start = now - 2 * 365 * 24 * 3600
+    times = sorted(rng.uniform(start, now) for _ in range(count))
+    return [(created_at, " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))) for created_at in times]
+
+
+def write_text_file(path, notes):
+    with open(path, "w") as f:
+        for created_at, text in notes:
+            stamp = datetime.datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
+            f.write(f"\n[{stamp}] {text}\n")
+
+
+def scan_text_file(path, words):
+    """
+    The old way: read the whole file and keep lines containing every word.
+    """
+    found = []
+    with open(path) as f:
+        for line in f:
+            if all(word in line for word in words):
+                found.append(line)
+    return found
+
+
+def timings_ms(fn, args_list):
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)], times[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200, help="queries per kind")
+    parser.add_argument("--keep", help="write the database and text file to this directory")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="chanakya-notes-")
+    os.makedirs(workdir, exist_ok=True)
+    rng = random.Random(args.seed)
+    now = time.time()
+    notes = generate(args.notes, rng, now)
+
+    text_path = os.path.join(workdir, "voice_notes.txt")
+    write_text_file(text_path, notes)
+    store = NotesStore(path=os.path.join(workdir, "notes.sqlite3"), flush_interval=0.2)
+
+    start = time.perf_counter()
+    imported = store.import_text(text_path)
+    import_s = time.perf_counter() - start
+    print(f"Imported {imported} notes in {import_s:.2f} s ({imported / import_s:,.0f} notes/s); "
+          f"full-text index: {'FTS5' if store.full_text else 'unavailable, using LIKE'}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        store.add(" ".join(rng.choice(WORDS) for _ in range(6)))
+    add_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    store.flush()
+    flush_ms = (time.perf_counter() - start) * 1000
+    print(f"add() x1000: {add_ms:.2f} ms buffered, {flush_ms:.1f} ms to flush")
+
+    day = 24 * 3600
+    one_word = [(rng.choice(WORDS),) for _ in range(args.queries)]
+    two_words = [(f"{rng.choice(WORDS)} {rng.choice(WORDS)}",) for _ in range(args.queries)]
+    counts = [(rng.choice((1, 3, 5, 10)),) for _ in range(args.queries)]
+    days = []
+    for _ in range(args.queries):
+        first = now - rng.uniform(0, 700) * day
+        days.append((first, first + day))
+    weeks = [(end - 7 * day, end) for _, end in days]
+
+    rows = [
+        ("find, one word", lambda query: store.search(query, limit=3), one_word),
+        ("find, two words", lambda query: store.search(query, limit=3), two_words),
+        ("read last N", store.latest, counts),
+        ("notes from a day", lambda start, end: store.between(start, end, limit=5), days),
+        ("count notes in a week", store.count, weeks),
+        ("text file scan, two words", lambda query: scan_text_file(text_path, query.split()),
+         two_words[:max(1, args.queries // 20)]),
+    ]
+    print(f"\n{'query':<28} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, fn, args_list in rows:
+        p50, p95, worst = timings_ms(fn, args_list)
+        print(f"{name:<28} {p50:>9.3f} {p95:>9.3f} {worst:>9.3f}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Compound command benchmark: wall time of multi-step workflows spoken as one command vs. one command per step.
+
+Runs each workflow ("open notepad, type hello world and save it")
+through the replayed voice pipeline twice: once as separate utterances,
+one listen -> recognize -> act -> speak cycle per step, and once as a
+single compound utterance run as a plan with one combined reply. Speech
+is captured in real time from synthesized audio as long as the words
+take to say, recognition and speaking take simulated time, and opened
+applications take --app-start-ms to come up. Each run ends when the
+last action has finished. Devices are stubbed as in replay.py.
+
+First checks how EXPECTED_PLANS are split, and that an application
+that never opens cancels only the later steps of its own plan; exits
+with status 1 if either is wrong.
+
+    python benchmarks/bench_plans.py [--recognition-ms 600] [--tts-ms-per-char 60] [--word-ms 350]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from replay import StubProcessTable, build_assistant, isolate_environment, write_burst
+
+WORKFLOWS = (
+    "open notepad, type hello world and save it",
+    "open notepad, type meeting notes for monday, select all and copy",
+    "select all, copy, new tab and paste",
+    "open youtube and search for lo-fi music",
+    "what time is it and what's the date",
+    "volume up, then new tab",
+)
+
+# command -> intents of its steps, None for a part that wasn't
+# understood, or None for a single command
+EXPECTED_PLANS = {
+    "open notepad, type hello world and save it": ["open_app", "type_text", "save"],
+    "take a screenshot and save it": None,
+    "take screenshot, then save it": None,
+    "take a screenshot and open notepad": ["screenshot", "open_app"],
+    "search for salt and pepper": None,
+    "please, open notepad and type hello": ["open_app", "type_text"],
+    "copy, frobnicate and paste": ["copy", None, "paste"],
+    "frobnicate the widget and then paste": [None, "paste"],
+}
+
+
+class SlowStartProcessTable(StubProcessTable):
+    """
+    A process table on which launched applications take a while to appear.
+    """
+
+    def __init__(self, start_seconds):
+        super().__init__()
+        self.start_seconds = start_seconds
+
+    def wait_for(self, app_name, timeout, exclude=(), poll=0.2):
+        time.sleep(min(self.start_seconds, timeout))
+        return [100]
+
+
+class NeverStartsProcessTable(StubProcessTable):
+    """
+    A process table on which launched applications never appear.
+    """
+
+    def wait_for(self, app_name, timeout, exclude=(), poll=0.2):
+        return []
+
+
+def check_plans(assistant):
+    """
+    Returns a list of what is wrong with splitting EXPECTED_PLANS and with
+    cancelling the rest of a plan whose application never opens.
+    """
+    from plans import split_command
+
+    wrong = []
+    for command, expected in EXPECTED_PLANS.items():
+        plan = split_command(command, assistant.intents)
+        got = [step.match.name if step.match else None for step in plan] if plan else None
+        if got != expected:
+            wrong.append(f"{command!r} split as {got}, expected {expected}")
+
+    # An action queued by something else must outlive the failed plan
+    processes = assistant.processes
+    assistant.processes = NeverStartsProcessTable()
+    other = assistant.actions.submit("volume_up", lambda: None, ("keyboard",), delay=0.5)
+    try:
+        assistant.run_plan(split_command("open notepad, type hello world and save it", assistant.intents))
+        wait_idle(assistant.actions)
+    finally:
+        assistant.processes = processes
+    if other.state != "done":
+        wrong.append(f"an action outside the failed plan ended {other.state}")
+    return wrong
+
+
+def wait_idle(actions):
+    while True:
+        stats = actions.stats()
+        if not stats["queued"] and not stats["running"]:
+            return
+        time.sleep(0.005)
+
+
+def run_utterances(assistant, source, answers, utterances, workdir, word_ms):
+    """
+    Speaks each utterance, runs it, and waits for its actions; returns the seconds taken.
+    """
+    start = time.perf_counter()
+    for position, utterance in enumerate(utterances):
+        path = os.path.join(workdir, f"utterance{position}.wav")
+        write_burst(path, seconds=len(utterance.split()) * word_ms / 1000)
+        source["path"] = path
+        answers[:] = [utterance]
+        assistant.process_command(assistant.listen_for_command())
+    wait_idle(assistant.actions)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recognition-ms", type=float, default=600.0, help="simulated recognition time")
+    parser.add_argument("--tts-ms-per-char", type=float, default=60.0, help="simulated speaking time")
+    parser.add_argument("--word-ms", type=float, default=350.0, help="time the user takes to say a word")
+    parser.add_argument("--app-start-ms", type=float, default=800.0, help="time an opened application takes to start")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chanakya-plans-")
+    isolate_environment(workdir)
+
+    from capture import WavSource
+    from plans import describe_plan, split_command
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assistant, _, source, answers = build_assistant(args.recognition_ms, args.tts_ms_per_char)
+    assistant.listener.source_factory = lambda: WavSource(source["path"], realtime=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        wrong = check_plans(assistant)
+    for problem in wrong:
+        print(f"wrong: {problem}")
+    if wrong:
+        sys.exit(1)
+    assistant.processes = SlowStartProcessTable(args.app_start_ms / 1000)
+
+    print(f"{'workflow':<66} {'steps':>5} {'separate s':>11} {'compound s':>11} {'saved':>7}")
+    totals = [0.0, 0.0]
+    for workflow in WORKFLOWS:
+        plan = split_command(workflow, assistant.intents)
+        with contextlib.redirect_stdout(io.StringIO()):
+            separate = run_utterances(assistant, source, answers, [step.text for step in plan], workdir,
+                                      args.word_ms)
+            compound = run_utterances(assistant, source, answers, [workflow], workdir, args.word_ms)
+        totals[0] += separate
+        totals[1] += compound
+        print(f"{workflow:<66} {len(plan):>5} {separate:>11.2f} {compound:>11.2f} {1 - compound / separate:>7.0%}")
+        print(f"  {describe_plan(plan)}")
+    print(f"{'total':<66} {'':>5} {totals[0]:>11.2f} {totals[1]:>11.2f} {1 - totals[1] / totals[0]:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Hedged recognition benchmark: single cloud call vs. cloud and local engine raced with a deadline.
+
+Uses stand-in backends instead of Google and Sphinx: a "cloud" one
+with long-tailed latency (occasionally very slow), outages and high
+confidence, and a "local" one with steady latency and low confidence.
+Each phrase goes through the old single call (waiting however long
+the cloud takes) and through HedgedRecognizer, and the script reports
+latency percentiles, lost commands and which backend won.
+
+First checks HedgedRecognizer against scripted stand-ins: a confident
+answer wins at once, an unsure one waits for a better one until the
+deadline, failures fall back to the other backend, and a backend that
+hangs sits phrases out instead of using up the workers; exits with
+status 1 if any of that is wrong.
+
+    python benchmarks/bench_recognition.py [--phrases 300] [--deadline 2.0] [--scale 0.05]
+
+Latencies are simulated with sleeps shortened by --scale and reported
+at full size.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+from recognition import Backend, HedgedRecognizer
+
+
+class StandIn:
+    """
+    A backend that sleeps for a drawn latency and then answers or fails.
+    """
+
+    def __init__(self, name, latency, confidence, failure_rate, no_match_rate, scale, seed):
+        self.name = name
+        self.latency = latency
+        self.confidence = confidence
+        self.failure_rate = failure_rate
+        self.no_match_rate = no_match_rate
+        self.scale = scale
+        self.rng = random.Random(seed)
+
+    def __call__(self, audio):
+        latency, roll = self.latency(self.rng), self.rng.random()
+        time.sleep(latency * self.scale)
+        if roll < self.failure_rate:
+            raise sr.RequestError(f"{self.name} unavailable")
+        if roll < self.failure_rate + self.no_match_rate:
+            raise sr.UnknownValueError()
+        return audio, self.confidence
+
+
+class Scripted:
+    """
+    A backend that waits delay seconds (or until release is set) and then
+    returns (text, confidence) or raises error.
+    """
+
+    def __init__(self, delay, text=None, confidence=0.9, error=None, release=None):
+        self.delay = delay
+        self.text = text
+        self.confidence = confidence
+        self.error = error
+        self.release = release
+
+    def __call__(self, audio):
+        if self.release is not None:
+            self.release.wait()
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.text, self.confidence
+
+
+# (name, {backend: Scripted arguments}, deadline, expected result or
+# error type, expected seconds taken)
+CASES = (
+    ("confident answer wins at once", {"cloud": (0.05, "cloud"), "local": (0.5, "local", 0.3)},
+     1.0, "cloud", 0.05),
+    ("unsure answer waits for a confident one", {"cloud": (0.3, "cloud"), "local": (0.05, "local", 0.3)},
+     1.0, "cloud", 0.3),
+    ("unsure answer wins at the deadline", {"cloud": (1.0, "cloud"), "local": (0.05, "local", 0.3)},
+     0.3, "local", 0.3),
+    ("most confident unsure answer wins", {"cloud": (0.05, "cloud", 0.4), "local": (0.05, "local", 0.3)},
+     0.5, "cloud", 0.05),
+    ("failed cloud falls back to local", {"cloud": (0.05, None, 0.9, sr.RequestError("down")),
+                                          "local": (0.2, "local", 0.3)},
+     1.0, "local", 0.2),
+    ("no words heard", {"cloud": (0.05, None, 0.9, sr.UnknownValueError()),
+                        "local": (0.05, None, 0.3, sr.UnknownValueError())},
+     1.0, sr.UnknownValueError, 0.05),
+    ("failure is reported over no words", {"cloud": (0.05, None, 0.9, sr.RequestError("down")),
+                                           "local": (0.1, None, 0.3, sr.UnknownValueError())},
+     1.0, sr.RequestError, 0.1),
+    ("nothing by the deadline", {"cloud": (1.0, "cloud"), "local": (1.0, "local", 0.3)},
+     0.2, sr.RequestError, 0.2),
+)
+
+# How far a case may take longer than expected, for thread scheduling
+SLACK = 0.1
+
+
+def check_hedging():
+    """
+    Returns a list of what HedgedRecognizer gets wrong on CASES and with a
+    backend that hangs.
+    """
+    wrong = []
+    for name, scripts, deadline, expected, seconds in CASES:
+        backends = [Backend(backend, Scripted(*script)) for backend, script in scripts.items()]
+        hedged = HedgedRecognizer(backends, deadline=deadline)
+        start = time.perf_counter()
+        try:
+            got = hedged.recognize(b"audio")
+        except (sr.RequestError, sr.UnknownValueError) as e:
+            got = type(e)
+        taken = time.perf_counter() - start
+        if got != expected:
+            wrong.append(f"{name}: got {got}, expected {expected}")
+        elif not seconds - 0.01 <= taken <= seconds + SLACK:
+            wrong.append(f"{name}: took {taken:.2f} s, expected {seconds:.2f} s")
+
+    # A hung cloud is called at most max_in_flight times; local keeps answering
+    release = threading.Event()
+    hung = Scripted(0.0, "cloud", release=release)
+    hedged = HedgedRecognizer([Backend("cloud", hung), Backend("local", Scripted(0.01, "local", 0.3))],
+                              deadline=0.05, max_in_flight=2)
+    try:
+        got = [hedged.recognize(b"audio") for _ in range(6)]
+    except sr.RequestError as e:
+        got = [e]
+    finally:
+        release.set()
+    busy = hedged.stats()["cloud"]["busy"]
+    if got != ["local"] * 6 or busy != 4:
+        wrong.append(f"hung backend: got {got} with cloud busy {busy} times, expected local 6 times and 4")
+    return wrong
+
+
+def cloud_latency(rng):
+    # Mostly ~0.7 s, with a slow tail from congestion and retransmits
+    if rng.random() < 0.08:
+        return rng.uniform(3.0, 12.0)
+    return rng.lognormvariate(-0.4, 0.35)
+
+
+def local_latency(rng):
+    return rng.uniform(0.9, 1.4)
+
+
+def percentiles(values):
+    values = sorted(values)
+    return [values[min(len(values) - 1, int(len(values) * q))] for q in (0.5, 0.95, 0.99)] + [values[-1]]
+
+
+def run(recognize, phrases, scale):
+    times = []
+    lost = 0
+    for phrase in phrases:
+        start = time.perf_counter()
+        try:
+            recognize(phrase)
+        except (sr.RequestError, sr.UnknownValueError):
+            lost += 1
+        times.append((time.perf_counter() - start) / scale * 1000)
+    return times, lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--phrases", type=int, default=300)
+    parser.add_argument("--deadline", type=float, default=2.0, help="seconds, at full scale")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--outages", type=float, default=0.05, help="fraction of cloud requests that fail")
+    parser.add_argument("--scale", type=float, default=0.05, help="multiply simulated latencies by this")
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    wrong = check_hedging()
+    for problem in wrong:
+        print(f"wrong: {problem}")
+    if wrong:
+        sys.exit(1)
+
+    phrases = [f"phrase {index}" for index in range(args.phrases)]
+
+    def backends():
+        cloud = StandIn("cloud", cloud_latency, 0.9, args.outages, 0.02, args.scale, args.seed)
+        local = StandIn("local", local_latency, 0.3, 0.0, 0.05, args.scale, args.seed + 1)
+        return Backend("cloud", cloud), Backend("local", local)
+
+    cloud, _ = backends()
+    single_times, single_lost = run(lambda audio: cloud(audio)[0], phrases, args.scale)
+
+    hedged = HedgedRecognizer(backends(), threshold=args.threshold, deadline=args.deadline * args.scale)
+    hedged_times, hedged_lost = run(hedged.recognize, phrases, args.scale)
+
+    print(f"{args.phrases} phrases, deadline {args.deadline:g} s, cloud outages {args.outages:.0%}")
+    print(f"\n{'':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'lost':>6}")
+    for name, times, lost in (("single cloud call", single_times, single_lost),
+                              ("hedged cloud + local", hedged_times, hedged_lost)):
+        p50, p95, p99, worst = percentiles(times)
+        print(f"{name:<22} {p50:>8.0f} {p95:>8.0f} {p99:>8.0f} {worst:>8.0f} {lost:>6}")
+
+    stats = hedged.stats()
+    print(f"\n{'backend':<10} {'wins':>6} {'win rate':>9} {'no match':>9} {'errors':>7} {'cancelled':>10}")
+    for name in ("cloud", "local"):
+        row = stats[name]
+        print(f"{name:<10} {row['wins']:>6} {row['win_rate']:>9.1%} {row['no_match']:>9} "
+              f"{row['errors']:>7} {row['cancelled']:>10}")
+    print(f"deadlines missed: {stats['all']['deadlines_missed']}")
+
+
+if __name__ == "__main__":
+    main()
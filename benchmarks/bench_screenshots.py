@@ -0,0 +1,128 @@
+"""
+Screenshot pipeline benchmark: reply latency, encode cost per format, bursts.
+
+Uses a synthetic desktop-like frame (default 3840x2160: flat windows,
+gradients, text-like detail) in place of the screen, and compares:
+the old synchronous grab + PNG save, the time capture() takes to return
+with encoding in the worker pool, the encode time and file size for
+each format and compression setting, and a burst at a fixed interval.
+
+    python benchmarks/bench_screenshots.py [--size 3840x2160] [--burst 10] [--interval 0.2] [--keep DIR]
+
+Needs Pillow (installed with pyautogui).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from screenshots import ScreenshotSaver
+
+SETTINGS = [
+    ("png", {"compress_level": 6}),
+    ("png", {"compress_level": 1}),
+    ("jpeg", {"quality": 90}),
+    ("jpeg", {"quality": 75}),
+    ("webp", {"quality": 80}),
+]
+
+
+def desktop_frame(width, height, seed=11):
+    """
+    Draws something that compresses like a real desktop rather than noise.
+    """
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 4):
+        shade = 40 + 60 * y // height
+        draw.rectangle((0, y, width, y + 4), fill=(shade, shade + 20, shade + 60))
+    for _ in range(12):
+        x, y = rng.randrange(width // 2), rng.randrange(height // 2)
+        w, h = rng.randrange(width // 4, width // 2), rng.randrange(height // 4, height // 2)
+        draw.rectangle((x, y, x + w, y + h), fill=(245, 245, 245), outline=(90, 90, 90))
+        for line in range(y + 30, y + h - 10, 18):
+            length = rng.randrange(w // 4, w - 20)
+            for cx in range(x + 10, x + length, 7):
+                if rng.random() < 0.85:
+                    draw.rectangle((cx, line, cx + 4, line + 9), fill=(rng.randrange(60), rng.randrange(60), 80))
+    return image
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="3840x2160", help="frame size, WIDTHxHEIGHT")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=10, help="frames in the burst")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between burst frames")
+    parser.add_argument("--keep", help="save the screenshots in this directory")
+    args = parser.parse_args()
+
+    width, height = (int(part) for part in args.size.lower().split("x"))
+    frame = desktop_frame(width, height)
+    directory = args.keep or tempfile.mkdtemp(prefix="chanakya-shots-")
+
+    def grab():
+        return frame.copy()
+
+    # The old way: the reply waited for grab + PNG encode + write
+    old = []
+    for run in range(args.runs):
+        start = time.perf_counter()
+        grab().save(os.path.join(directory, f"old_{run}.png"))
+        old.append((time.perf_counter() - start) * 1000)
+
+    saver = ScreenshotSaver(directory=directory, grab=grab)
+    returns = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        shot = saver.capture()
+        returns.append((time.perf_counter() - start) * 1000)
+        shot.wait()
+    saver.close()
+    print(f"{width}x{height} frame")
+    print(f"  reply waits, old synchronous PNG save  {median(old):8.1f} ms")
+    print(f"  reply waits, capture() with workers    {median(returns):8.1f} ms")
+
+    print(f"\n{'format':<8} {'setting':<18} {'encode ms':>10} {'save ms':>8} {'size KB':>9}")
+    for format, options in SETTINGS:
+        saver = ScreenshotSaver(directory=directory, format=format, grab=grab, **options)
+        shots = []
+        for _ in range(args.runs):
+            shot = saver.capture()
+            shot.wait()
+            shots.append(shot)
+        saver.close()
+        size = os.path.getsize(shots[-1].path) / 1024
+        setting = ", ".join(f"{key}={value}" for key, value in options.items())
+        print(f"{format:<8} {setting:<18} {median(shot.timings['encode'] for shot in shots):>10.1f} "
+              f"{median(shot.timings['save'] for shot in shots):>8.1f} {size:>9.0f}")
+
+    saver = ScreenshotSaver(directory=directory, grab=grab, compress_level=1)
+    start = time.monotonic()
+    shots = saver.burst(args.burst, args.interval)
+    captured = time.monotonic() - start
+    for shot in shots:
+        shot.wait()
+    saved = time.monotonic() - start
+    saver.close()
+    stats = saver.stats()
+    print(f"\nBurst of {args.burst} every {args.interval} s: captured in {captured:.2f} s "
+          f"(schedule {(args.burst - 1) * args.interval:.2f} s), all saved after {saved:.2f} s")
+    for phase, row in stats.items():
+        print(f"  {phase:<8} p50 {row['p50_ms']:7.1f} ms   max {row['max_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
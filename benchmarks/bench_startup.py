@@ -0,0 +1,98 @@
+"""
+Startup benchmark: import time and time to first served request.
+
+Each run starts a fresh interpreter, imports app.py, builds the Flask app
+with a silent speech backend and serves /execute twice through the test
+client. Also reports the import time of the heavy dependencies that are
+now loaded on first use, and which of them the first request pulled in.
+
+    python benchmarks/bench_startup.py [--runs 5] [--command "what time is it"]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["speech_recognition", "pyautogui", "psutil", "requests", "pyttsx3", "numpy"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+from speech import FakeBackend
+web = app.create_app(speech_backend=FakeBackend())
+created = time.perf_counter()
+client = web.test_client()
+client.post('/execute', json={"command": sys.argv[1]})
+first = time.perf_counter()
+client.post('/execute', json={"command": sys.argv[1]})
+second = time.perf_counter()
+import lazy
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (first - created) * 1000,
+    "second_request_ms": (second - first) * 1000,
+    "ready_ms": (first - start) * 1000,
+    "lazy_loaded": sorted(lazy.IMPORT_TIMES),
+    "heavy_loaded": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+EAGER_CHILD = """
+import importlib, json, sys, time
+start = time.perf_counter()
+try:
+    importlib.import_module(sys.argv[1])
+except Exception:
+    print(json.dumps({}))
+else:
+    print(json.dumps({sys.argv[1]: (time.perf_counter() - start) * 1000}))
+"""
+
+
+def run_child(code, *args):
+    env = dict(os.environ, CHANAKYA_HOME=tempfile.mkdtemp(prefix="chanakya-bench-"))
+    output = subprocess.run(
+        [sys.executable, "-c", code, *args], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--command", default="what time is it")
+    args = parser.parse_args()
+
+    try:
+        runs = [run_child(CHILD, args.command) for _ in range(args.runs)]
+    except subprocess.CalledProcessError as e:
+        print(e.stderr)
+        sys.exit(f"Startup run failed (exit code {e.returncode}); are Flask and the requirements installed?")
+
+    print(f"Cold start over {args.runs} runs (median / max, ms):")
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "second_request_ms", "ready_ms"):
+        values = [run[key] for run in runs]
+        print(f"  {key[:-3]:<18} {statistics.median(values):8.1f} {max(values):8.1f}")
+    print(f"  loaded lazily by the first request: {', '.join(runs[0]['lazy_loaded']) or 'nothing'}")
+    print(f"  heavy modules in memory afterwards: {', '.join(runs[0]['heavy_loaded']) or 'none'}")
+
+    # One interpreter per module so shared sub-imports are counted for each
+    eager = {}
+    for name in HEAVY_MODULES:
+        eager.update(run_child(EAGER_CHILD, name))
+    print("\nImport time of heavy dependencies (deferred until first use):")
+    for name in HEAVY_MODULES:
+        print(f"  {name:<18} " + (f"{eager[name]:8.1f} ms" if name in eager else "   not installed"))
+
+
+if __name__ == "__main__":
+    main()
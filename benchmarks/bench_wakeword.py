@@ -0,0 +1,192 @@
+"""
+Wake-word gating benchmark: what reaches the cloud recognizer from an always-open stream.
+
+Writes a WAV of background noise with tone "words" at different pitches
+standing in for speech (side chatter, the wake word, commands), in the
+patterns that matter: chatter, "Chanakya open notepad" in one breath,
+"Chanakya" ... pause ... command, and a wake word with nothing after it.
+It is played through WakeWordListener with a pitch-based detector and
+recognizer in place of Sphinx and Google, and reports the commands
+recognized, the seconds of audio sent for recognition against the
+speech heard, and whether the pre-roll before the wake word was kept.
+
+    python benchmarks/bench_wakeword.py [--rounds 5] [--keep FILE]
+    python benchmarks/bench_wakeword.py --wav recording.wav [--recognizer sphinx|google]
+
+With --wav a real recording goes through SphinxDetector (needs
+pocketsphinx) and the commands are printed.
+"""
+import argparse
+import array
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+from capture import WavSource
+from wakeword import SphinxDetector, TranscriptDetector, WakeWordListener
+
+SAMPLE_RATE = 16000
+
+# Tone pitch (Hz) -> the word it stands for
+WORDS = {300: "blah", 700: "chanakya", 1200: "open notepad", 1800: "what time is it"}
+
+
+def tone(seconds, frequency, rng, amplitude=4000):
+    return [int(amplitude * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)) + rng.randint(-40, 40)
+            for i in range(int(seconds * SAMPLE_RATE))]
+
+
+def quiet(seconds, rng):
+    return [rng.randint(-40, 40) for _ in range(int(seconds * SAMPLE_RATE))]
+
+
+def build_wav(path, rounds, rng):
+    """
+    Writes the scenario; returns (expected commands, seconds of tone speech).
+    """
+    samples = quiet(1.0, rng)
+    expected = []
+    speech = 0.0
+    for _ in range(rounds):
+        parts = [
+            (300, 1.5), (None, 1.0),                                  # chatter
+            (700, 0.7), (None, 0.15), (1200, 1.2), (None, 1.2),       # one breath
+            (300, 2.0), (None, 1.0),                                  # chatter
+            (700, 0.7), (None, 1.0), (1800, 1.5), (None, 1.2),        # wake, pause, command
+            (700, 0.7), (None, 6.0), (300, 1.0), (None, 1.0),         # wake, then only chatter later
+        ]
+        for frequency, seconds in parts:
+            if frequency is None:
+                samples += quiet(seconds, rng)
+            else:
+                samples += tone(seconds, frequency, rng)
+                speech += seconds
+        expected += [WORDS[1200], WORDS[1800]]
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(array.array("h", samples).tobytes())
+    return expected, speech
+
+
+def pitch_words(audio, window_s=0.05, level=300):
+    """
+    Stands in for a recognizer: names the pitch of each fully voiced window,
+    counting zero crossings between samples louder than level (so the
+    noise floor doesn't add any).
+    """
+    samples = array.array("h", audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2))
+    size = int(window_s * SAMPLE_RATE)
+    words = []
+    for start in range(0, len(samples) - size + 1, size):
+        loud = [x for x in samples[start:start + size] if abs(x) > level]
+        if len(loud) < 0.8 * size:
+            continue
+        crossings = sum(1 for a, b in zip(loud, loud[1:]) if (a < 0) != (b < 0))
+        word = WORDS[min(WORDS, key=lambda f: abs(f - crossings / 2 / window_s))]
+        if not words or words[-1] != word:
+            words.append(word)
+    return " ".join(words)
+
+
+class CountingRecognizer:
+    """
+    The pitch recognizer, counting the audio it is sent and where it starts.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.leading_quiet = []
+
+    def __call__(self, audio):
+        self.calls += 1
+        data = audio.get_raw_data()
+        self.seconds += len(data) / (audio.sample_rate * audio.sample_width)
+        samples = array.array("h", data)
+        quiet_samples = next((i for i, x in enumerate(samples) if abs(x) > 1000), len(samples))
+        self.leading_quiet.append(quiet_samples / audio.sample_rate * 1000)
+        text = pitch_words(audio)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def collect(listener):
+    commands = []
+    listener.start()
+    while True:
+        command = listener.listen(timeout=30)
+        if command is None:
+            break
+        commands.append(command)
+    return commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--keep", help="write the synthetic WAV here")
+    parser.add_argument("--wav", help="run a real recording through SphinxDetector instead")
+    parser.add_argument("--recognizer", choices=("sphinx", "google"), default="sphinx",
+                        help="recognizer for commands with --wav")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.wav:
+        recognizer = sr.Recognizer()
+        recognize = recognizer.recognize_sphinx if args.recognizer == "sphinx" else recognizer.recognize_google
+        listener = WakeWordListener(lambda: WavSource(args.wav), SphinxDetector(), recognize)
+        start = time.perf_counter()
+        for command in collect(listener):
+            print(f"command: {command}")
+        print(f"{listener.segments} phrases, {listener.wakes} wake words, {listener.recognized} sent "
+              f"for recognition in {time.perf_counter() - start:.1f} s")
+        return
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(prefix="chanakya-wake-"), "wake.wav")
+    expected, speech = build_wav(path, args.rounds, random.Random(args.seed))
+    with wave.open(path) as wav:
+        total = wav.getnframes() / wav.getframerate()
+
+    detections = []
+
+    def detect_text(audio):
+        start = time.perf_counter()
+        text = pitch_words(audio)
+        detections.append((time.perf_counter() - start) * 1000)
+        return text
+
+    recognize = CountingRecognizer()
+    listener = WakeWordListener(lambda: WavSource(path), TranscriptDetector(detect_text), recognize)
+    start = time.perf_counter()
+    commands = collect(listener)
+    elapsed = time.perf_counter() - start
+
+    detections.sort()
+    correct = sum(1 for got, want in zip(commands, expected) if got == want)
+    print(f"{total:.1f} s of audio, {speech:.1f} s of it speech, processed in {elapsed:.2f} s")
+    print(f"  phrases heard             {listener.segments}")
+    print(f"  wake words detected       {listener.wakes}")
+    print(f"  commands                  {correct}/{len(expected)} correct, {len(commands)} returned")
+    print(f"  sent for recognition      {recognize.calls} requests, {recognize.seconds:.1f} s of audio "
+          f"(every phrase, ungated: {listener.segments} requests, {speech:.1f} s)")
+    print(f"  pre-roll before speech    min {min(recognize.leading_quiet):.0f} ms, "
+          f"max {max(recognize.leading_quiet):.0f} ms")
+    print(f"  local detection           p50 {detections[len(detections) // 2]:.2f} ms, "
+          f"max {detections[-1]:.2f} ms")
+    if commands != expected:
+        print(f"  expected {expected}\n  got      {commands}")
+
+
+if __name__ == "__main__":
+    main()
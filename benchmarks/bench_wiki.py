@@ -0,0 +1,170 @@
+"""
+Wikipedia cache benchmark: summary lookups through WikiSummaryCache vs. a fetch per lookup.
+
+Serves stand-in pages from a local HTTP server that answers like the
+MediaWiki API after --latency-ms, so no network is needed. Topics are
+asked for with a skewed popularity, the way people ask about a few
+things often and many things once; some of them have no page.
+
+First checks the cache against the server's request log: a hit makes
+no request, entries and misses expire after their TTLs, a missing page
+is cached as None, and the least recently used entry is evicted first;
+exits with status 1 if any of that is wrong.
+
+    python benchmarks/bench_wiki.py [--lookups 300] [--topics 200] [--latency-ms 100]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wiki_cache import WikiSummaryCache
+
+
+class StubWikipedia:
+    """
+    A local HTTP server answering extract queries for pages (title ->
+    text), ignoring case like Wikipedia's redirects; other titles are
+    missing. requests lists the titles asked for.
+    """
+
+    def __init__(self, pages, latency=0.0):
+        self.pages = pages
+        self.latency = latency
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                title = parse_qs(urlparse(self.path).query).get("titles", [""])[0]
+                stub.requests.append(title)
+                time.sleep(stub.latency)
+                extract = next((text for name, text in stub.pages.items() if name.lower() == title.lower()), None)
+                if extract is not None:
+                    page = {"title": title, "extract": extract}
+                else:
+                    page = {"title": title, "missing": True}
+                body = json.dumps({"query": {"pages": [page]}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/w/api.php"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check_cache(stub, workdir):
+    """
+    Returns a list of what WikiSummaryCache gets wrong against stub.
+    """
+    wrong = []
+
+    def expect(what, got, expected):
+        if got != expected:
+            wrong.append(f"{what}: got {got!r}, expected {expected!r}")
+
+    def fetched(cache, query):
+        # True if looking query up went to the server
+        before = len(stub.requests)
+        cache.summary(query)
+        return len(stub.requests) > before
+
+    stub.pages.update({"Python": "Python is a programming language.\nMore text.", "Salt": "Salt is a mineral."})
+    cache = WikiSummaryCache(os.path.join(workdir, "ttl.sqlite3"), api_url=stub.url, ttl=0.3, negative_ttl=0.6)
+    try:
+        expect("first paragraph", cache.summary("python"), "Python is a programming language.")
+        expect("hit fetches", fetched(cache, "  Python "), False)
+        expect("missing page", cache.summary("no such page"), None)
+        expect("negative hit fetches", fetched(cache, "No such page"), False)
+        time.sleep(0.35)
+        expect("expired entry fetches", fetched(cache, "python"), True)
+        expect("negative entry within its ttl fetches", fetched(cache, "no such page"), False)
+        time.sleep(0.3)
+        expect("expired negative entry fetches", fetched(cache, "no such page"), True)
+        stats = cache.stats()
+        expect("hits, negative hits, misses", (stats["hits"], stats["negative_hits"], stats["misses"]), (1, 2, 4))
+    finally:
+        cache.close()
+
+    cache = WikiSummaryCache(os.path.join(workdir, "lru.sqlite3"), api_url=stub.url, max_entries=2)
+    try:
+        for query in ("python", "salt", "python", "pepper"):
+            cache.summary(query)
+            time.sleep(0.01)
+        # salt was used least recently, so it made room for pepper
+        expect("recently used entry fetches", fetched(cache, "python"), False)
+        expect("evicted entry fetches", fetched(cache, "salt"), True)
+    finally:
+        cache.close()
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=300)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--missing", type=float, default=0.1, help="fraction of topics without a page")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="time the stand-in API takes to answer")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chanakya-wiki-")
+    stub = StubWikipedia({})
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            wrong = check_cache(stub, workdir)
+        for problem in wrong:
+            print(f"wrong: {problem}")
+        if wrong:
+            sys.exit(1)
+
+        rng = random.Random(args.seed)
+        topics = [f"topic {index}" for index in range(args.topics)]
+        stub.pages = {topic: f"{topic} is a thing." for topic in topics if rng.random() >= args.missing}
+        stub.latency = args.latency_ms / 1000
+        weights = [1 / (rank + 1) for rank in range(args.topics)]
+        lookups = rng.choices(topics, weights, k=args.lookups)
+
+        cache = WikiSummaryCache(os.path.join(workdir, "bench.sqlite3"), api_url=stub.url)
+        uncached = WikiSummaryCache(os.path.join(workdir, "uncached.sqlite3"), api_url=stub.url, max_entries=0)
+        print(f"{args.lookups} lookups of {args.topics} topics, {args.latency_ms:g} ms per fetch")
+        print(f"\n{'':<18} {'total s':>8} {'mean ms':>8} {'fetches':>8}")
+        for name, target in (("fetch every time", uncached), ("cached", cache)):
+            before = len(stub.requests)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for query in lookups:
+                    target.summary(query)
+            seconds = time.perf_counter() - start
+            print(f"{name:<18} {seconds:>8.2f} {seconds / args.lookups * 1000:>8.1f} {len(stub.requests) - before:>8}")
+        stats = cache.stats()
+        print(f"\nhit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['negative_hits']} "
+              f"for missing pages), fetch p50 {stats['fetch_ms_p50']} ms")
+        cache.close()
+        uncached.close()
+    finally:
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
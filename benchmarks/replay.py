@@ -0,0 +1,344 @@
+"""
+Offline replay of the full voice pipeline: listen -> process -> speak.
+
+Feeds a corpus through VoiceAssistant.listen_for_command and
+process_command with the microphone, recognizer, TTS engine, pyautogui,
+webbrowser, process table, app index, Wikipedia and OS calls all stubbed,
+then reports p50/p95/p99 latency and throughput per stage and per intent.
+
+Corpus lines are transcripts; "wikipedia >> alan turing" answers the
+follow-up question with the text after ">>". Each transcript is captured
+from a synthesized WAV burst, or from DIR/<name>.wav when --wav-dir holds
+<name>.wav / <name>.txt pairs. Recognition and speech take simulated time.
+
+    python benchmarks/replay.py [--corpus commands.txt] [--wav-dir DIR] [--repeat 3]
+                                [--save-baseline base.json] [--baseline base.json --max-regression 0.25]
+
+Exits with status 1 when a p95 is worse than the baseline by more than
+--max-regression (and by more than --min-regression-ms).
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+import wave
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_CORPUS = [
+    "hello", "what time is it", "what's the date", "tell me a joke",
+    "copy", "paste", "undo that", "select all", "new tab", "close tab",
+    "volume up", "volume down", "mute",
+    "open youtube", "open gmail", "search for python tutorials", "google flask streaming",
+    "open notepad", "open visual studio code", "close notepad", "close window",
+    "list windows", "switch to chrome", "minimize window", "take screenshot",
+    "calculate 12 plus 7", "what is 9 times 8",
+    "wikipedia >> alan turing", "who are you", "something it cannot do",
+]
+
+RATE = 16000
+
+
+def write_burst(path, seconds=0.8):
+    """
+    Writes a WAV with a voiced burst between short silences, enough for
+    the segmenter to cut one phrase.
+    """
+    samples = [0] * int(0.3 * RATE)
+    samples += [int(6000 * math.sin(2 * math.pi * 220 * i / RATE)) for i in range(int(seconds * RATE))]
+    samples += [0] * int(0.8 * RATE)
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        out.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+def isolate_environment(workdir):
+    """
+    Points every file the assistant writes (data dir, Desktop, notes) at workdir.
+    Must run before the assistant modules are imported.
+    """
+    os.environ["CHANAKYA_HOME"] = os.path.join(workdir, "data")
+    os.environ["CHANAKYA_APP_ROOTS"] = os.path.join(workdir, "apps")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = workdir
+    os.makedirs(os.path.join(workdir, "apps"), exist_ok=True)
+    os.makedirs(os.path.join(workdir, "Desktop"), exist_ok=True)
+
+
+class Recorder:
+    """
+    Stand-in for modules with side effects: every call is counted, nothing happens.
+    """
+
+    def __init__(self, name, returns=None):
+        self._name = name
+        self._returns = returns or {}
+        self.calls = defaultdict(int)
+
+    def __getattr__(self, attr):
+        def call(*args, **kwargs):
+            self.calls[attr] += 1
+            value = self._returns.get(attr)
+            return value() if callable(value) else value
+        return call
+
+
+class StubScreenshot:
+    mode = "RGB"
+
+    def save(self, fp, format=None, **options):
+        pass
+
+
+class StubAppIndex:
+    def lookup(self, app_name, timeout=None):
+        return os.path.join("C:\\Program Files", app_name, f"{app_name}.exe")
+
+    def closest(self, app_name):
+        return None
+
+    def refresh(self):
+        return 0
+
+    def stop(self):
+        pass
+
+
+class StubProcessTable:
+    def __init__(self):
+        from process_table import ProcessSnapshot
+        self._snapshot = ProcessSnapshot([(1, "chrome.exe"), (2, "notepad.exe"), (3, "Code.exe")])
+
+    def snapshot(self, max_age=None):
+        return self._snapshot
+
+    def find(self, app_name):
+        return self._snapshot.find(app_name), 0.0
+
+    def terminate(self, app_name):
+        return bool(self._snapshot.find(app_name))
+
+    def wait_for(self, app_name, timeout, exclude=(), poll=0.2):
+        return [100]
+
+    def stop(self):
+        pass
+
+
+class StubWiki:
+    def summary(self, query):
+        return f"{query.title()} is the subject of a Wikipedia article."
+
+    def stats(self):
+        return {}
+
+
+def build_metrics_recorder():
+    from metrics import Metrics
+
+    class RecordingMetrics(Metrics):
+        """
+        Metrics that also keep every raw sample, for percentiles.
+        """
+
+        def __init__(self):
+            super().__init__()
+            self.samples = defaultdict(list)
+            self._samples_lock = threading.Lock()
+
+        def observe(self, stage, seconds, intent=None):
+            super().observe(stage, seconds, intent)
+            with self._samples_lock:
+                self.samples[(stage, intent or "")].append(seconds)
+
+    return RecordingMetrics()
+
+
+def build_assistant(recognition_ms, tts_ms_per_char):
+    import voice
+    from speech import FakeBackend
+
+    # Side effects are recorded instead of performed
+    voice.pyautogui = Recorder("pyautogui", {"screenshot": StubScreenshot})
+    voice.webbrowser = Recorder("webbrowser")
+    voice.subprocess = Recorder("subprocess")
+    voice.ctypes = types.SimpleNamespace(windll=types.SimpleNamespace(user32=Recorder("user32")))
+    os.system = Recorder("os").system
+    os.startfile = Recorder("os").startfile
+
+    source = {"path": None}
+    answers = []
+    recognizer_lock = threading.Lock()
+
+    def recognize(audio):
+        import speech_recognition as sr
+        time.sleep(recognition_ms / 1000)
+        with recognizer_lock:
+            if not answers:
+                raise sr.UnknownValueError()
+            return answers.pop(0)
+
+    from capture import WavSource
+    from recognition import Backend, HedgedRecognizer
+    assistant = voice.VoiceAssistant(
+        speech_backend=FakeBackend(seconds_per_char=tts_ms_per_char / 1000),
+        audio_source=lambda: WavSource(source["path"]),
+    )
+    assistant.app_index.stop()
+    assistant.app_index = StubAppIndex()
+    assistant.processes = StubProcessTable()
+    assistant.wiki_cache = StubWiki()
+    assistant.screenshots.grab = StubScreenshot
+
+    metrics = build_metrics_recorder()
+    assistant.metrics = metrics
+    assistant.listener.metrics = metrics
+    assistant.screenshots.metrics = metrics
+    assistant.actions.metrics = metrics
+    # The stand-in recognizer goes through the hedging layer like the real ones
+    assistant.recognition = HedgedRecognizer([Backend("replay", recognize)], metrics=metrics)
+    assistant.listener.recognize = assistant.recognition.recognize
+    return assistant, metrics, source, answers
+
+
+def load_corpus(path, wav_dir, burst_path):
+    """
+    Returns [(wav path, [transcript, follow-up answers...])].
+    """
+    items = []
+    if wav_dir:
+        for name in sorted(os.listdir(wav_dir)):
+            if name.endswith(".wav"):
+                transcript_path = os.path.join(wav_dir, name[:-4] + ".txt")
+                with open(transcript_path) as f:
+                    transcripts = [part.strip() for part in f.read().split(">>")]
+                items.append((os.path.join(wav_dir, name), transcripts))
+    lines = DEFAULT_CORPUS
+    if path:
+        with open(path) as f:
+            lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if path or not items:
+        items.extend((burst_path, [part.strip() for part in line.split(">>")]) for line in lines)
+    return items
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def summarize(samples, wall_seconds):
+    """
+    Returns {"stage" or "stage/intent": {count, p50_ms, p95_ms, p99_ms, per_second}}.
+    """
+    groups = defaultdict(list)
+    for (stage, intent), values in samples.items():
+        groups[stage].extend(values)
+        if intent:
+            groups[f"{stage}/{intent}"].extend(values)
+    return {
+        name: {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "per_second": round(len(values) / wall_seconds, 2),
+        }
+        for name, values in sorted(groups.items())
+    }
+
+
+def regressions(summary, baseline, max_regression, min_regression_ms):
+    found = []
+    for name, current in summary.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = max(previous["p95_ms"] * (1 + max_regression), previous["p95_ms"] + min_regression_ms)
+        if current["p95_ms"] > limit:
+            found.append((name, previous["p95_ms"], current["p95_ms"]))
+    return found
+
+
+def replay(assistant, metrics, source, answers, corpus, repeat):
+    """
+    Runs the corpus repeat times; returns the wall-clock seconds taken.
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path, transcripts in corpus:
+            source["path"] = path
+            answers[:] = transcripts
+            begin = time.perf_counter()
+            command = assistant.listen_for_command()
+            assistant.process_command(command)
+            match = assistant.intents.match(command) if command else None
+            metrics.observe("end_to_end", time.perf_counter() - begin, match.name if match else "unknown")
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="text file with one transcript per line")
+    parser.add_argument("--wav-dir", help="directory of <name>.wav files with <name>.txt transcripts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--recognition-ms", type=float, default=50.0, help="simulated recognition time")
+    parser.add_argument("--tts-ms-per-char", type=float, default=0.5, help="simulated speaking time")
+    parser.add_argument("--baseline", help="fail if p95 latencies regressed against this file")
+    parser.add_argument("--save-baseline", help="write this run's summary here")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 increase, as a fraction")
+    parser.add_argument("--min-regression-ms", type=float, default=2.0, help="ignore p95 increases below this")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chanakya-replay-")
+    isolate_environment(workdir)
+    burst_path = os.path.join(workdir, "burst.wav")
+    write_burst(burst_path)
+    corpus = load_corpus(args.corpus, args.wav_dir, burst_path)
+
+    # The assistant narrates everything it does; keep the report readable
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        assistant, metrics, source, answers = build_assistant(args.recognition_ms, args.tts_ms_per_char)
+        wall_seconds = replay(assistant, metrics, source, answers, corpus, args.repeat)
+
+    summary = summarize(metrics.samples, wall_seconds)
+
+    commands = args.repeat * len(corpus)
+    print(f"\nReplayed {commands} commands in {wall_seconds:.2f} s ({commands / wall_seconds:.1f} commands/s)")
+    print(f"{'stage / intent':<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>8}")
+    for name, row in summary.items():
+        print(f"{name:<32} {row['count']:>6} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+              f"{row['p99_ms']:>9.2f} {row['per_second']:>8.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(summary, baseline, args.max_regression, args.min_regression_ms)
+        if found:
+            print("\nRegressions (p95 ms, baseline -> now):")
+            for name, previous, current in found:
+                print(f"  {name:<32} {previous:9.2f} -> {current:9.2f}")
+            sys.exit(1)
+        print("\nNo p95 regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
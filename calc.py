@@ -0,0 +1,332 @@
+import math
+import re
+from collections import namedtuple
+
+# Hard limits that bound the work any input can cause:
+# - max_length / max_tokens: size of the input
+# - max_digits:              digits in a single operand
+# - max_exponent:            absolute value of any exponent
+# - max_result_digits:       digits in any intermediate integer result
+# - max_steps:               operations evaluated
+# - max_depth:               nesting of brackets and unary operators
+Limits = namedtuple("Limits", ["max_length", "max_tokens", "max_digits", "max_exponent",
+                               "max_result_digits", "max_steps", "max_depth"])
+DEFAULT_LIMITS = Limits(max_length=300, max_tokens=120, max_digits=15, max_exponent=1000,
+                        max_result_digits=100, max_steps=500, max_depth=32)
+
+
+class CalculationError(ValueError):
+    """
+    Raised for input that can't be evaluated; the message can be spoken as is.
+    """
+
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17,
+    "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+SCALES = {
+    "thousand": 10 ** 3, "lakh": 10 ** 5, "million": 10 ** 6, "crore": 10 ** 7,
+    "billion": 10 ** 9, "trillion": 10 ** 12,
+}
+
+# Spoken operators, longest first so "multiplied by" wins over "multiplied"
+OPERATOR_WORDS = [
+    ("raised to the power of", "^"), ("to the power of", "^"), ("raised to", "^"),
+    ("square root of", "sqrt"), ("multiplied by", "*"), ("divided by", "/"),
+    ("open bracket", "("), ("close bracket", ")"), ("open paren", "("), ("close paren", ")"),
+    ("plus", "+"), ("add", "+"), ("minus", "-"), ("subtract", "-"), ("negative", "neg"),
+    ("times", "*"), ("into", "*"), ("x", "*"), ("multiply", "*"), ("over", "/"),
+    ("divide", "/"), ("mod", "%"), ("modulo", "%"), ("power", "^"),
+    ("squared", "squared"), ("cubed", "cubed"),
+]
+
+# Words that carry no meaning in a spoken calculation
+FILLER_WORDS = {
+    "calculate", "compute", "what", "whats", "what's", "is", "the", "of", "please",
+    "equals", "equal", "to", "result", "answer", "by", "and", "hey", "chanakya", "tell", "me",
+}
+
+# First word -> [(words, symbol)], longest first
+_OPERATOR_INDEX = {}
+for _phrase, _symbol in OPERATOR_WORDS:
+    _OPERATOR_INDEX.setdefault(_phrase.split()[0], []).append((_phrase.split(), _symbol))
+
+TOKEN_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?|\.\d+|\*\*|[a-z']+|[-+*/^%()×÷]")
+SYMBOLS = {"**": "^", "×": "*", "÷": "/"}
+
+
+def _spoken_operators(words):
+    """
+    Replaces multi-word operators with their symbols.
+    """
+    result = []
+    i = 0
+    while i < len(words):
+        for parts, symbol in _OPERATOR_INDEX.get(words[i], ()):
+            if words[i:i + len(parts)] == parts:
+                result.append(symbol)
+                i += len(parts)
+                break
+        else:
+            result.append(words[i])
+            i += 1
+    return result
+
+
+def _spoken_number(words, start, limits):
+    """
+    Reads a number spelled out in words from words[start:].
+    Returns (value, next index), or (None, start) if there is none.
+    """
+    total = 0
+    current = 0
+    seen = False
+    i = start
+    while i < len(words):
+        word = words[i]
+        if word in UNITS:
+            current += UNITS[word]
+        elif word in TENS:
+            current += TENS[word]
+        elif word == "hundred" and (seen or current):
+            current = (current or 1) * 100
+        elif word in SCALES and (seen or current):
+            total += (current or 1) * SCALES[word]
+            current = 0
+        elif word == "a" and i + 1 < len(words) and (words[i + 1] == "hundred" or words[i + 1] in SCALES):
+            current = 1
+        elif word == "and" and seen and i + 1 < len(words) and (words[i + 1] in UNITS or words[i + 1] in TENS):
+            pass
+        else:
+            break
+        seen = True
+        i += 1
+    if not seen:
+        return None, start
+    value = total + current
+
+    # "three point one four"
+    if i + 1 < len(words) and words[i] == "point" and words[i + 1] in UNITS:
+        digits = []
+        i += 1
+        while i < len(words) and words[i] in UNITS and UNITS[words[i]] < 10:
+            digits.append(str(UNITS[words[i]]))
+            i += 1
+        if len(digits) > limits.max_digits:
+            raise CalculationError("That number has too many digits.")
+        value = float(f"{value}.{''.join(digits)}")
+    return value, i
+
+
+def normalize(text, limits=DEFAULT_LIMITS):
+    """
+    Turns a spoken calculation ("twenty five times four") into a list of
+    tokens: numbers and the symbols + - * / % ^ ( ) neg sqrt squared cubed.
+    Raises CalculationError for words that aren't part of a calculation.
+    """
+    if len(text) > limits.max_length:
+        raise CalculationError("That calculation is too long.")
+    raw = [SYMBOLS.get(token, token) for token in TOKEN_PATTERN.findall(text.lower())]
+    words = _spoken_operators(raw)
+
+    tokens = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word[0].isdigit() or word[0] == ".":
+            digits = word.replace(",", "")
+            if len(digits.replace(".", "")) > limits.max_digits:
+                raise CalculationError("That number has too many digits.")
+            tokens.append(float(digits) if "." in digits else int(digits))
+            i += 1
+            continue
+        value, end = _spoken_number(words, i, limits)
+        if value is not None:
+            tokens.append(value)
+            i = end
+        elif word in "+-*/%^()" or word in ("neg", "sqrt", "squared", "cubed"):
+            tokens.append(word)
+            i += 1
+        elif word in FILLER_WORDS or word == "a":
+            i += 1
+        else:
+            raise CalculationError(f"I don't know how to calculate with '{word}'.")
+        if len(tokens) > limits.max_tokens:
+            raise CalculationError("That calculation is too long.")
+    if not tokens:
+        raise CalculationError("I couldn't find a calculation in that.")
+    return tokens
+
+
+class _Evaluator:
+    """
+    Recursive-descent evaluator over normalized tokens:
+
+        expr   := term (('+' | '-') term)*
+        term   := unary (('*' | '/' | '%') unary)*
+        unary  := ('-' | '+' | 'neg' | 'sqrt') unary | power
+        power  := atom ('squared' | 'cubed')* ('^' unary)?
+        atom   := number | '(' expr ')'
+    """
+
+    def __init__(self, tokens, limits):
+        self.tokens = tokens
+        self.limits = limits
+        self.position = 0
+        self.steps = 0
+        self.depth = 0
+
+    def run(self):
+        value = self.expr()
+        if self.position != len(self.tokens):
+            raise CalculationError("I couldn't understand the calculation.")
+        return value
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def step(self):
+        self.steps += 1
+        if self.steps > self.limits.max_steps:
+            raise CalculationError("That calculation has too many steps.")
+
+    def check(self, value):
+        if isinstance(value, float) and math.isnan(value):
+            raise CalculationError("I couldn't understand the calculation.")
+        if value and (math.isinf(value) or math.log10(abs(value)) >= self.limits.max_result_digits):
+            raise CalculationError("The result is too large.")
+        return value
+
+    def expr(self):
+        value = self.term()
+        while self.peek() in ("+", "-"):
+            operator = self.take()
+            right = self.term()
+            self.step()
+            value = self.check(value + right if operator == "+" else value - right)
+        return value
+
+    def term(self):
+        value = self.unary()
+        while self.peek() in ("*", "/", "%"):
+            operator = self.take()
+            right = self.unary()
+            self.step()
+            if operator == "*":
+                value = value * right
+            elif right == 0:
+                raise CalculationError("I can't divide by zero.")
+            elif operator == "/":
+                value = value // right if isinstance(value, int) and isinstance(right, int) and value % right == 0 \
+                    else value / right
+            else:
+                value = value % right
+            value = self.check(value)
+        return value
+
+    def unary(self):
+        token = self.peek()
+        if token in ("-", "+", "neg", "sqrt"):
+            self.take()
+            self.depth += 1
+            if self.depth > self.limits.max_depth:
+                raise CalculationError("That calculation is nested too deeply.")
+            value = self.unary()
+            self.depth -= 1
+            self.step()
+            if token == "sqrt":
+                if value < 0:
+                    raise CalculationError("I can't take the square root of a negative number.")
+                root = math.isqrt(value) if isinstance(value, int) else None
+                return root if root is not None and root * root == value else math.sqrt(value)
+            return -value if token in ("-", "neg") else value
+        return self.power()
+
+    def power(self):
+        value = self.atom()
+        while self.peek() in ("squared", "cubed"):
+            self.step()
+            value = self.raise_to(value, 2 if self.take() == "squared" else 3)
+        if self.peek() == "^":
+            self.take()
+            self.depth += 1
+            if self.depth > self.limits.max_depth:
+                raise CalculationError("That calculation is nested too deeply.")
+            exponent = self.unary()
+            self.depth -= 1
+            self.step()
+            value = self.raise_to(value, exponent)
+        return value
+
+    def raise_to(self, base, exponent):
+        if abs(exponent) > self.limits.max_exponent:
+            raise CalculationError("That exponent is too large.")
+        if base == 0 and exponent < 0:
+            raise CalculationError("I can't divide by zero.")
+        # Estimate the size before computing, so huge powers are never built
+        if base not in (0, 1, -1) and exponent * math.log10(abs(base)) >= self.limits.max_result_digits:
+            raise CalculationError("The result is too large.")
+        if isinstance(exponent, float) and not exponent.is_integer():
+            if base < 0:
+                raise CalculationError("I can't raise a negative number to a fractional power.")
+            return self.check(float(base) ** exponent)
+        exponent = int(exponent)
+        if isinstance(base, int) and exponent >= 0:
+            return self.check(base ** exponent)
+        return self.check(float(base) ** exponent)
+
+    def atom(self):
+        token = self.take()
+        if isinstance(token, (int, float)):
+            return token
+        if token == "(":
+            self.depth += 1
+            if self.depth > self.limits.max_depth:
+                raise CalculationError("That calculation is nested too deeply.")
+            value = self.expr()
+            self.depth -= 1
+            if self.take() != ")":
+                raise CalculationError("A bracket isn't closed.")
+            return value
+        raise CalculationError("I couldn't understand the calculation.")
+
+
+def evaluate(tokens, limits=DEFAULT_LIMITS):
+    """
+    Evaluates normalized tokens. Raises CalculationError.
+    """
+    return _Evaluator(tokens, limits).run()
+
+
+def calculate(text, limits=DEFAULT_LIMITS):
+    """
+    Evaluates a written or spoken calculation, e.g. "25 * 4",
+    "twenty five times four" or "two to the power of ten".
+    """
+    return evaluate(normalize(text, limits), limits)
+
+
+def format_number(value):
+    """
+    Formats a result for speaking: whole numbers without a decimal point,
+    other results rounded to six decimal places.
+    """
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        if abs(value) >= 1e15 or (value and abs(value) < 1e-6):
+            return f"{value:.6g}"
+        return f"{value:.6f}".rstrip("0").rstrip(".")
+    return str(value)
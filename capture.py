@@ -0,0 +1,349 @@
+import math
+import queue
+import threading
+import time
+import wave
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+# Audio is handled in frames of this many milliseconds
+FRAME_MS = 30
+
+
+def frame_energy(frame, sample_width):
+    """
+    Returns the RMS energy of a frame of 16-bit (or 8/32-bit) PCM audio.
+    """
+    typecode = {1: 'b', 2: 'h', 4: 'i'}[sample_width]
+    samples = array(typecode, frame[:len(frame) - len(frame) % sample_width])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+class MicrophoneSource:
+    """
+    Reads raw frames from a speech_recognition Microphone.
+    """
+
+    def __init__(self, microphone, frame_ms=FRAME_MS):
+        self.microphone = microphone
+        self.frame_ms = frame_ms
+        self._source = None
+
+    def __enter__(self):
+        self._source = self.microphone.__enter__()
+        self.sample_rate = self._source.SAMPLE_RATE
+        self.sample_width = self._source.SAMPLE_WIDTH
+        self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.microphone.__exit__(*exc_info)
+        self._source = None
+
+    def read(self):
+        return self._source.stream.read(self.frame_samples)
+
+
+class WavSource:
+    """
+    Reads frames from a WAV file in place of the microphone.
+    With realtime=True frames are paced like a live microphone.
+    """
+
+    def __init__(self, path, frame_ms=FRAME_MS, realtime=False):
+        self.path = path
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self._wav = None
+
+    def __enter__(self):
+        self._wav = wave.open(str(self.path), 'rb')
+        if self._wav.getnchannels() != 1:
+            raise ValueError(f"{self.path}: only mono WAV files are supported")
+        self.sample_rate = self._wav.getframerate()
+        self.sample_width = self._wav.getsampwidth()
+        self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+        self._next_frame_at = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wav.close()
+        self._wav = None
+
+    def read(self):
+        if self.realtime:
+            self._next_frame_at += self.frame_ms / 1000
+            delay = self._next_frame_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return self._wav.readframes(self.frame_samples)
+
+
+class Segment:
+    """
+    One stretch of speech with leading and trailing silence trimmed.
+    speech_ended_at is the monotonic time the last voiced frame arrived.
+    """
+
+    def __init__(self, frames, sample_rate, sample_width, speech_started_at, speech_ended_at):
+        self.data = b"".join(frames)
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.speech_started_at = speech_started_at
+        self.speech_ended_at = speech_ended_at
+
+    @property
+    def duration(self):
+        return len(self.data) / float(self.sample_rate * self.sample_width)
+
+    def audio_data(self):
+        return sr.AudioData(self.data, self.sample_rate, self.sample_width)
+
+
+class VoiceActivitySegmenter:
+    """
+    Splits a stream of frames into speech segments by frame energy.
+
+    Speech starts after start_ms of voiced frames (keeping preroll_ms of
+    audio before it so onsets aren't clipped) and ends after hangover_ms of
+    silence, which is trimmed off. Segments are cut at max_segment_s.
+    """
+
+    def __init__(self, sample_rate, sample_width, frame_ms=FRAME_MS, energy_threshold=300,
+                 start_ms=90, hangover_ms=600, preroll_ms=150, tail_ms=90, max_segment_s=5.0):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frame_ms = frame_ms
+        self.energy_threshold = energy_threshold
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.tail_frames = tail_ms // frame_ms
+        self.max_frames = int(max_segment_s * 1000 / frame_ms)
+
+        self._preroll = deque(maxlen=max(1, preroll_ms // frame_ms) + self.start_frames)
+        self._frames = []
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._speech_started_at = None
+        self._last_voiced_at = None
+
+        # Optional callbacks: on_speech_start(now) and on_silence(frame, energy)
+        self.on_speech_start = None
+        self.on_silence = None
+
+    @property
+    def in_speech(self):
+        return self._speech_started_at is not None
+
+    def feed(self, frame, now=None):
+        """
+        Consumes one frame. Returns a finished Segment or None.
+        """
+        now = time.monotonic() if now is None else now
+        energy = frame_energy(frame, self.sample_width)
+        voiced = energy > self.energy_threshold
+
+        if not self.in_speech:
+            self._preroll.append(frame)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if not voiced and self.on_silence is not None:
+                self.on_silence(frame, energy)
+            if self._voiced_run >= self.start_frames:
+                self._speech_started_at = now
+                self._last_voiced_at = now
+                self._frames = list(self._preroll)
+                self._preroll.clear()
+                self._silent_run = 0
+                if self.on_speech_start is not None:
+                    self.on_speech_start(now)
+            return None
+
+        self._frames.append(frame)
+        if voiced:
+            self._silent_run = 0
+            self._last_voiced_at = now
+        else:
+            self._silent_run += 1
+
+        if self._silent_run >= self.hangover_frames or len(self._frames) >= self.max_frames:
+            return self._finish()
+        return None
+
+    def flush(self):
+        """
+        Ends the current segment, if any, e.g. when the source runs dry.
+        """
+        if not self.in_speech:
+            return None
+        return self._finish()
+
+    def _finish(self):
+        # Trim the trailing silence, keeping a short tail
+        keep = len(self._frames) - max(0, self._silent_run - self.tail_frames)
+        segment = Segment(self._frames[:keep], self.sample_rate, self.sample_width,
+                          self._speech_started_at, self._last_voiced_at)
+        self._frames = []
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._speech_started_at = None
+        return segment
+
+
+class StreamingListener:
+    """
+    Captures audio, cuts it into speech segments as it arrives and hands
+    every finished segment to recognition while capture continues.
+
+    listen() returns the transcripts of the segments of one utterance,
+    joined in the order they were spoken, and raises the same
+    speech_recognition errors as Recognizer.listen / recognize_*.
+    """
+
+    def __init__(self, source_factory, recognize, energy_threshold=300, timeout=5, phrase_time_limit=5,
+                 max_latencies=100, metrics=None):
+        self.source_factory = source_factory
+        self.recognize = recognize
+        # Optional metrics.Metrics: "capture" is the time from listen() to the
+        # first finished segment, "recognition" each recognize() call
+        self.metrics = metrics
+        self.energy_threshold = energy_threshold
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
+        # Seconds from end of speech to transcript, most recent last
+        self.latencies = deque(maxlen=max_latencies)
+
+        # Optional callbacks: on_speech_start(now) and on_silence(frame, energy)
+        # from capture, on_segment(segment) when a segment goes to recognition,
+        # on_transcript(text) for every recognized segment and
+        # on_no_match(segment) for segments recognition found no words in
+        self.on_speech_start = None
+        self.on_silence = None
+        self.on_segment = None
+        self.on_transcript = None
+        self.on_no_match = None
+
+    def listen(self):
+        """
+        Captures until a segment is recognized, then stops capturing and
+        returns the transcripts of every segment captured so far, in
+        spoken order. Segments are recognized in parallel and can finish
+        out of order, so a later one finishing first waits for the ones
+        before it.
+        """
+        results = queue.Queue()
+        stop = threading.Event()
+        started = time.perf_counter()
+        capture = threading.Thread(target=self._capture, args=(results, stop), daemon=True)
+        capture.start()
+
+        pending = 0
+        # Segment number (in spoken order) -> its transcript
+        transcripts = {}
+        segments = 0
+        captured_any = False
+        capture_done = False
+        error = None
+        try:
+            while not capture_done or pending:
+                kind, value = results.get()
+                if kind == "segment":
+                    if self.metrics is not None and not captured_any:
+                        self.metrics.observe("capture", time.perf_counter() - started)
+                    captured_any = True
+                    pending += 1
+                    if self.on_segment is not None:
+                        self.on_segment(value)
+                    self._executor.submit(self._recognize, segments, value, results)
+                    segments += 1
+                elif kind == "capture_done":
+                    capture_done = True
+                    if value is not None and self.metrics is not None:
+                        self.metrics.error("capture", value)
+                    if value is not None and error is None:
+                        error = value
+                elif kind == "transcript":
+                    pending -= 1
+                    number, transcript = value
+                    transcripts[number] = transcript
+                    # The user has been heard; finish what was captured
+                    stop.set()
+                elif kind == "error":
+                    pending -= 1
+                    # Keep the most informative error: a service failure beats "no match"
+                    if error is None or isinstance(error, sr.UnknownValueError):
+                        error = value
+        finally:
+            stop.set()
+
+        if transcripts:
+            return " ".join(transcripts[number] for number in sorted(transcripts))
+        raise error if error is not None else sr.UnknownValueError()
+
+    def _capture(self, results, stop):
+        error = None
+        try:
+            with self.source_factory() as source:
+                segmenter = VoiceActivitySegmenter(
+                    source.sample_rate, source.sample_width, source.frame_ms,
+                    energy_threshold=self.energy_threshold, max_segment_s=self.phrase_time_limit,
+                )
+                segmenter.on_speech_start = self.on_speech_start
+                segmenter.on_silence = self.on_silence
+                frame_seconds = source.frame_ms / 1000
+                # Time waited for speech to start, in audio time so WAV input behaves like a mic
+                waited = 0.0
+                segments = 0
+                while not stop.is_set():
+                    frame = source.read()
+                    if not frame:
+                        break
+                    segment = segmenter.feed(frame)
+                    if segment is not None:
+                        results.put(("segment", segment))
+                        segments += 1
+                        waited = 0.0
+                    elif not segmenter.in_speech:
+                        waited += frame_seconds
+                        if self.timeout is not None and waited > self.timeout:
+                            # After a segment this just means the user stopped talking
+                            if not segments:
+                                error = sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                            break
+                if not stop.is_set():
+                    segment = segmenter.flush()
+                    if segment is not None:
+                        results.put(("segment", segment))
+                        error = None
+        except Exception as e:
+            error = e
+        results.put(("capture_done", error))
+
+    def _recognize(self, number, segment, results):
+        start = time.perf_counter()
+        try:
+            transcript = self.recognize(segment.audio_data())
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.observe("recognition", time.perf_counter() - start)
+                self.metrics.error("recognition", e)
+            if isinstance(e, sr.UnknownValueError) and self.on_no_match is not None:
+                self.on_no_match(segment)
+            results.put(("error", e))
+            return
+        if self.metrics is not None:
+            self.metrics.observe("recognition", time.perf_counter() - start)
+        latency = time.monotonic() - segment.speech_ended_at
+        self.latencies.append(latency)
+        print(f"Recognized in {latency * 1000:.0f} ms after end of speech.")
+        if self.on_transcript is not None:
+            self.on_transcript(transcript)
+        results.put(("transcript", (number, transcript)))
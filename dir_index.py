@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Seconds a lookup miss waits after the last refresh before starting another
+MISS_REFRESH_INTERVAL = 60
+
+# Every directory listed, so a refresh can skip the ones whose mtime is unchanged
+DIRS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    root INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
+
+def trigrams(text, padded=False):
+    """
+    Returns the set of three-character substrings of text. padded adds a
+    space at both ends, so short words and word edges count too.
+    """
+    if padded:
+        text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class DirectoryIndex:
+    """
+    Persistent index of the files with given extensions below a set of
+    root directories, for AppIndex and MediaLibrary.
+
+    The index lives in SQLite so it survives restarts. Refreshes only list
+    directories whose mtime changed since the last scan, and hand the
+    matching files of each to _index_files(); the rest of the tree is
+    walked from the dirs table. Subclasses define SCHEMA with FILES_TABLE,
+    a table with a dir column, and _load() and _empty() for their
+    in-memory lookup tables.
+    """
+
+    SCHEMA = ""
+    FILES_TABLE = None
+    # What refresh errors call the index
+    DESCRIPTION = "index"
+
+    def __init__(self, roots, db_path, extensions, max_depth):
+        self.roots = [Path(root) for root in roots]
+        self.db_path = Path(db_path)
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.max_depth = max_depth
+
+        self.last_refresh = None
+        self._refresh_lock = threading.Lock()
+        self._background_lock = threading.Lock()
+        self._background = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        with self._connect() as db:
+            db.executescript(DIRS_SCHEMA + self.SCHEMA)
+            self._load(db)
+        if not self._empty():
+            self._ready.set()
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def _load(self, db):
+        """
+        Rebuilds the in-memory lookup tables from the database.
+        """
+        raise NotImplementedError
+
+    def _empty(self):
+        """
+        True if the in-memory lookup tables hold nothing.
+        """
+        raise NotImplementedError
+
+    def _refresh_context(self):
+        """
+        Returns what every _index_files() call of one refresh needs.
+        """
+        return None
+
+    def _index_files(self, db, directory, rank, files, context):
+        """
+        Replaces the files indexed for directory with files, its
+        os.DirEntry objects with one of the extensions.
+        """
+        raise NotImplementedError
+
+    def start(self, interval=600):
+        """
+        Builds or refreshes the index in the background, then every interval seconds.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background refresh thread.
+        """
+        self._stop.set()
+
+    def wait_ready(self, timeout=None):
+        """
+        Waits up to timeout seconds for the first build; returns True if the index is ready.
+        """
+        return self._ready.wait(timeout)
+
+    def _run(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing {self.DESCRIPTION}: {e}")
+            self._ready.set()
+            self._stop.wait(interval)
+
+    def refresh_in_background(self, min_interval=MISS_REFRESH_INTERVAL):
+        """
+        Starts a refresh on its own thread, for a lookup that missed,
+        unless one is already running or the last finished less than
+        min_interval seconds ago. Returns True if one was started.
+        """
+        with self._background_lock:
+            if self._background is not None and self._background.is_alive():
+                return False
+            if self.last_refresh is not None and time.time() - self.last_refresh < min_interval:
+                return False
+            self._background = threading.Thread(target=self._refresh_once, daemon=True)
+            self._background.start()
+            return True
+
+    def _refresh_once(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing {self.DESCRIPTION}: {e}")
+
+    def refresh(self):
+        """
+        Brings the index up to date with the roots.
+        Returns the number of directories that had to be listed again.
+        """
+        context = self._refresh_context()
+        with self._refresh_lock, self._connect() as db:
+            known = {}
+            children = {}
+            for path, parent, root, depth, mtime in db.execute("SELECT path, parent, root, depth, mtime FROM dirs"):
+                known[path] = (root, depth, mtime)
+                children.setdefault(parent, []).append(path)
+
+            seen = set()
+            rescanned = 0
+            stack = [(str(root), None, rank, 0) for rank, root in enumerate(self.roots) if str(root) not in ("", ".")]
+            while stack:
+                directory, parent, rank, depth = stack.pop()
+                if directory in seen:
+                    continue
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                seen.add(directory)
+
+                if known.get(directory) == (rank, depth, mtime):
+                    subdirs = children.get(directory, [])
+                else:
+                    subdirs = self._scan_directory(db, directory, parent, rank, depth, mtime, context)
+                    rescanned += 1
+
+                if depth + 1 < self.max_depth:
+                    stack.extend((subdir, directory, rank, depth + 1) for subdir in subdirs)
+
+            gone = [path for path in known if path not in seen]
+            db.executemany("DELETE FROM dirs WHERE path = ?", [(path,) for path in gone])
+            db.executemany(f"DELETE FROM {self.FILES_TABLE} WHERE dir = ?", [(path,) for path in gone])
+            db.commit()
+
+            if rescanned or gone or self._empty():
+                self._load(db)
+            self.last_refresh = time.time()
+            self._ready.set()
+            return rescanned
+
+    def _scan_directory(self, db, directory, parent, rank, depth, mtime, context):
+        """
+        Lists one directory, updating its files in the index.
+        Returns its subdirectories.
+        """
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(self.extensions):
+                            files.append(entry)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+        self._index_files(db, directory, rank, files, context)
+        db.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, root, depth, mtime) VALUES (?, ?, ?, ?, ?)",
+            (directory, parent, rank, depth, mtime),
+        )
+        return subdirs
@@ -0,0 +1,118 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+@contextmanager
+def request_context(request_id):
+    """
+    Tags the events published on this thread with request_id.
+    """
+    previous = getattr(_local, "request_id", None)
+    _local.request_id = request_id
+    try:
+        yield
+    finally:
+        _local.request_id = previous
+
+
+def current_request():
+    """
+    Returns the request id set by request_context on this thread, or None.
+    """
+    return getattr(_local, "request_id", None)
+
+
+def format_sse(event):
+    """
+    Encodes an event as a Server-Sent Events message.
+    """
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+class EventBus:
+    """
+    Fans assistant events (listening, speech detected, recognizing, ...)
+    out to every subscriber as they happen.
+
+    Each subscriber has a bounded queue; a subscriber that stops reading
+    loses its oldest events instead of slowing down the publisher. The
+    last `history` events are kept so a reconnecting client can catch up.
+    """
+
+    def __init__(self, max_queue=100, history=50):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, type, request=None, **data):
+        """
+        Sends an event to all subscribers. request defaults to the id set
+        by request_context on the calling thread.
+        """
+        event = dict(data, type=type, request=request if request is not None else current_request(),
+                     time=time.time())
+        with self._lock:
+            event["id"] = next(self._ids)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+        return event
+
+    def subscribe(self, last_id=None):
+        """
+        Returns a new subscriber queue, pre-filled with the events after
+        last_id if the client is reconnecting.
+        """
+        subscriber = queue.Queue(self.max_queue)
+        with self._lock:
+            if last_id is not None:
+                for event in self._history:
+                    if event["id"] > last_id and not subscriber.full():
+                        subscriber.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, last_id=None, heartbeat=15.0):
+        """
+        Yields Server-Sent Events messages until the client goes away.
+        A comment is sent every heartbeat seconds to keep the connection open.
+        """
+        subscriber = self.subscribe(last_id)
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(subscriber)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
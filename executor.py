@@ -0,0 +1,314 @@
+import itertools
+import threading
+import time
+from collections import deque
+
+from scheduler import percentile
+
+# Actions using a resource at the same time, at most; resources not listed
+# are unlimited. One keyboard action at a time keeps key presses from
+# interleaving; two launches may overlap.
+RESOURCE_LIMITS = {"keyboard": 1, "display": 1, "processes": 2}
+
+STATES = ("queued", "running", "done", "failed", "timed_out", "cancelled")
+
+
+class ActionTimeout(Exception):
+    """
+    The error of an action that didn't finish within its timeout.
+    """
+
+
+class ActionCancelled(Exception):
+    """
+    The error of an action cancelled before it started.
+    """
+
+
+class Action:
+    """
+    One submitted action. The caller gets it back at once and can wait
+    for the result, cancel it while it is queued, or be called back when
+    it finishes. queue_ms and run_ms are set as the action starts and ends.
+    """
+
+    def __init__(self, id, name, fn, resources, timeout, delay):
+        self.id = id
+        self.name = name
+        self.fn = fn
+        self.resources = tuple(resources)
+        self.timeout = timeout
+        self.state = "queued"
+        self.value = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        # Delayed actions (a shutdown's grace period) can be cancelled until then
+        self.start_after = self.submitted_at + delay
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        # Guards _callbacks against the action finishing while one is added
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def queue_ms(self):
+        if self.started_at is None:
+            return None
+        return round((self.started_at - self.start_after) * 1000, 1)
+
+    @property
+    def run_ms(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return round((self.finished_at - self.started_at) * 1000, 1)
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the action has finished; returns its value, or None
+        if it is still going after timeout seconds. Raises its error if
+        it failed, timed out or was cancelled.
+        """
+        if not self._done.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def add_done_callback(self, callback):
+        """
+        Calls callback(action) when the action finishes, at once if it has.
+        Callbacks run on the thread that finished the action.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "resources": list(self.resources),
+            "state": self.state,
+            "error": str(self.error) if self.error is not None else None,
+            "queue_ms": self.queue_ms,
+            "run_ms": self.run_ms,
+        }
+
+
+class ActionExecutor:
+    """
+    Runs side-effecting actions (launching programs, key presses, system
+    commands) off the dispatch thread, so a hung or slow one can't stall
+    the assistant or hold a web worker.
+
+    Each action names the resources it drives. At most limits[resource]
+    actions use a resource at once and they start in submission order,
+    so "new tab" then "paste" still type in that order. At most workers
+    actions run in all.
+
+    An action still running after its timeout is marked timed_out and
+    its resources are released. Python can't stop a thread, so the
+    thread is left to finish and its result is dropped. Queue and run
+    times go to metrics as action_queue and action_run per action name.
+    """
+
+    def __init__(self, workers=4, limits=None, timeout=10.0, metrics=None, history=100):
+        self.workers = workers
+        self.limits = dict(RESOURCE_LIMITS if limits is None else limits)
+        self.timeout = timeout
+        self.metrics = metrics
+
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._queued = []
+        self._running = set()
+        self._in_use = {}
+        self._recent = deque(maxlen=history)
+        self._counts = dict.fromkeys(STATES[2:], 0)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._dispatch, name="actions", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, fn, resources=(), timeout=None, delay=0.0):
+        """
+        Queues fn() to run once its resources are free (and no sooner than
+        delay seconds from now). Returns the Action at once.
+        """
+        action = Action(next(self._ids), name, fn, resources, self.timeout if timeout is None else timeout, delay)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("action executor is stopped")
+            self._queued.append(action)
+            self._cond.notify_all()
+        return action
+
+    def run(self, name, fn, resources=(), timeout=None):
+        """
+        Submits fn and waits for it; returns its value or raises its error
+        (ActionTimeout after timeout seconds).
+        """
+        return self.submit(name, fn, resources, timeout).wait()
+
+    def cancel(self, action):
+        """
+        Cancels an action that hasn't started. Returns True if it was cancelled.
+        """
+        with self._cond:
+            if action not in self._queued:
+                return False
+            self._queued.remove(action)
+            self._cond.notify_all()
+        self._finish(action, "cancelled", error=ActionCancelled(f"{action.name} was cancelled"))
+        return True
+
+    def cancel_pending(self):
+        """
+        Cancels every action that hasn't started; returns them.
+        """
+        with self._cond:
+            cancelled, self._queued = self._queued, []
+            self._cond.notify_all()
+        for action in cancelled:
+            self._finish(action, "cancelled", error=ActionCancelled(f"{action.name} was cancelled"))
+        return cancelled
+
+    def pending(self):
+        """
+        Returns the actions waiting to start, oldest first.
+        """
+        with self._cond:
+            return list(self._queued)
+
+    def _startable(self, now):
+        """
+        Returns the queued actions that can start now, in order. An action
+        that is due but waiting for a resource holds back later ones that
+        need it.
+        """
+        running = len(self._running)
+        in_use = dict(self._in_use)
+        blocked = set()
+        startable = []
+        for action in self._queued:
+            if running >= self.workers:
+                break
+            if action.start_after > now:
+                continue
+            free = all(in_use.get(resource, 0) < self.limits.get(resource, float("inf"))
+                       for resource in action.resources)
+            if free and blocked.isdisjoint(action.resources):
+                startable.append(action)
+                running += 1
+                for resource in action.resources:
+                    in_use[resource] = in_use.get(resource, 0) + 1
+            else:
+                blocked.update(action.resources)
+        return startable
+
+    def _dispatch(self):
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                for action in [action for action in self._running if action.started_at + action.timeout <= now]:
+                    self._release(action)
+                    threading.Thread(target=self._finish, daemon=True, args=(
+                        action, "timed_out", None, ActionTimeout(f"{action.name} took over {action.timeout:g} s"),
+                    )).start()
+
+                for action in self._startable(now):
+                    self._queued.remove(action)
+                    self._running.add(action)
+                    for resource in action.resources:
+                        self._in_use[resource] = self._in_use.get(resource, 0) + 1
+                    action.started_at = now
+                    action.state = "running"
+                    threading.Thread(target=self._execute, args=(action,), name=f"action-{action.id}",
+                                     daemon=True).start()
+
+                # Sleep until the next delay or timeout runs out, or something changes
+                wakeups = [action.started_at + action.timeout for action in self._running]
+                wakeups += [action.start_after for action in self._queued if action.start_after > now]
+                self._cond.wait(max(0.0, min(wakeups) - time.monotonic()) if wakeups else None)
+
+    def _execute(self, action):
+        if self.metrics is not None:
+            self.metrics.observe("action_queue", action.started_at - action.start_after, action.name)
+        try:
+            value, error = action.fn(), None
+        except Exception as e:
+            value, error = None, e
+        with self._cond:
+            if action not in self._running:
+                print(f"Action {action.name} finished after timing out.")
+                return
+            self._release(action)
+        self._finish(action, "failed" if error is not None else "done", value, error)
+
+    def _release(self, action):
+        # Called with the condition held
+        self._running.discard(action)
+        for resource in action.resources:
+            self._in_use[resource] -= 1
+        self._cond.notify_all()
+
+    def _finish(self, action, state, value=None, error=None):
+        action.finished_at = time.monotonic()
+        action.state = state
+        action.value = value
+        action.error = error
+        with self._cond:
+            self._recent.append(action)
+            self._counts[state] += 1
+        if error is not None:
+            print(f"Action {action.name} {state.replace('_', ' ')}: {error}")
+        if self.metrics is not None:
+            if action.started_at is not None:
+                self.metrics.observe("action_run", action.finished_at - action.started_at, action.name)
+            if error is not None:
+                self.metrics.error("action", error, action.name)
+        with action._lock:
+            action._done.set()
+            callbacks, action._callbacks = action._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(action)
+            except Exception as e:
+                print(f"Error in callback for action {action.name}: {e}")
+
+    def stats(self):
+        """
+        Returns queue depth, resources in use, counts per final state,
+        queue/run time percentiles in milliseconds and the recent actions.
+        """
+        with self._cond:
+            recent = list(self._recent)
+            stats = {
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "workers": self.workers,
+                "limits": dict(self.limits),
+                "in_use": {resource: count for resource, count in self._in_use.items() if count},
+            }
+            stats.update(self._counts)
+        for name in ("queue_ms", "run_ms"):
+            values = sorted(getattr(action, name) for action in recent if getattr(action, name) is not None)
+            stats[f"{name}_p50"] = percentile(values, 0.5)
+            stats[f"{name}_p95"] = percentile(values, 0.95)
+            stats[f"{name}_max"] = values[-1] if values else None
+        stats["recent"] = [action.as_dict() for action in reversed(recent)][:20]
+        return stats
+
+    def stop(self):
+        """
+        Cancels the queued actions and stops starting new ones.
+        """
+        self.cancel_pending()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
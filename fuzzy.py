@@ -0,0 +1,226 @@
+import math
+import threading
+from collections import Counter, namedtuple
+
+from lazy import lazy_import
+from intents import INTENTS, tokenize
+
+np = lazy_import("numpy")
+
+# Character n-gram sizes; bigrams keep short words ("up" vs "app") comparable
+NGRAM_SIZES = (2, 3)
+
+# Similarity below which a guess is worse than asking again. Application
+# names are picked from thousands, so a guess among them must be closer.
+CUTOFF = 0.6
+APP_CUTOFF = 0.65
+
+# Commands longer than this are not worth guessing at
+MAX_WORDS = 12
+
+# Intents never guessed from a garbled phrase: shutting down on a
+# misheard word (or typing it into a window) is worse than asking again
+EXACT_ONLY = ("exit", "shutdown", "restart", "sleep", "lock_computer", "close_app", "type_text")
+
+# label is the entry's label (intent or application name), phrase its
+# normalized text; start/end are the word positions of the matched
+# window in the tokenized text
+FuzzyMatch = namedtuple("FuzzyMatch", ["label", "phrase", "score", "start", "end"])
+
+
+def ngrams(text, sizes=NGRAM_SIZES):
+    """
+    Returns the character n-grams of text, padded with spaces so the
+    starts and ends of words count.
+    """
+    padded = f" {text} "
+    return [padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1)]
+
+
+def intent_phrases(intents=None, exclude=EXACT_ONLY):
+    """
+    Returns [(intent name, phrase)] for the fuzzy matcher. Leaves out the
+    intents in exclude and those that require other words, which a
+    guessed phrase can't supply.
+    """
+    return [(intent.name, phrase) for intent in (INTENTS if intents is None else intents)
+            if intent.name not in exclude and not intent.requires for phrase in intent.phrases]
+
+
+class FuzzyMatcher:
+    """
+    Finds the phrase closest to a misrecognized one ("volume app" ->
+    "volume up") among a fixed list of labelled phrases.
+
+    Every phrase is a TF-IDF weighted vector of character n-grams, held
+    together as one sparse NumPy matrix (n-gram rows, phrase columns). A
+    text is cut into word windows about as long as the phrases, and all
+    windows are scored against all phrases at once: the rows of their
+    n-grams are gathered and summed per (window, phrase) in one bincount.
+    The best pair is returned if its cosine similarity, scaled down when
+    the two differ in length, reaches the cutoff. The matrix is built on
+    first use, and results are memoized like IntentMatcher's.
+    """
+
+    def __init__(self, entries, cutoff=CUTOFF, slack=1, cache_size=4096):
+        seen = set()
+        self.entries = []
+        for label, phrase in entries:
+            phrase = " ".join(tokenize(phrase))
+            if phrase and (label, phrase) not in seen:
+                seen.add((label, phrase))
+                self.entries.append((label, phrase))
+        self.cutoff = cutoff
+        # Windows may have this many words more than a phrase ("screen shot");
+        # fewer would let "what's the" stand for "what's the date"
+        self.slack = slack
+
+        self.cache_size = cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._unavailable = False
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _build(self):
+        """
+        Builds the n-gram vocabulary, IDF weights and the phrase matrix
+        in compressed sparse row form.
+        """
+        vocabulary = {}
+        postings = []
+        for index, (_, phrase) in enumerate(self.entries):
+            for gram, count in Counter(ngrams(phrase)).items():
+                row = vocabulary.setdefault(gram, len(vocabulary))
+                if row == len(postings):
+                    postings.append([])
+                postings[row].append((index, count))
+
+        # n-grams shared by many phrases ("what's the") count for less
+        frequency = np.array([len(row) for row in postings], dtype=np.int64)
+        idf = np.log((1 + len(self.entries)) / (1 + frequency)) + 1
+
+        indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum(frequency, out=indptr[1:])
+        indices = np.array([index for row in postings for index, _ in row], dtype=np.int64)
+        data = np.array([count for row in postings for _, count in row], dtype=np.float64)
+        data *= np.repeat(idf, frequency)
+        data /= np.sqrt(np.bincount(indices, data * data, minlength=len(self.entries)))[indices]
+
+        self._idf = idf
+        self._indptr, self._indices, self._data = indptr, indices, data
+        self._words = np.array([len(phrase.split()) for _, phrase in self.entries], dtype=np.int64)
+        self._chars = np.array([len(phrase.replace(" ", "")) for _, phrase in self.entries], dtype=np.float64)
+        self._sizes = sorted(set(self._words.tolist()))
+        self._vocabulary = vocabulary
+
+    def _ready(self):
+        if self._vocabulary is not None:
+            return True
+        if self._unavailable or not self.entries:
+            return False
+        with self._lock:
+            if self._vocabulary is None and not self._unavailable:
+                try:
+                    self._build()
+                except ImportError as e:
+                    self._unavailable = True
+                    print(f"Fuzzy matching unavailable: {e}")
+        return self._vocabulary is not None
+
+    def scores(self, words):
+        """
+        Returns (windows, scores) for the tokenized words: windows is
+        [(start, end)] and scores[i, j] the similarity of window i to
+        entry j, 0 where the window is shorter than the phrase or more
+        than slack words longer.
+        """
+        self._ready()
+        vocabulary = self._vocabulary
+        windows = []
+        rows = []
+        weights = []
+        owners = []
+        norms = []
+        for size in sorted({size for length in self._sizes
+                            for size in range(length, length + self.slack + 1)
+                            if 1 <= size <= len(words)}):
+            for start in range(len(words) - size + 1):
+                norm = 0.0
+                for gram, count in Counter(ngrams(" ".join(words[start:start + size]))).items():
+                    row = vocabulary.get(gram)
+                    if row is None:
+                        # In no phrase: makes the text less like all of them
+                        # alike, so it counts like the most common n-grams
+                        norm += count * count
+                        continue
+                    weight = count * self._idf[row]
+                    norm += weight * weight
+                    rows.append(row)
+                    weights.append(weight)
+                    owners.append(len(windows))
+                windows.append((start, start + size))
+                norms.append(math.sqrt(norm))
+        entries = len(self.entries)
+        if not rows:
+            return windows, np.zeros((len(windows), entries))
+
+        # Expand every gathered row into its (phrase, weight) postings
+        rows = np.array(rows, dtype=np.int64)
+        starts = self._indptr[rows]
+        lengths = self._indptr[rows + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        values = self._data[positions] * np.repeat(np.array(weights) / np.array(norms)[owners], lengths)
+        cells = np.repeat(np.array(owners, dtype=np.int64), lengths) * entries + self._indices[positions]
+        scores = np.bincount(cells, values, minlength=len(windows) * entries).reshape(len(windows), entries)
+
+        spans = np.array([(end - start, len("".join(words[start:end]))) for start, end in windows], dtype=np.int64)
+        # A window with many more or fewer letters than a phrase can only
+        # match part of it ("volume app" against "volume")
+        chars = spans[:, 1:2].astype(np.float64)
+        scores *= np.sqrt(np.minimum(chars, self._chars) / np.maximum(chars, self._chars))
+        extra = spans[:, :1] - self._words
+        scores[(extra < 0) | (extra > self.slack)] = 0
+        return windows, scores
+
+    def match(self, text):
+        """
+        Returns the best FuzzyMatch for text, or None if nothing reaches
+        the cutoff (or NumPy is missing).
+        """
+        if not text:
+            return None
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached[0]
+
+        words = tokenize(text)
+        result = None
+        if words and len(words) <= MAX_WORDS and self._ready():
+            windows, scores = self.scores(words)
+            if len(windows):
+                window, entry = np.unravel_index(int(np.argmax(scores)), scores.shape)
+                score = float(scores[window, entry])
+                if score >= self.cutoff:
+                    label, phrase = self.entries[entry]
+                    start, end = windows[window]
+                    result = FuzzyMatch(label, phrase, round(score, 3), start, end)
+
+        if self.cache_size:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[text] = (result,)
+        return result
+
+    def correct(self, text):
+        """
+        Returns text with the best matching window replaced by its phrase
+        ("take a screen shot" -> "take screenshot"), or None.
+        """
+        match = self.match(text)
+        if match is None:
+            return None
+        words = tokenize(text)
+        return " ".join(words[:match.start] + [match.phrase] + words[match.end:])
@@ -0,0 +1,246 @@
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from settings import data_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    command TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    first_used REAL NOT NULL,
+    last_used REAL NOT NULL,
+    rank REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commands_rank ON commands (rank);
+CREATE INDEX IF NOT EXISTS commands_last_used ON commands (last_used);
+"""
+
+# A use counts half as much after this many seconds
+HALF_LIFE = 14 * 24 * 3600.0
+
+# Suggestions kept per trie node, the most /suggest returns
+TOP_K = 8
+
+# Trie levels; longer prefixes are matched within the deepest node's commands
+MAX_DEPTH = 20
+
+MAX_COMMAND_LENGTH = 200
+
+
+def normalize(command):
+    """
+    Returns the history key for a command: lowercase, single-spaced.
+    """
+    return " ".join(command.lower().split())
+
+
+def next_rank(rank, now, half_life=HALF_LIFE):
+    """
+    Returns the rank after one more use at now.
+
+    The rank is log(frecency score) + decay * time, where the score is the
+    number of uses, each halving in weight every half_life seconds. Adding
+    decay * time makes it independent of when it is read, so ranks
+    recorded at different times compare directly and only ever increase.
+    """
+    decay = math.log(2) / half_life
+    if rank is None:
+        return decay * now
+    return decay * now + math.log1p(math.exp(rank - decay * now))
+
+
+class _Node:
+    __slots__ = ("children", "top", "bucket")
+
+    def __init__(self):
+        self.children = {}
+        # [(rank, command)] best first, at most TOP_K
+        self.top = []
+        # At MAX_DEPTH: command -> rank for the commands longer than the node's prefix
+        self.bucket = None
+
+
+class CommandHistory:
+    """
+    Commands the user has given, ranked by frecency (how often, decayed
+    by how long ago), for autocomplete.
+
+    Every use is stored in SQLite; suggestions come from an in-memory
+    prefix trie whose nodes keep their TOP_K best commands, so a lookup
+    walks at most MAX_DEPTH nodes whatever the size of the history. The
+    trie is built from the database in the background by start() (or the
+    first suggest()); commands recorded meanwhile are added once it's ready,
+    and without it record() only writes to the database.
+    """
+
+    def __init__(self, db_path=None, half_life=HALF_LIFE, max_entries=200000):
+        self.db_path = Path(db_path) if db_path else data_path("history.sqlite3")
+        self.half_life = half_life
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # One commit per command; WAL with NORMAL sync keeps that to a few hundred microseconds
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        self._root = _Node()
+        self._pending = []
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Loads the trie from the database in the background.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        self.start()
+        return self._ready.wait(timeout)
+
+    def _load(self):
+        try:
+            with self._lock:
+                count, = self._db.execute("SELECT COUNT(*) FROM commands").fetchone()
+                if count > self.max_entries:
+                    self._db.execute(
+                        "DELETE FROM commands WHERE rank < (SELECT rank FROM commands ORDER BY rank DESC "
+                        "LIMIT 1 OFFSET ?)", (self.max_entries - 1,))
+                    self._db.commit()
+                rows = self._db.execute("SELECT rank, command FROM commands ORDER BY rank DESC").fetchall()
+            root = _Node()
+            for rank, command in rows:
+                # Best first, so a node's top list fills with its best commands
+                self._add(root, command, rank, ordered=True)
+            with self._lock:
+                for command, rank in self._pending:
+                    self._add(root, command, rank)
+                self._pending = []
+                self._root = root
+            print(f"Command history loaded: {len(rows)} commands.")
+        except Exception as e:
+            print(f"Error loading command history: {e}")
+        finally:
+            self._ready.set()
+
+    def record(self, command, now=None):
+        """
+        Records one use of command. Returns its new rank, or None if it
+        isn't worth keeping (empty or too long).
+        """
+        command = normalize(command)
+        if not command or len(command) > MAX_COMMAND_LENGTH:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db.execute("SELECT rank FROM commands WHERE command = ?", (command,)).fetchone()
+            rank = next_rank(row[0] if row else None, now, self.half_life)
+            self._db.execute(
+                "INSERT INTO commands (command, count, first_used, last_used, rank) VALUES (?, 1, ?, ?, ?) "
+                "ON CONFLICT(command) DO UPDATE SET count = count + 1, last_used = excluded.last_used, "
+                "rank = excluded.rank",
+                (command, now, now, rank),
+            )
+            self._db.commit()
+            if self._ready.is_set():
+                self._add(self._root, command, rank)
+            elif self._thread is not None:
+                self._pending.append((command, rank))
+        return rank
+
+    def _add(self, root, command, rank, ordered=False):
+        """
+        Puts command with rank on its path through the trie. With ordered,
+        commands arrive best first and are new, so tops are only appended to.
+        """
+        node = root
+        self._offer(node, command, rank, ordered)
+        for char in command[:MAX_DEPTH]:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            self._offer(node, command, rank, ordered)
+        if len(command) > MAX_DEPTH:
+            if node.bucket is None:
+                node.bucket = {}
+            node.bucket[command] = rank
+
+    @staticmethod
+    def _offer(node, command, rank, ordered):
+        top = node.top
+        if ordered:
+            if len(top) < TOP_K:
+                top.append((rank, command))
+            return
+        # Ranks only grow, so an updated command can only move up
+        for index, (_, existing) in enumerate(top):
+            if existing == command:
+                del top[index]
+                break
+        if len(top) < TOP_K or rank > top[-1][0]:
+            top.append((rank, command))
+            top.sort(reverse=True)
+            del top[TOP_K:]
+
+    def suggest(self, prefix, limit=TOP_K):
+        """
+        Returns up to limit past commands starting with prefix, best first.
+        Empty until the history has loaded.
+        """
+        if not self._ready.is_set():
+            self.start()
+            return []
+        prefix = normalize(prefix) + (" " if prefix[-1:].isspace() and prefix.strip() else "")
+        limit = min(limit, TOP_K)
+        with self._lock:
+            node = self._root
+            for char in prefix[:MAX_DEPTH]:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            if len(prefix) <= MAX_DEPTH:
+                return [command for _, command in node.top[:limit]]
+            bucket = list(node.bucket.items()) if node.bucket else []
+        matches = ((rank, command) for command, rank in bucket if command.startswith(prefix))
+        return [command for _, command in heapq.nlargest(limit, matches)]
+
+    def score(self, command, now=None):
+        """
+        Returns the frecency of command now: its uses, each weighted by
+        recency (1 for now, 0.5 a half-life ago). 0 if never used.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT rank FROM commands WHERE command = ?", (normalize(command),)).fetchone()
+        if row is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return math.exp(row[0] - math.log(2) / self.half_life * now)
+
+    def recent(self, limit=10):
+        """
+        Returns [(command, count, last_used)] for the most recently used commands.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT command, count, last_used FROM commands ORDER BY last_used DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM commands").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,249 @@
+import re
+import string
+from collections import namedtuple
+
+# An intent is a named action triggered by any of its phrases.
+# - phrases:   word sequences matched on word boundaries ("hi" never matches "this")
+# - priority:  higher wins when several intents match the same command
+# - requires:  optional extra words, at least one of which must also appear
+# - resources: what the action drives ("keyboard", "display", "processes");
+#              requests that share one are not run at the same time, and
+#              the action executor limits how many of its actions do
+#              (executor.RESOURCE_LIMITS)
+# - leading:   the phrase only counts at the start of the command ("type
+#              hello", but not "what type of processor")
+Intent = namedtuple("Intent", ["name", "phrases", "priority", "requires", "resources", "leading"])
+Intent.__new__.__defaults__ = (0, (), (), False)
+
+KEYBOARD = ("keyboard",)
+DISPLAY = ("display",)
+PROCESSES = ("processes",)
+
+# start/end are word positions of the matched phrase in the tokenized command
+IntentMatch = namedtuple("IntentMatch", ["name", "phrase", "start", "end"])
+
+# A word is a run of anything but whitespace and punctuation (apostrophes
+# stay in "what's"); arithmetic operators are words of their own
+SEPARATORS = "".join(char for char in string.punctuation if char not in "'")
+TOKEN_PATTERN = re.compile(r"[+\-*/]|[^\s%s]+" % re.escape(SEPARATORS))
+# Most commands have no punctuation at all and are just split on spaces
+SEPARATOR_PATTERN = re.compile("[%s]" % re.escape(SEPARATORS))
+WORD_PATTERN = re.compile(r"\S+")
+
+CALCULATION_WORDS = ("+", "-", "*", "/", "plus", "minus", "times", "divided", "multiplied",
+                     "power", "squared", "cubed", "root", "mod", "modulo")
+
+# Ordered like the original if/elif chain: on equal priority the earlier
+# intent wins, so the table reads top-down exactly as the old chain did.
+# Priorities only lift the specific phrases that the chain used to shadow
+# ("open youtube" behind "open", "close tab" behind "close", ...).
+INTENTS = [
+    # --- Core Commands ---
+    Intent("greeting", ("hello", "hi")),
+    Intent("time", ("what's the time", "what time is it", "time")),
+
+    # --- Wikipedia / Web Search ---
+    Intent("wikipedia", ("wikipedia",)),
+    Intent("web_search", ("search for", "google"), priority=5),
+
+    # --- Applications ---
+    Intent("open_app", ("open",), resources=PROCESSES),
+    Intent("close_app", ("close",), resources=PROCESSES),
+
+    # --- Window Management ---
+    Intent("list_windows", ("list windows", "show windows", "open windows"), priority=10),
+    Intent("switch_window", ("switch to", "switch window"), resources=KEYBOARD),
+    Intent("minimize", ("minimize window", "minimize"), resources=KEYBOARD),
+    Intent("maximize", ("maximize window", "maximize"), resources=KEYBOARD),
+
+    # --- Universal Keyboard Shortcuts ---
+    Intent("paste", ("paste",), priority=1, resources=KEYBOARD),
+    Intent("copy", ("copy",), resources=KEYBOARD),
+    Intent("cut", ("cut",), resources=KEYBOARD),
+    Intent("undo", ("undo",), resources=KEYBOARD),
+    Intent("redo", ("redo",), resources=KEYBOARD),
+    Intent("save", ("save",), resources=KEYBOARD),
+    Intent("select_all", ("select all",), resources=KEYBOARD),
+    Intent("find", ("find", "search"), resources=KEYBOARD),
+    Intent("print", ("print",), resources=KEYBOARD),
+    Intent("new_tab", ("new tab",), priority=10, resources=KEYBOARD),
+    Intent("close_tab", ("close tab",), priority=10, resources=KEYBOARD),
+    Intent("refresh", ("refresh", "reload"), resources=KEYBOARD),
+
+    # --- Typing (whatever follows "type" is typed, so it outranks every phrase in it) ---
+    Intent("type_text", ("type",), priority=20, resources=KEYBOARD, leading=True),
+
+    # --- Task Manager / Lock / Alt+Tab ---
+    Intent("task_manager", ("task manager",), priority=10, resources=KEYBOARD),
+    Intent("lock_computer", ("lock",), requires=("computer", "pc", "screen"), resources=KEYBOARD),
+    Intent("switch_application", ("switch application", "next window"), priority=10, resources=KEYBOARD),
+
+    # --- Volume Control ---
+    Intent("volume_up", ("volume up", "increase volume"), resources=KEYBOARD),
+    Intent("volume_down", ("volume down", "decrease volume"), resources=KEYBOARD),
+    Intent("mute", ("mute",), resources=KEYBOARD),
+
+    # --- System Operations ---
+    Intent("shutdown", ("shutdown", "shut down"), resources=PROCESSES),
+    Intent("restart", ("restart",), resources=PROCESSES),
+    Intent("sleep", ("sleep", "hibernate"), resources=PROCESSES),
+
+    # --- Screen Control ---
+    Intent("screenshot", ("screenshot", "take screenshot"), priority=5, resources=DISPLAY),
+    Intent("screenshot_burst", ("screenshot burst", "burst of screenshots", "screenshots"), priority=6,
+           resources=DISPLAY),
+
+    # --- File Operations / Notes ---
+    Intent("create_file", ("create file", "make file")),
+    Intent("create_folder", ("create folder", "make folder")),
+    Intent("take_note", ("take note", "write note", "remember this")),
+    Intent("find_note", ("find my note", "find my notes", "find note", "find notes",
+                         "search my notes", "search notes", "notes about"), priority=10),
+    Intent("read_notes", ("read my notes", "read notes", "read last", "read my last", "read latest"),
+           priority=10, requires=("note", "notes")),
+    Intent("notes_between", ("notes from", "notes on", "notes since", "notes taken"), priority=12),
+
+    # --- Weather / Calculator / Date ---
+    Intent("weather", ("weather",)),
+    Intent("calculate", ("calculate",)),
+    Intent("calculate", ("what is",), requires=CALCULATION_WORDS),
+    Intent("date", ("what's the date", "what date is it", "today's date", "date")),
+
+    # --- Entertainment / News / System Information ---
+    Intent("play_music", ("play music", "play song", "play the song")),
+    Intent("play_artist", ("play artist", "play songs by", "play music by", "play something by"), priority=6),
+    Intent("shuffle_music", ("shuffle", "shuffle music", "play random music", "play something"), priority=5),
+    Intent("joke", ("joke",)),
+    Intent("news", ("news", "headlines")),
+    Intent("battery", ("battery",)),
+    Intent("cpu", ("cpu", "processor")),
+    Intent("memory", ("memory usage", "memory", "ram")),
+    Intent("disk", ("disk space", "disk usage", "storage")),
+
+    # --- Open Websites ---
+    Intent("open_website", (
+        "open youtube", "open gmail", "open email",
+        "open facebook", "open twitter", "open instagram",
+    ), priority=10, resources=PROCESSES),
+
+    # --- Who are you ---
+    Intent("who_are_you", ("who are you", "what is your name", "what's your name"), priority=10),
+
+    # --- Cancel Pending Actions (last, so "take note cancel the meeting" is a note) ---
+    Intent("cancel", ("cancel", "abort")),
+
+    # --- Exit Command ---
+    Intent("exit", ("exit", "quit", "stop", "goodbye")),
+]
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase word tokens.
+    """
+    text = text.lower()
+    if SEPARATOR_PATTERN.search(text) is None:
+        return text.split()
+    return TOKEN_PATTERN.findall(text)
+
+
+def text_after(text, position):
+    """
+    Returns text from after its first position tokens on, as written,
+    punctuation included, for handlers that use the rest of a command as
+    is ("type: hello, world" -> "hello, world").
+    """
+    if position == 0:
+        return text.strip()
+    words = TOKEN_PATTERN if SEPARATOR_PATTERN.search(text) else WORD_PATTERN
+    for count, word in enumerate(words.finditer(text), 1):
+        if count == position:
+            return text[word.end():].lstrip(" \t:,;").rstrip()
+    return ""
+
+
+class IntentMatcher:
+    """
+    Matches a command against an intent table in a single pass.
+
+    The phrases of every intent are compiled once into a token index keyed
+    by their first word, so a command is scanned word by word with one dict
+    lookup per word instead of running one substring test per rule.
+    """
+
+    def __init__(self, intents=None, cache_size=4096):
+        self.intents = list(INTENTS if intents is None else intents)
+
+        # Spoken commands repeat a lot, so recent results are memoized
+        self.cache_size = cache_size
+        self._cache = {}
+
+        # intent name -> resources its action needs
+        self.resources = {}
+        for intent in self.intents:
+            self.resources[intent.name] = tuple(sorted(set(self.resources.get(intent.name, ())) | set(intent.resources)))
+
+        # Ranks are plain ints (priority first, then table order) so the
+        # hot loop compares numbers rather than tuples
+        # first word -> [(phrase words, rank, intent, phrase)], best rank
+        # first and the longer phrase first on equal rank
+        self._index = {}
+        for order, intent in enumerate(self.intents):
+            rank = intent.priority * len(self.intents) - order
+            for phrase in intent.phrases:
+                words = tokenize(phrase)
+                self._index.setdefault(words[0], []).append((words, rank, intent, phrase))
+        for phrases in self._index.values():
+            phrases.sort(key=lambda entry: (entry[1], len(entry[0])), reverse=True)
+
+    def match(self, command):
+        """
+        Returns the best IntentMatch for the command, or None.
+        """
+        if not command:
+            return None
+
+        cache = self._cache if self.cache_size else None
+        if cache is not None:
+            cached = cache.get(command)
+            if cached is not None:
+                return cached[0]
+
+        # tokenize(), inlined as it is most of the time taken here
+        text = command.lower()
+        if SEPARATOR_PATTERN.search(text) is None:
+            words = text.split()
+        else:
+            words = TOKEN_PATTERN.findall(text)
+
+        # On equal rank the earliest phrase in the command wins
+        result = None
+        best_rank = None
+        index = self._index
+        for position, word in enumerate(words):
+            for phrase_words, rank, intent, phrase in index.get(word, ()):
+                if best_rank is not None and rank <= best_rank:
+                    break
+                end = position + len(phrase_words)
+                if words[position:end] != phrase_words:
+                    continue
+                if intent.leading and position:
+                    continue
+                if intent.requires and set(words).isdisjoint(intent.requires):
+                    continue
+                result = IntentMatch(intent.name, phrase, position, end)
+                best_rank = rank
+                break
+
+        if cache is not None:
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            cache[command] = (result,)
+        return result
+
+    def resources_for(self, command):
+        """
+        Returns the resources the command's intent needs, () if none matched.
+        """
+        match = self.match(command)
+        return self.resources[match.name] if match else ()
@@ -0,0 +1,47 @@
+import importlib
+import threading
+import time
+
+# Module name -> seconds its deferred import took, in load order
+IMPORT_TIMES = {}
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so
+    heavy dependencies (pyautogui, psutil, ...) are only paid for by the
+    commands that use them.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    IMPORT_TIMES[self._name] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns a LazyModule for name; the import happens on first use.
+    """
+    return LazyModule(name)
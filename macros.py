@@ -0,0 +1,93 @@
+import json
+import os
+import re
+import threading
+
+from settings import data_path
+
+# Macro names are used in URLs, so keep them to simple words
+NAME_PATTERN = re.compile(r"^[\w-]{1,64}$")
+
+
+class MacroStore:
+    """
+    Named command lists saved to a JSON file (~/.chanakya/macros.json).
+
+    Each macro is {"commands": [...], "speak": "all" | "last" | "none",
+    "stop_on_error": bool}. Every change rewrites the file atomically.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or data_path("macros.json"))
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self._macros = json.load(f)
+        except FileNotFoundError:
+            self._macros = {}
+        except ValueError as e:
+            print(f"Ignoring unreadable macros file {self.path}: {e}")
+            self._macros = {}
+
+    def names(self):
+        with self._lock:
+            return sorted(self._macros)
+
+    def get(self, name):
+        """
+        Returns the macro saved as name, or None.
+        """
+        with self._lock:
+            macro = self._macros.get(name)
+            return dict(macro) if macro is not None else None
+
+    def save(self, name, commands, speak="all", stop_on_error=False):
+        """
+        Saves (or replaces) a macro. Raises ValueError if it is invalid.
+        """
+        if not NAME_PATTERN.match(name):
+            raise ValueError("Macro names may only contain letters, digits, '_' and '-'.")
+        macro = {"commands": validate_commands(commands), "speak": validate_speak(speak),
+                 "stop_on_error": bool(stop_on_error)}
+        with self._lock:
+            self._macros[name] = macro
+            self._write()
+        return dict(macro)
+
+    def delete(self, name):
+        """
+        Deletes a macro. Returns False if there was none.
+        """
+        with self._lock:
+            if self._macros.pop(name, None) is None:
+                return False
+            self._write()
+            return True
+
+    def _write(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._macros, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def validate_commands(commands, max_commands=100):
+    """
+    Returns commands as a list of non-empty strings. Raises ValueError otherwise.
+    """
+    if not isinstance(commands, list) or not commands:
+        raise ValueError("'commands' must be a non-empty list.")
+    if len(commands) > max_commands:
+        raise ValueError(f"At most {max_commands} commands can run in one batch.")
+    if not all(isinstance(command, str) and command.strip() for command in commands):
+        raise ValueError("Every command must be a non-empty string.")
+    return [command.strip() for command in commands]
+
+
+def validate_speak(speak):
+    """
+    Checks the speech mode of a batch: every reply, only the last, or none.
+    """
+    if speak not in ("all", "last", "none"):
+        raise ValueError("'speak' must be 'all', 'last' or 'none'.")
+    return speak
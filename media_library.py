@@ -0,0 +1,288 @@
+import math
+import os
+import random
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from dir_index import DirectoryIndex, trigrams
+from settings import data_path
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus", ".wav", ".wma")
+
+# Music is found at most this many directory levels below a library root
+MAX_DEPTH = 8
+
+# Minimum trigram similarity (0-1) for a fuzzy title or artist match
+MATCH_CUTOFF = 0.3
+
+TRACKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    artist TEXT,
+    album TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS tracks_dir ON tracks (dir);
+"""
+
+Track = namedtuple("Track", ["path", "title", "artist", "album", "duration"])
+
+# "01 - ", "01. ", "1 " in front of a file name
+TRACK_NUMBER_PATTERN = re.compile(r"^\d{1,3}(?:\s*[-.]\s*|\s+)")
+NON_WORD_PATTERN = re.compile(r"[^\w]+")
+
+
+def default_library_roots():
+    """
+    Returns the directories scanned for music.
+    CHANAKYA_MUSIC_ROOTS (separated by os.pathsep) overrides ~/Music.
+    """
+    configured = os.environ.get("CHANAKYA_MUSIC_ROOTS")
+    if configured:
+        return [Path(root) for root in configured.split(os.pathsep) if root]
+    return [Path.home() / "Music"]
+
+
+def normalize(text):
+    """
+    Returns text lowercased, with punctuation collapsed to single spaces.
+    """
+    return NON_WORD_PATTERN.sub(" ", text.lower()).strip()
+
+
+def tags_from_name(path):
+    """
+    Guesses (title, artist) from a file name like "01 - Artist - Title.mp3".
+    """
+    stem = TRACK_NUMBER_PATTERN.sub("", os.path.splitext(os.path.basename(path))[0]).strip()
+    if " - " in stem:
+        artist, title = stem.split(" - ", 1)
+        return title.strip(), artist.strip()
+    return stem, None
+
+
+def load_tag_reader():
+    """
+    Returns a function path -> (title, artist, album, duration) reading tags
+    with mutagen, or None if mutagen isn't installed.
+    """
+    try:
+        import mutagen
+    except ImportError:
+        return None
+
+    def read_tags(path):
+        try:
+            audio = mutagen.File(path, easy=True)
+        except Exception:
+            return None, None, None, None
+        if audio is None:
+            return None, None, None, None
+        tags = audio.tags or {}
+
+        def first(key):
+            try:
+                values = tags.get(key)
+            except Exception:
+                return None
+            if not values:
+                return None
+            return str(values[0]).strip() or None
+
+        duration = getattr(audio.info, "length", None)
+        return first("title"), first("artist") or first("albumartist"), first("album"), duration
+
+    return read_tags
+
+
+class _FuzzyIndex:
+    """
+    Trigram index over names for typo-tolerant lookups: names are ranked by
+    the similarity of their trigram set to the query's.
+    """
+
+    def __init__(self, names):
+        self.names = {}
+        self.grams = {}
+        for name in names:
+            grams = frozenset(trigrams(name, padded=True))
+            self.names[name] = grams
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(name)
+
+    def best(self, query, cutoff=MATCH_CUTOFF):
+        """
+        Returns (name, similarity) for the closest name, or (None, 0.0).
+        """
+        if query in self.names:
+            return query, 1.0
+        query_grams = trigrams(query, padded=True)
+        # A name scoring at least cutoff shares at least `needed` trigrams
+        # with the query, so it must have one of the rarest
+        # len - needed + 1 of them; common trigrams are never walked
+        needed = max(1, math.ceil(cutoff * len(query_grams)))
+        rarest = sorted(query_grams, key=lambda gram: len(self.grams.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(query_grams) - needed + 1]:
+            candidates.update(self.grams.get(gram, ()))
+
+        best, best_score = None, 0.0
+        for name in candidates:
+            grams = self.names[name]
+            shared = len(query_grams & grams)
+            # Jaccard similarity of the trigram sets; a name that contains the
+            # whole query ("bohemian" in "bohemian rhapsody") scores at least 0.5
+            score = shared / (len(query_grams) + len(grams) - shared)
+            if query in name:
+                score = max(score, 0.5 + score / 2)
+            if score > best_score or (score == best_score and len(name) < len(best)):
+                best, best_score = name, score
+        if best_score < cutoff:
+            return None, 0.0
+        return best, best_score
+
+
+class MediaLibrary(DirectoryIndex):
+    """
+    Persistent index of the music library: titles, artists and albums of
+    every audio file below the library roots.
+
+    Like AppIndex, directories are indexed incrementally (see
+    DirectoryIndex); within a directory listed again, tags are read again
+    (with mutagen, when installed) only for files whose mtime or size
+    changed. Lookups are served from in-memory fuzzy indexes.
+    """
+
+    SCHEMA = TRACKS_SCHEMA
+    FILES_TABLE = "tracks"
+    DESCRIPTION = "media library"
+
+    def __init__(self, roots=None, db_path=None, extensions=AUDIO_EXTENSIONS, max_depth=MAX_DEPTH,
+                 read_tags=True):
+        self.read_tags = read_tags
+        self._tracks = []
+        self._titles = {}
+        self._artists = {}
+        self._title_index = _FuzzyIndex(())
+        self._artist_index = _FuzzyIndex(())
+        super().__init__(default_library_roots() if roots is None else roots,
+                         db_path or data_path("media_library.sqlite3"), extensions, max_depth)
+
+    def _load(self, db):
+        """
+        Rebuilds the in-memory lookup tables from the database.
+        """
+        tracks = [Track(*row) for row in db.execute(
+            "SELECT path, title, artist, album, duration FROM tracks ORDER BY artist, album, path"
+        )]
+        titles = {}
+        artists = {}
+        for track in tracks:
+            titles.setdefault(normalize(track.title), []).append(track)
+            if track.artist:
+                artists.setdefault(normalize(track.artist), []).append(track)
+        title_index, artist_index = _FuzzyIndex(titles), _FuzzyIndex(artists)
+        # Swapped in one step so concurrent lookups never see a partial table
+        self._tracks, self._titles, self._artists, self._title_index, self._artist_index = (
+            tracks, titles, artists, title_index, artist_index)
+
+    def _empty(self):
+        return not self._tracks
+
+    @property
+    def tracks(self):
+        return self._tracks
+
+    def _refresh_context(self):
+        # The tag reader, loaded once per refresh
+        return load_tag_reader() if self.read_tags else None
+
+    def _index_files(self, db, directory, rank, files, read_tags):
+        """
+        Updates the tracks of directory, reading tags only for files whose
+        mtime or size changed.
+        """
+        previous = {
+            path: (file_mtime, size)
+            for path, file_mtime, size in db.execute("SELECT path, mtime, size FROM tracks WHERE dir = ?", (directory,))
+        }
+        changed = []
+        present = set()
+        for entry in files:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            present.add(entry.path)
+            if previous.get(entry.path) != (stat.st_mtime, stat.st_size):
+                changed.append((entry.path, stat.st_mtime, stat.st_size))
+
+        rows = []
+        for path, file_mtime, size in changed:
+            title, artist, album, duration = read_tags(path) if read_tags else (None, None, None, None)
+            name_title, name_artist = tags_from_name(path)
+            rows.append((path, directory, file_mtime, size, title or name_title, artist or name_artist, album, duration))
+
+        db.executemany("DELETE FROM tracks WHERE path = ?", [(path,) for path in previous if path not in present])
+        db.executemany(
+            "INSERT OR REPLACE INTO tracks (path, dir, mtime, size, title, artist, album, duration) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows,
+        )
+
+    def find_track(self, query, cutoff=MATCH_CUTOFF):
+        """
+        Returns the track whose title best matches query, or None.
+        "yesterday by the beatles" prefers the title by that artist.
+        """
+        query = normalize(query)
+        if not query:
+            return None
+        if " by " in query:
+            title, artist = query.rsplit(" by ", 1)
+            name, _ = self._artist_index.best(artist, cutoff)
+            tracks = self._artists.get(name, ())
+            if tracks:
+                by_artist = {normalize(track.title): track for track in reversed(tracks)}
+                title_name, _ = _FuzzyIndex(by_artist).best(title, cutoff)
+                if title_name is not None:
+                    return by_artist[title_name]
+        name, _ = self._title_index.best(query, cutoff)
+        # A refresh may swap the tables between the two lookups
+        tracks = self._titles.get(name)
+        return tracks[0] if tracks else None
+
+    def find_artist(self, query, cutoff=MATCH_CUTOFF):
+        """
+        Returns (artist, [tracks]) for the artist best matching query, or (None, []).
+        """
+        name, _ = self._artist_index.best(normalize(query), cutoff)
+        tracks = self._artists.get(name)
+        if not tracks:
+            return None, []
+        return tracks[0].artist, list(tracks)
+
+    def shuffled(self, tracks=None, limit=200):
+        """
+        Returns up to limit tracks (default: the whole library) in random order.
+        """
+        tracks = self._tracks if tracks is None else tracks
+        return random.sample(tracks, min(limit, len(tracks)))
+
+
+def write_playlist(tracks, path=None):
+    """
+    Writes tracks to an M3U playlist that the default player can open.
+    Returns the playlist path.
+    """
+    path = str(path or data_path("playlist.m3u"))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("#EXTM3U\n")
+        for track in tracks:
+            duration = int(track.duration) if track.duration else -1
+            f.write(f"#EXTINF:{duration},{track.artist or 'Unknown'} - {track.title}\n{track.path}\n")
+    return path
@@ -0,0 +1,146 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Pipeline stages, in order
+STAGES = ("capture", "recognition", "dispatch", "action", "tts")
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of durations, as Prometheus expects them.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        """
+        Returns [(upper bound, observations <= bound)] ending with +Inf.
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((float("inf"), self.count))
+        return result
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class Metrics:
+    """
+    Latency histograms per (stage, intent) and error counters per
+    (stage, error), rendered in the Prometheus text format.
+
+    With log set (e.g. print), every observation is also emitted as a
+    one-line JSON record, for the command-line assistant.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, log=None):
+        self.buckets = buckets
+        self.log = log
+        self._histograms = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, intent=None):
+        """
+        Records seconds spent in stage, optionally for one intent.
+        """
+        key = (stage, intent or "")
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        if self.log is not None:
+            self.log(json.dumps({"metric": "stage", "stage": stage, "intent": intent,
+                                 "ms": round(seconds * 1000, 2)}))
+
+    def error(self, stage, error, intent=None):
+        """
+        Counts one error in stage; error is an exception or a short name.
+        """
+        name = error if isinstance(error, str) else type(error).__name__
+        key = (stage, name, intent or "")
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+        if self.log is not None:
+            self.log(json.dumps({"metric": "error", "stage": stage, "error": name, "intent": intent}))
+
+    @contextmanager
+    def time(self, stage, intent=None):
+        """
+        Times the block as stage; an exception escaping it is counted as an error.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(stage, e, intent)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, intent)
+
+    def summary(self):
+        """
+        Returns {stage: {"count", "mean_ms"}} over all intents.
+        """
+        totals = {}
+        with self._lock:
+            for (stage, _), histogram in self._histograms.items():
+                count, total = totals.get(stage, (0, 0.0))
+                totals[stage] = (count + histogram.count, total + histogram.sum)
+        return {
+            stage: {"count": count, "mean_ms": round(total / count * 1000, 2) if count else None}
+            for stage, (count, total) in totals.items()
+        }
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP chanakya_stage_seconds Time spent in each stage of the voice pipeline.",
+            "# TYPE chanakya_stage_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            errors = sorted(self._errors.items())
+            for (stage, intent), histogram in histograms:
+                labels = f'stage="{escape_label(stage)}",intent="{escape_label(intent)}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(f'chanakya_stage_seconds_bucket{{{labels},le="{format_bound(bound)}"}} {count}')
+                lines.append(f"chanakya_stage_seconds_sum{{{labels}}} {histogram.sum!r}")
+                lines.append(f"chanakya_stage_seconds_count{{{labels}}} {histogram.count}")
+        lines.append("# HELP chanakya_errors_total Errors raised in each stage of the voice pipeline.")
+        lines.append("# TYPE chanakya_errors_total counter")
+        for (stage, name, intent), count in errors:
+            lines.append(
+                f'chanakya_errors_total{{stage="{escape_label(stage)}",error="{escape_label(name)}",'
+                f'intent="{escape_label(intent)}"}} {count}'
+            )
+        return "\n".join(lines) + "\n"
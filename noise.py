@@ -0,0 +1,147 @@
+import json
+import math
+import os
+import threading
+import time
+
+from capture import FRAME_MS, frame_energy
+from settings import data_path
+
+
+class NoiseEstimator:
+    """
+    Tracks the background noise level and derives the speech energy
+    threshold from it.
+
+    The noise floor is an exponential moving average (time constant
+    time_constant seconds of audio) of the energy of non-speech frames
+    seen between commands, and of long no-match segments, which are what
+    steady noise above the threshold turns into. The threshold is the
+    floor times ratio, like speech_recognition's dynamic threshold. It is
+    saved to disk so the next start can skip calibration.
+    """
+
+    def __init__(self, path=None, ratio=1.5, time_constant=10.0, default_threshold=300,
+                 min_threshold=50, max_threshold=4000, max_age=7 * 24 * 3600,
+                 save_interval=30.0, min_noise_segment_s=4.0):
+        self.path = str(path or data_path("noise.json"))
+        self.ratio = ratio
+        self.time_constant = time_constant
+        self.default_threshold = default_threshold
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.max_age = max_age
+        self.save_interval = save_interval
+        self.min_noise_segment_s = min_noise_segment_s
+
+        self.floor = None
+        self.updated_at = None
+        self.observed_seconds = 0.0
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+
+        # Optional callback on_update(threshold) after every change
+        self.on_update = None
+
+        self.load()
+
+    @property
+    def calibrated(self):
+        return self.floor is not None
+
+    @property
+    def threshold(self):
+        """
+        The current speech energy threshold.
+        """
+        if self.floor is None:
+            return self.default_threshold
+        return min(self.max_threshold, max(self.min_threshold, self.floor * self.ratio))
+
+    def load(self):
+        """
+        Reads the saved noise floor. Returns False if there is none or it is
+        older than max_age seconds.
+        """
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            floor = float(saved["noise_floor"])
+            updated_at = float(saved["updated_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if time.time() - updated_at > self.max_age:
+            return False
+        self.floor = floor
+        self.updated_at = updated_at
+        return True
+
+    def save(self):
+        if self.floor is None:
+            return
+        with self._lock:
+            saved = {"noise_floor": self.floor, "energy_threshold": self.threshold, "updated_at": self.updated_at}
+            self._saved_at = time.monotonic()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(saved, f)
+        os.replace(temp_path, self.path)
+
+    def observe(self, energy, seconds):
+        """
+        Folds seconds of audio at the given RMS energy into the noise floor.
+        """
+        with self._lock:
+            if self.floor is None:
+                self.floor = energy
+            else:
+                weight = 1.0 - math.exp(-seconds / self.time_constant)
+                self.floor += weight * (energy - self.floor)
+            self.updated_at = time.time()
+            self.observed_seconds += seconds
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"Could not save noise calibration: {e}")
+        if self.on_update is not None:
+            self.on_update(self.threshold)
+
+    def observe_frame(self, frame, energy, frame_ms=FRAME_MS):
+        """
+        Feeds one non-speech frame; matches the segmenter's on_silence callback.
+        """
+        self.observe(energy, frame_ms / 1000)
+
+    def observe_segment(self, segment):
+        """
+        Feeds a segment recognition found no words in. Only long segments
+        count as noise; short ones are more likely unclear speech.
+        """
+        if segment.duration >= self.min_noise_segment_s:
+            self.observe(frame_energy(segment.data, segment.sample_width), segment.duration)
+
+    def calibrate(self, source, duration=1.0):
+        """
+        Sets the noise floor from duration seconds of a capture source
+        (capture.MicrophoneSource, capture.WavSource) and saves it.
+        Returns the new threshold.
+        """
+        energies = []
+        with source:
+            frames = max(1, int(duration * 1000 / source.frame_ms))
+            for _ in range(frames):
+                frame = source.read()
+                if not frame:
+                    break
+                energies.append(frame_energy(frame, source.sample_width))
+        if not energies:
+            raise ValueError("no audio to calibrate from")
+        with self._lock:
+            self.floor = sum(energies) / len(energies)
+            self.updated_at = time.time()
+        self.save()
+        if self.on_update is not None:
+            self.on_update(self.threshold)
+        return self.threshold
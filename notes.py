@@ -0,0 +1,310 @@
+import datetime
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from calc import UNITS
+from settings import data_path
+
+Note = namedtuple("Note", ["id", "created_at", "text"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_created ON notes (created_at);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+# Full-text index over the notes table; it only ever grows, like the notes
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(text, content='notes', content_rowid='id')"
+
+# "[2025-12-24 14:30:00] text", as take_note used to write to voice_notes.txt
+TEXT_NOTE_PATTERN = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ?(.*)$")
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Left out of searches: "find my note about the dentist" looks for "dentist"
+STOP_WORDS = {"a", "an", "the", "my", "me", "about", "for", "on", "with", "of", "to", "that", "mentioning"}
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def timestamp(value):
+    """
+    Returns a datetime or a timestamp as a timestamp.
+    """
+    return value.timestamp() if isinstance(value, datetime.datetime) else value
+
+
+class NotesStore:
+    """
+    Append-only notes with a full-text index, in SQLite.
+
+    add() only buffers the note; a background thread writes buffered notes
+    in one transaction every flush_interval seconds (or as soon as
+    batch_size are waiting). The database runs in WAL mode with
+    synchronous=NORMAL, so commits are cheap and the log is fsynced by a
+    checkpoint every checkpoint_interval seconds. Queries flush first, so
+    a note can be found right after it is added.
+    """
+
+    def __init__(self, path=None, flush_interval=1.0, batch_size=100, checkpoint_interval=30.0):
+        self.path = str(path or data_path("notes.sqlite3"))
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._checkpointed_at = time.monotonic()
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        # Some SQLite builds lack FTS5; searches then fall back to a scan
+        try:
+            self._db.execute(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            self.full_text = False
+        self._db.commit()
+
+    def add(self, text, created_at=None):
+        """
+        Buffers a note; it is written within flush_interval seconds.
+        """
+        with self._lock:
+            self._pending.append((created_at if created_at is not None else time.time(), text))
+            full = len(self._pending) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def add_many(self, notes):
+        """
+        Writes [(created_at, text)] at once, in a single transaction.
+        """
+        with self._lock:
+            self._write(list(notes))
+
+    def flush(self):
+        """
+        Writes all buffered notes.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._write(pending)
+
+    def _write(self, notes):
+        if not notes:
+            return
+        with self._db:
+            for created_at, text in notes:
+                cursor = self._db.execute("INSERT INTO notes (created_at, text) VALUES (?, ?)", (created_at, text))
+                if self.full_text:
+                    self._db.execute("INSERT INTO notes_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+
+    def checkpoint(self):
+        """
+        Copies the write-ahead log into the database file and fsyncs it.
+        """
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            self._checkpointed_at = time.monotonic()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._checkpointed_at >= self.checkpoint_interval:
+                    self.checkpoint()
+            except sqlite3.Error as e:
+                print(f"Could not write notes: {e}")
+
+    def search(self, query, limit=5):
+        """
+        Returns up to limit notes containing every word of query (as a word
+        prefix), most recently added first.
+        """
+        words = WORD_PATTERN.findall(query.lower())
+        words = [word for word in words if word not in STOP_WORDS] or words
+        if not words:
+            return []
+        self.flush()
+        with self._lock:
+            if self.full_text:
+                match = " ".join(f'"{word}"*' for word in words)
+                # Walking the index newest first stops after limit matches,
+                # where ranking would have to score every match
+                rows = self._db.execute(
+                    "SELECT notes.id, notes.created_at, notes.text FROM notes JOIN ("
+                    "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+                    ") AS found ON notes.id = found.rowid ORDER BY notes.id DESC",
+                    (match, limit),
+                ).fetchall()
+            else:
+                conditions = " AND ".join("text LIKE ?" for _ in words)
+                rows = self._db.execute(
+                    f"SELECT id, created_at, text FROM notes WHERE {conditions} ORDER BY id DESC LIMIT ?",
+                    [f"%{word}%" for word in words] + [limit],
+                ).fetchall()
+        return [Note(*row) for row in rows]
+
+    def latest(self, count=5):
+        """
+        Returns the count most recent notes, newest first.
+        """
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created_at, text FROM notes ORDER BY created_at DESC, id DESC LIMIT ?", (count,)
+            ).fetchall()
+        return [Note(*row) for row in rows]
+
+    def between(self, start, end, limit=50):
+        """
+        Returns notes taken from start up to (not including) end, both
+        datetimes or timestamps, oldest first.
+        """
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created_at, text FROM notes WHERE created_at >= ? AND created_at < ? "
+                "ORDER BY created_at, id LIMIT ?", (timestamp(start), timestamp(end), limit),
+            ).fetchall()
+        return [Note(*row) for row in rows]
+
+    def count(self, start=None, end=None):
+        """
+        Returns the number of notes, optionally only those from start up to end.
+        """
+        self.flush()
+        with self._lock:
+            if start is None:
+                return self._db.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+            return self._db.execute(
+                "SELECT COUNT(*) FROM notes WHERE created_at >= ? AND created_at < ?",
+                (timestamp(start), timestamp(end)),
+            ).fetchone()[0]
+
+    def import_text(self, path):
+        """
+        Imports notes from a voice_notes.txt file. Only what was appended
+        since the last import is read, so this can run at every start.
+        Returns the number of notes imported.
+        """
+        path = str(path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return 0
+        with self._lock:
+            row = self._db.execute("SELECT offset FROM imports WHERE path = ?", (path,)).fetchone()
+        offset = row[0] if row is not None and row[0] <= size else 0
+        if offset == size:
+            return 0
+
+        notes = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # A line still being written is left for the next import
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            found = TEXT_NOTE_PATTERN.match(line.strip())
+            if found and found.group(2).strip():
+                created_at = datetime.datetime.strptime(found.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+                notes.append((created_at, found.group(2).strip()))
+
+        with self._lock:
+            self._write(notes)
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO imports (path, offset) VALUES (?, ?)", (path, offset + end))
+        return len(notes)
+
+    def close(self):
+        """
+        Writes buffered notes, stops the writer thread and closes the database.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self.checkpoint()
+        with self._lock:
+            self._db.close()
+
+
+def parse_count(text, default=5, maximum=20):
+    """
+    Returns the number in "read last 3 notes" / "read last three notes".
+    """
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word.isdigit():
+            return max(1, min(maximum, int(word)))
+        if word in UNITS and UNITS[word] > 0:
+            return min(maximum, UNITS[word])
+    return default
+
+
+def parse_date_range(text, now=None):
+    """
+    Returns (start, end) datetimes for the period named in text: today,
+    yesterday, a weekday (the most recent one), this/last week, this/last
+    month, or the last N days. Returns None if no period is named.
+    """
+    now = now or datetime.datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    day = datetime.timedelta(days=1)
+    text = text.lower()
+    words = WORD_PATTERN.findall(text)
+
+    if "today" in words:
+        return today, today + day
+    if "yesterday" in words:
+        return today - day, today
+    for index, name in enumerate(WEEKDAYS):
+        if name in words:
+            start = today - day * ((today.weekday() - index) % 7)
+            return start, start + day
+    if "week" in words:
+        start = today - day * today.weekday()
+        return (start - 7 * day, start) if "last" in words else (start, today + day)
+    if "month" in words:
+        start = today.replace(day=1)
+        if "last" in words:
+            previous = (start - day).replace(day=1)
+            return previous, start
+        return start, today + day
+    found = re.search(r"(?:last|past) (\w+) days", text)
+    if found:
+        days = parse_count(found.group(1), default=None, maximum=3650)
+        if days:
+            return today - day * (days - 1), today + day
+    return None
+
+
+def describe(note):
+    """
+    Returns a note as a sentence to speak: "On December 24 at 02:30 PM: text".
+    """
+    taken = datetime.datetime.fromtimestamp(note.created_at)
+    return f"On {taken.strftime('%B %d at %I:%M %p')}: {note.text}"
@@ -0,0 +1,93 @@
+import re
+from collections import namedtuple
+
+from intents import KEYBOARD, tokenize
+
+# Words that join the steps of one utterance ("open notepad, type hello and save it")
+SEPARATOR_PATTERN = re.compile(r"(\s*[,;]\s*|\s+(?:and then|and|then|after that|afterwards|finally)\s+)", re.IGNORECASE)
+
+# Filler left at the start of a step once it is cut off ("..., and then save it")
+LEADING_PATTERN = re.compile(r"^(?:(?:and|then|also|please|finally|afterwards|after that)\s+)+", re.IGNORECASE)
+
+# Words that say nothing on their own, so "please, open notepad and ..."
+# isn't a step that wasn't understood
+FILLER_WORDS = frozenset(("please", "ok", "okay", "so", "now", "hey", "well", "could", "can", "would", "will", "you"))
+
+# More steps than this in one breath are more likely a misheard sentence
+MAX_STEPS = 8
+
+# Intents whose action saves its own result, so a "save it" right after
+# one of them belongs to it rather than pressing Ctrl+S
+# ("take a screenshot and save it")
+SELF_SAVING = ("screenshot", "screenshot_burst")
+
+# text is the step's own command, match its IntentMatch
+Step = namedtuple("Step", ["text", "match"])
+
+
+def split_command(command, matcher, max_steps=MAX_STEPS):
+    """
+    Splits a compound command into its steps, [Step] in the order spoken,
+    or returns None if it is a single command.
+
+    A part only starts a new step if it begins with a command phrase, so
+    "search for salt and pepper" and "take note buy milk and eggs" stay
+    whole, while "open notepad, type hello and save it" is three steps.
+    Other parts belong to the step before them, unless that step is a bare
+    command with nothing after its phrase ("copy, new tab"); such parts,
+    and a first part without a command, are steps whose match is None.
+    """
+    pieces = SEPARATOR_PATTERN.split(command)
+    while len(pieces) >= 3 and set(tokenize(pieces[0])) <= FILLER_WORDS:
+        pieces = pieces[2:]
+    if len(pieces) < 3:
+        return None
+    texts = [pieces[0]]
+    matches = [matcher.match(pieces[0])]
+    for separator, part in zip(pieces[1::2], pieces[2::2]):
+        text = LEADING_PATTERN.sub("", part.strip())
+        match = matcher.match(text) if text else None
+        previous = matches[-1]
+        if (not text or len(texts) >= max_steps
+                or (match is not None and match.name == "save" and previous is not None
+                    and previous.name in SELF_SAVING)):
+            texts[-1] += separator + part
+        elif match is not None and match.start == 0 and texts[-1].strip():
+            texts.append(text)
+            matches.append(match)
+        elif previous is not None and previous.end == len(tokenize(texts[-1])):
+            texts.append(text)
+            matches.append(None)
+        else:
+            texts[-1] += separator + part
+    if len(texts) < 2:
+        return None
+    steps = [Step(text.strip(), matcher.match(text.strip()) if match is not None else None)
+             for text, match in zip(texts, matches)]
+    if all(step.match is None for step in steps):
+        return None
+    return steps
+
+
+def not_understood(plan):
+    """
+    Returns the text of the steps of plan that match no command.
+    """
+    return [step.text for step in plan if step.match is None]
+
+
+def needs_window(plan, position, resources):
+    """
+    True if a step after position drives the keyboard, so an application
+    opened at position must be up before it runs. resources maps intent
+    names to their resources, like IntentMatcher.resources.
+    """
+    return any(KEYBOARD[0] in resources.get(step.match.name, ()) for step in plan[position + 1:])
+
+
+def describe_plan(plan):
+    """
+    Returns the plan as "open_app -> type_text -> save", for the console.
+    Steps that match no command show as "?".
+    """
+    return " -> ".join(step.match.name if step.match else "?" for step in plan)
@@ -0,0 +1,170 @@
+import threading
+import time
+
+from lazy import lazy_import
+
+psutil = lazy_import("psutil")
+
+# Background processes that are never worth reading out as "open applications"
+SYSTEM_PROCESSES = {'svchost', 'system', 'registry', 'csrss', 'winlogon', 'services'}
+
+
+class ProcessSnapshot:
+    """
+    The running processes at one point in time, indexed by name.
+    """
+
+    def __init__(self, processes, taken_at=None):
+        self.taken_at = time.monotonic() if taken_at is None else taken_at
+        # lowercase name -> pids, and unique names in first-seen order
+        self.pids_by_name = {}
+        self.names = []
+        for pid, name in processes:
+            if not name:
+                continue
+            key = name.lower()
+            if key not in self.pids_by_name:
+                self.pids_by_name[key] = []
+                self.names.append(name)
+            self.pids_by_name[key].append(pid)
+
+    @property
+    def age(self):
+        """
+        Seconds since the snapshot was taken.
+        """
+        return time.monotonic() - self.taken_at
+
+    def find(self, app_name):
+        """
+        Returns the pids of the processes whose name contains app_name.
+        Exact names ("chrome" or "chrome.exe") come first.
+        """
+        query = app_name.lower().strip()
+        if not query:
+            return []
+        for exact in (query, query + ".exe"):
+            if exact in self.pids_by_name:
+                return list(self.pids_by_name[exact])
+        pids = []
+        for name, name_pids in self.pids_by_name.items():
+            if query in name:
+                pids.extend(name_pids)
+        return pids
+
+    def applications(self, exclude=SYSTEM_PROCESSES):
+        """
+        Returns the unique names of running executables without the .exe suffix.
+        """
+        return [
+            name[:-4] for name in self.names
+            if name.lower().endswith('.exe') and name[:-4].lower() not in exclude
+        ]
+
+
+class ProcessTable:
+    """
+    Keeps a process snapshot refreshed in the background so close, switch
+    and list commands answer from memory instead of walking every process.
+    The background refresh starts on first use unless start() is called.
+    """
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts refreshing the snapshot every interval seconds.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background refresh thread.
+        """
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing process table: {e}")
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        """
+        Takes a new snapshot of the running processes and returns it.
+        """
+        processes = []
+        for proc in psutil.process_iter(['pid', 'name']):
+            try:
+                processes.append((proc.info['pid'], proc.info['name']))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        snapshot = ProcessSnapshot(processes)
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self, max_age=None):
+        """
+        Returns the current snapshot, taking a fresh one first if there is
+        none yet or it is older than max_age seconds.
+        """
+        if self._thread is None and not self._stop.is_set():
+            self.start()
+        snapshot = self._snapshot
+        if snapshot is None or (max_age is not None and snapshot.age > max_age):
+            snapshot = self.refresh()
+        return snapshot
+
+    def find(self, app_name):
+        """
+        Returns (pids, snapshot age) for app_name. A miss on a snapshot older
+        than the refresh interval is retried once on a fresh snapshot, since
+        the application may have started after it was taken.
+        """
+        snapshot = self.snapshot()
+        pids = snapshot.find(app_name)
+        if not pids and snapshot.age > self.interval / 2:
+            snapshot = self.refresh()
+            pids = snapshot.find(app_name)
+        return pids, snapshot.age
+
+    def wait_for(self, app_name, timeout, exclude=(), poll=0.2):
+        """
+        Waits up to timeout seconds for a process matching app_name whose
+        pid isn't in exclude (those running before it was launched).
+        Returns its pids, or [] if none appeared.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            pids = [pid for pid in self.refresh().find(app_name) if pid not in exclude]
+            if pids or time.monotonic() >= deadline:
+                return pids
+            time.sleep(poll)
+
+    def terminate(self, app_name):
+        """
+        Terminates the first running process matching app_name.
+        Returns True if one was terminated.
+        """
+        pids, _ = self.find(app_name)
+        for pid in pids:
+            try:
+                psutil.Process(pid).terminate()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            # The snapshot still lists the process; take a new one next time
+            with self._lock:
+                self._snapshot = None
+            return True
+        return False
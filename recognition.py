@@ -0,0 +1,229 @@
+import importlib.util
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from lazy import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+# "busy" counts phrases a backend sat out because its earlier calls were still running
+OUTCOMES = ("wins", "results", "no_match", "errors", "cancelled", "busy")
+
+
+class Backend:
+    """
+    One speech recognizer. recognize(audio) returns text or (text,
+    confidence) and raises speech_recognition errors; text without a
+    confidence counts as default_confidence.
+    """
+
+    def __init__(self, name, recognize, default_confidence=0.5):
+        self.name = name
+        self.recognize = recognize
+        self.default_confidence = default_confidence
+
+    def __call__(self, audio):
+        result = self.recognize(audio)
+        if isinstance(result, tuple):
+            text, confidence = result
+            return text, self.default_confidence if confidence is None else confidence
+        return result, self.default_confidence
+
+
+def google_backend(get_recognizer, timeout=5.0):
+    """
+    Google's Web Speech API. get_recognizer returns the sr.Recognizer
+    (called per request, so it can be created lazily); its socket
+    timeout is set so an abandoned request doesn't hold a worker forever.
+    The default is HedgedRecognizer's deadline, after which an answer
+    would be dropped anyway.
+    """
+    def recognize(audio):
+        recognizer = get_recognizer()
+        if recognizer.operation_timeout is None:
+            recognizer.operation_timeout = timeout
+        return recognizer.recognize_google(audio, with_confidence=True)
+    return Backend("google", recognize)
+
+
+def sphinx_backend(get_recognizer):
+    """
+    Offline CMU Sphinx (pip install pocketsphinx). It reports no usable
+    confidence and is less accurate, so it wins only when nothing better
+    arrives by the deadline.
+    """
+    return Backend("sphinx", lambda audio: get_recognizer().recognize_sphinx(audio), default_confidence=0.3)
+
+
+BACKENDS = {
+    "google": google_backend,
+    "sphinx": sphinx_backend,
+}
+
+
+def default_backends(get_recognizer, names=None):
+    """
+    Returns the backends named in CHANAKYA_RECOGNIZERS (comma separated),
+    or Google plus Sphinx when pocketsphinx is installed.
+    """
+    if names is None:
+        configured = os.environ.get("CHANAKYA_RECOGNIZERS")
+        if configured:
+            names = [name.strip() for name in configured.split(",") if name.strip()]
+        else:
+            names = ["google"]
+            if importlib.util.find_spec("pocketsphinx") is not None:
+                names.append("sphinx")
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"unknown recognizer {unknown[0]!r}; use one of {', '.join(BACKENDS)}")
+    return [BACKENDS[name](get_recognizer) for name in names]
+
+
+class HedgedRecognizer:
+    """
+    Sends each phrase to several recognizers at once and returns the
+    first transcript with at least threshold confidence.
+
+    If none is that sure, the most confident transcript received by the
+    deadline (seconds) wins, so a slow or failing cloud service falls
+    back to a local engine instead of losing the command. When a winner
+    is chosen the other requests are cancelled: queued ones never start
+    and the results of running ones are dropped. A backend with
+    max_in_flight calls still running sits the next phrases out, so a
+    hung service can't take the workers of the others.
+
+    Per-backend latencies go to metrics as recognition_<name>, and
+    stats() reports latency percentiles and how often each backend won.
+    """
+
+    def __init__(self, backends, threshold=0.5, deadline=5.0, metrics=None, history=200, max_in_flight=2):
+        if not backends:
+            raise ValueError("at least one recognition backend is needed")
+        self.backends = list(backends)
+        self.threshold = threshold
+        self.deadline = deadline
+        self.metrics = metrics
+        self.max_in_flight = max_in_flight
+        # Abandoned requests may still be running, so leave room for a new
+        # round; with each backend capped, every one always has a worker
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight * len(self.backends),
+                                        thread_name_prefix="recognition")
+        self._lock = threading.Lock()
+        self._in_flight = {backend.name: 0 for backend in self.backends}
+        self._latencies = {backend.name: deque(maxlen=history) for backend in self.backends}
+        self._counts = {backend.name: dict.fromkeys(OUTCOMES, 0) for backend in self.backends}
+        self.calls = 0
+        self.deadlines_missed = 0
+
+    def recognize(self, audio):
+        """
+        Returns the transcript for audio (sr.AudioData). Raises
+        sr.UnknownValueError if no backend heard words, or sr.RequestError
+        if they all failed or none answered by the deadline.
+        """
+        cancelled = threading.Event()
+        with self._lock:
+            self.calls += 1
+            ready = []
+            for backend in self.backends:
+                if self._in_flight[backend.name] < self.max_in_flight:
+                    self._in_flight[backend.name] += 1
+                    ready.append(backend)
+                else:
+                    self._counts[backend.name]["busy"] += 1
+        if not ready:
+            raise sr.RequestError("every recognizer is still busy with earlier phrases")
+        futures = {}
+        for backend in ready:
+            future = self._pool.submit(self._run, backend, audio, cancelled)
+            # Also called for calls cancelled before they started
+            future.add_done_callback(lambda future, name=backend.name: self._release(name))
+            futures[future] = backend
+        deadline = time.perf_counter() + self.deadline
+        pending = set(futures)
+        best = None
+        errors = []
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.perf_counter()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    with self._lock:
+                        self.deadlines_missed += 1
+                    break
+                for future in done:
+                    try:
+                        text, confidence = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    if best is None or confidence > best[1]:
+                        best = (text, confidence, futures[future])
+                if best is not None and best[1] >= self.threshold:
+                    break
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+
+        if best is not None:
+            with self._lock:
+                self._counts[best[2].name]["wins"] += 1
+            return best[0]
+        failures = [e for e in errors if not isinstance(e, sr.UnknownValueError)]
+        if failures:
+            raise failures[0]
+        if errors and not pending:
+            raise errors[0]
+        raise sr.RequestError(f"no recognizer answered within {self.deadline:g} s")
+
+    def _release(self, name):
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def _run(self, backend, audio, cancelled):
+        start = time.perf_counter()
+        outcome = "results"
+        try:
+            return backend(audio)
+        except sr.UnknownValueError:
+            outcome = "no_match"
+            raise
+        except Exception as e:
+            outcome = "errors"
+            if self.metrics is not None:
+                self.metrics.error(f"recognition_{backend.name}", e)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            if cancelled.is_set():
+                outcome = "cancelled"
+            with self._lock:
+                self._latencies[backend.name].append(seconds)
+                self._counts[backend.name][outcome] += 1
+            if self.metrics is not None:
+                self.metrics.observe(f"recognition_{backend.name}", seconds)
+
+    def stats(self):
+        """
+        Returns {backend: {"wins", "win_rate", "results", "no_match",
+        "errors", "cancelled", "busy", "p50_ms", "p95_ms"}}, plus totals
+        under "all".
+        """
+        with self._lock:
+            latencies = {name: sorted(values) for name, values in self._latencies.items()}
+            counts = {name: dict(row) for name, row in self._counts.items()}
+            calls, missed = self.calls, self.deadlines_missed
+        stats = {}
+        for name, row in counts.items():
+            values = latencies[name]
+            row["win_rate"] = round(row["wins"] / calls, 3) if calls else None
+            row["p50_ms"] = round(values[len(values) // 2] * 1000, 1) if values else None
+            row["p95_ms"] = round(values[int(len(values) * 0.95)] * 1000, 1) if values else None
+            stats[name] = row
+        stats["all"] = {"calls": calls, "deadlines_missed": missed}
+        return stats
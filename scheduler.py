@@ -0,0 +1,126 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class SchedulerBusy(Exception):
+    """
+    Raised when a request can't be admitted. retry_after is a hint in seconds.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__(f"Assistant is busy, try again in {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the value at fraction (0..1) of an already sorted list, or None.
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class RequestScheduler:
+    """
+    Admission control in front of the assistant.
+
+    At most `workers` requests run at once. A request also names the
+    exclusive resources it uses ("microphone", "keyboard", ...) and waits
+    until none of them is held by a running request, so two captures never
+    share the microphone while text-only commands run side by side.
+
+    At most `max_waiting` requests wait for a slot; beyond that, or after
+    waiting `wait_timeout` seconds, run() raises SchedulerBusy.
+    """
+
+    def __init__(self, workers=4, max_waiting=8, wait_timeout=10.0, max_samples=200):
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._held = set()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Seconds spent queued and running, most recent last
+        self.wait_times = deque(maxlen=max_samples)
+        self.run_times = deque(maxlen=max_samples)
+
+    def run(self, fn, resources=(), force=False):
+        """
+        Runs fn once a slot and all its resources are free and returns its result.
+
+        force skips the queue limit (not the resource wait); it is meant for
+        the later stages of a request that was already admitted once.
+        """
+        resources = frozenset(resources)
+        queued_at = time.monotonic()
+        with self._cond:
+            if not self._can_run(resources):
+                if self._waiting >= self.max_waiting and not force:
+                    self.rejected += 1
+                    raise SchedulerBusy(self._retry_after())
+                self._waiting += 1
+                try:
+                    deadline = queued_at + self.wait_timeout
+                    while not self._can_run(resources):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            raise SchedulerBusy(self._retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._running += 1
+            self._held |= resources
+            self.admitted += 1
+            self.wait_times.append(time.monotonic() - queued_at)
+
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._held -= resources
+                self.run_times.append(time.monotonic() - started)
+                self._cond.notify_all()
+
+    def _can_run(self, resources):
+        return self._running < self.workers and self._held.isdisjoint(resources)
+
+    def _retry_after(self):
+        # Time for the queue ahead to drain at the recent average run time
+        average = sum(self.run_times) / len(self.run_times) if self.run_times else 1.0
+        return max(1, math.ceil(average * (self._waiting + 1) / self.workers))
+
+    def stats(self):
+        """
+        Returns queue depth, held resources, counters and wait/run times in milliseconds.
+        """
+        with self._cond:
+            waits = sorted(self.wait_times)
+            runs = sorted(self.run_times)
+            stats = {
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "workers": self.workers,
+                "max_waiting": self.max_waiting,
+                "held_resources": sorted(self._held),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+        for name, values in (("wait", waits), ("run", runs)):
+            for label, fraction in (("p50", 0.5), ("p95", 0.95)):
+                value = percentile(values, fraction)
+                stats[f"{name}_ms_{label}"] = round(value * 1000, 1) if value is not None else None
+            stats[f"{name}_ms_max"] = round(values[-1] * 1000, 1) if values else None
+        return stats
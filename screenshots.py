@@ -0,0 +1,238 @@
+import datetime
+import io
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from calc import TENS, UNITS
+from lazy import lazy_import
+
+pyautogui = lazy_import("pyautogui")
+
+# format name -> (Pillow format, file extension)
+FORMATS = {
+    "png": ("PNG", ".png"),
+    "jpeg": ("JPEG", ".jpg"),
+    "jpg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+}
+
+PHASES = ("capture", "encode", "save")
+
+# A number in digits or words: "5", "2.5", "five", "twenty five"
+NUMBER = r"\d+(?:\.\d+)?|(?:%s)(?:[ -](?:%s))?|%s" % (
+    "|".join(TENS), "|".join(word for word, value in UNITS.items() if 0 < value < 10), "|".join(UNITS))
+
+# The count and the interval are read from their own spans, so the 2 in
+# "take screenshots every 2 seconds" is not taken for the count
+COUNT_PATTERN = re.compile(r"\b(%s) (?:screen ?shots|shots)\b" % NUMBER)
+INTERVAL_PATTERN = re.compile(r"\bevery (?:(%s) )?seconds?\b" % NUMBER)
+
+# Bounds of the interval between burst frames, in seconds
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 60.0
+
+# Seconds a burst may overrun its schedule before it counts as hung
+BURST_MARGIN = 10.0
+
+
+def default_directory():
+    """
+    Returns where screenshots are saved: CHANAKYA_SCREENSHOT_DIR, or the Desktop.
+    """
+    return Path(os.environ.get("CHANAKYA_SCREENSHOT_DIR", Path.home() / "Desktop"))
+
+
+def parse_number(text):
+    """
+    Returns the value of a NUMBER match: 5.0 for "5" or "five", 25.0 for "twenty five".
+    """
+    if text[0].isdigit():
+        return float(text)
+    return float(sum(UNITS.get(word, 0) + TENS.get(word, 0) for word in re.split(r"[ -]", text)))
+
+
+def parse_burst_count(text, default=5, maximum=50):
+    """
+    Returns the N in "take N screenshots", or default.
+    """
+    found = COUNT_PATTERN.search(text.lower())
+    return max(1, min(maximum, int(parse_number(found.group(1))))) if found else default
+
+
+def parse_interval(text, default=1.0):
+    """
+    Returns the seconds in "every 2 seconds" / "every two seconds" (1 for
+    "every second"), between MIN_INTERVAL and MAX_INTERVAL, or default.
+    """
+    found = INTERVAL_PATTERN.search(text.lower())
+    if found is None:
+        return default
+    seconds = parse_number(found.group(1)) if found.group(1) else 1.0
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, seconds))
+
+
+class Shot:
+    """
+    One screenshot: captured right away, encoded and saved by the worker pool.
+    timings holds milliseconds per phase as they finish.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.timings = {}
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def name(self):
+        return self.path.name
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the file is saved; returns the path, or None on timeout.
+        Raises the error if encoding or saving failed.
+        """
+        if not self._done.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.path
+
+
+class ScreenshotSaver:
+    """
+    Takes screenshots without making the caller wait for the encode.
+
+    The screen is grabbed in the calling thread (that has to happen now);
+    encoding (PNG, JPEG or WebP) and writing the file run in a small pool
+    of worker threads, where Pillow's encoders release the GIL. Phase
+    times go to metrics as screenshot_capture / screenshot_encode /
+    screenshot_save, and the recent ones are kept for stats().
+
+    compress_level (0-9) applies to PNG, quality (1-100) to JPEG and WebP.
+    """
+
+    def __init__(self, directory=None, format=None, compress_level=6, quality=90, workers=2,
+                 grab=None, metrics=None, history=100):
+        self.directory = Path(directory) if directory is not None else default_directory()
+        self.format = (format or os.environ.get("CHANAKYA_SCREENSHOT_FORMAT", "png")).lower()
+        if self.format not in FORMATS:
+            raise ValueError(f"unsupported screenshot format {self.format!r}; use one of {', '.join(FORMATS)}")
+        self.compress_level = compress_level
+        self.quality = quality
+        self.metrics = metrics
+        # Overridable for tests and benchmarks: returns a PIL image of the screen
+        self.grab = grab or (lambda: pyautogui.screenshot())
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshot")
+        self._lock = threading.Lock()
+        self._timings = {phase: deque(maxlen=history) for phase in PHASES}
+        self._names = set()
+
+    def _path(self, now):
+        """
+        Returns a new file path: screenshot_20251224_143000.png, with a
+        counter when several are taken in the same second (bursts).
+        """
+        _, extension = FORMATS[self.format]
+        stem = f"screenshot_{now.strftime('%Y%m%d_%H%M%S')}"
+        with self._lock:
+            name = f"{stem}{extension}"
+            counter = 1
+            while name in self._names or (self.directory / name).exists():
+                counter += 1
+                name = f"{stem}_{counter}{extension}"
+            self._names.add(name)
+        return self.directory / name
+
+    def capture(self):
+        """
+        Grabs the screen and queues it for saving. Returns the Shot at once.
+        """
+        start = time.perf_counter()
+        image = self.grab()
+        shot = Shot(self._path(datetime.datetime.now()))
+        self._record(shot, "capture", time.perf_counter() - start)
+        self._pool.submit(self._save, shot, image)
+        return shot
+
+    def burst(self, count, interval=1.0):
+        """
+        Captures count frames, one every interval seconds (on a fixed
+        schedule, so slow grabs don't stretch the burst). Returns the Shots.
+        """
+        shots = []
+        started = time.monotonic()
+        for index in range(count):
+            delay = started + index * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            shots.append(self.capture())
+        return shots
+
+    def _save(self, shot, image):
+        try:
+            pillow_format, _ = FORMATS[self.format]
+            start = time.perf_counter()
+            if pillow_format == "PNG":
+                options = {"compress_level": self.compress_level}
+            else:
+                options = {"quality": self.quality}
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, pillow_format, **options)
+            self._record(shot, "encode", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path = shot.path.with_name(shot.path.name + ".tmp")
+            with open(temp_path, "wb") as f:
+                f.write(buffer.getbuffer())
+            os.replace(temp_path, shot.path)
+            self._record(shot, "save", time.perf_counter() - start)
+        except Exception as e:
+            shot.error = e
+            print(f"Error saving screenshot {shot.name}: {e}")
+            if self.metrics is not None:
+                self.metrics.error("screenshot", e)
+        finally:
+            with self._lock:
+                self._names.discard(shot.name)
+            shot._done.set()
+
+    def _record(self, shot, phase, seconds):
+        shot.timings[phase] = round(seconds * 1000, 1)
+        with self._lock:
+            self._timings[phase].append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe(f"screenshot_{phase}", seconds)
+
+    def stats(self):
+        """
+        Returns {phase: {"count", "p50_ms", "max_ms"}} over recent screenshots.
+        """
+        with self._lock:
+            timings = {phase: sorted(values) for phase, values in self._timings.items()}
+        return {
+            phase: {
+                "count": len(values),
+                "p50_ms": round(values[len(values) // 2] * 1000, 1) if values else None,
+                "max_ms": round(values[-1] * 1000, 1) if values else None,
+            }
+            for phase, values in timings.items()
+        }
+
+    def close(self, wait=True):
+        """
+        Stops the workers; with wait, after the queued screenshots are saved.
+        """
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,13 @@
+import os
+from pathlib import Path
+
+# Where the assistant keeps its indexes and caches between runs
+DATA_DIR = Path(os.environ.get("CHANAKYA_HOME", Path.home() / ".chanakya"))
+
+
+def data_path(name):
+    """
+    Returns the path of a file inside the data directory, creating the directory.
+    """
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return DATA_DIR / name
@@ -0,0 +1,272 @@
+import itertools
+import queue
+import threading
+import time
+
+# Lower numbers are spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class Pyttsx3Backend:
+    """
+    Speaks through a pyttsx3 engine.
+
+    The engine is created by open() on the speech thread, because SAPI5 and
+    the other drivers expect to be driven from the thread that created them.
+    """
+
+    def __init__(self, rate=180, voice=None):
+        self.rate = rate
+        self.voice = voice
+        self.engine = None
+        self._interrupt = None
+
+    def open(self):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', self.rate)
+        if self.voice is not None:
+            self.engine.setProperty('voice', self.voice)
+        # Checked at every word so a cancel cuts the sentence short
+        self.engine.connect('started-word', self._on_word)
+
+    def _on_word(self, name, location, length):
+        if self._interrupt is not None and self._interrupt.is_set():
+            self.engine.stop()
+
+    def say(self, text, interrupt):
+        self._interrupt = interrupt
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+    def close(self):
+        self.engine = None
+
+
+class FakeBackend:
+    """
+    Records what would have been spoken instead of producing audio.
+    Each utterance takes seconds_per_char so interruption can be exercised.
+    """
+
+    def __init__(self, seconds_per_char=0.0):
+        self.seconds_per_char = seconds_per_char
+        self.spoken = []
+        self.interrupted = []
+
+    def open(self):
+        pass
+
+    def say(self, text, interrupt):
+        if interrupt.wait(self.seconds_per_char * len(text)):
+            self.interrupted.append(text)
+        else:
+            self.spoken.append(text)
+
+    def close(self):
+        pass
+
+
+class Utterance:
+    """
+    One queued sentence. done is set once it was spoken, cancelled or dropped.
+    tag is any caller-supplied label, e.g. the request the reply belongs to.
+    """
+
+    def __init__(self, text, priority, generation, tag=None):
+        self.text = text
+        self.priority = priority
+        self.generation = generation
+        self.tag = tag
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        self.status = "queued"
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    @property
+    def speaking_time(self):
+        """
+        Seconds spent speaking, or None if it never started.
+        """
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def finish(self, status):
+        self.status = status
+        self.finished_at = time.monotonic()
+        self.done.set()
+
+
+class SpeechQueue:
+    """
+    Speaks queued sentences on a dedicated thread.
+
+    say() returns immediately unless asked to wait. The queue is bounded and
+    ordered by priority; cancel() drops everything pending and interrupts
+    the sentence being spoken, so a new command can barge in.
+    """
+
+    def __init__(self, backend=None, maxsize=16):
+        self.backend = backend if backend is not None else Pyttsx3Backend()
+        self._queue = queue.PriorityQueue(maxsize)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current = None
+        self._pending = 0
+        self._interrupt = threading.Event()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = None
+
+        # Optional callback on_status(utterance), called when an utterance
+        # starts speaking and again when it is finished (spoken, cancelled, ...)
+        self.on_status = None
+
+    def start(self, wait=True):
+        """
+        Starts the speech thread and waits until the backend is open.
+        Raises the backend's error if it could not be opened.
+
+        With wait=False it returns at once; text queued before the backend
+        is open is spoken once it is, or fails if it can't be opened.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        if wait:
+            self._ready.wait()
+            if self._error is not None:
+                raise self._error
+        return self
+
+    @property
+    def is_speaking(self):
+        """
+        True while a sentence is being spoken or waiting to be.
+        """
+        return self._pending > 0
+
+    def say(self, text, priority=PRIORITY_NORMAL, wait=False, interrupt=False, tag=None):
+        """
+        Queues text and returns its Utterance.
+
+        interrupt cancels whatever is being said first; wait blocks until
+        the text has been spoken (or cancelled). When the queue is full the
+        text is dropped rather than blocking the caller.
+        """
+        if interrupt:
+            self.cancel()
+        with self._lock:
+            utterance = Utterance(text, priority, self._generation, tag)
+            self._pending += 1
+        try:
+            self._queue.put_nowait((priority, next(self._order), utterance))
+        except queue.Full:
+            print(f"Speech queue full, dropping: {text}")
+            self._finish(utterance, "dropped")
+        if wait:
+            utterance.wait()
+        return utterance
+
+    def cancel(self):
+        """
+        Drops every pending sentence and interrupts the current one.
+        """
+        with self._lock:
+            self._generation += 1
+            if self._current is not None:
+                self._interrupt.set()
+
+    def wait_idle(self, timeout=None):
+        """
+        Blocks until nothing is being spoken or queued. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_speaking:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        """
+        Cancels pending speech and stops the speech thread.
+        """
+        self.cancel()
+        if self._thread is not None:
+            self._queue.put((PRIORITY_HIGH, -1, None))
+
+    def _finish(self, utterance, status):
+        with self._lock:
+            self._pending -= 1
+        utterance.finish(status)
+        self._notify(utterance)
+
+    def _notify(self, utterance):
+        if self.on_status is not None:
+            try:
+                self.on_status(utterance)
+            except Exception as e:
+                print(f"Error in speech status callback: {e}")
+
+    def _run(self):
+        try:
+            self.backend.open()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            print(f"Error initializing TTS engine: {e}")
+            # Nothing can be spoken; fail whatever is queued so no caller waits forever
+            while True:
+                _, _, utterance = self._queue.get()
+                if utterance is None:
+                    return
+                self._finish(utterance, "failed")
+        self._ready.set()
+
+        # Backends may have background work (e.g. prewarming a cache) that
+        # runs one step at a time whenever nothing is waiting to be spoken
+        idle = getattr(self.backend, "idle", None)
+        busy = idle is not None
+        while True:
+            try:
+                _, _, utterance = self._queue.get(block=not busy)
+            except queue.Empty:
+                try:
+                    busy = idle()
+                except Exception as e:
+                    print(f"Error in speech backend: {e}")
+                    busy = False
+                continue
+            if utterance is None:
+                break
+            with self._lock:
+                stale = utterance.generation != self._generation
+                if not stale:
+                    self._current = utterance
+                    self._interrupt.clear()
+            if stale:
+                self._finish(utterance, "cancelled")
+                continue
+            utterance.status = "speaking"
+            utterance.started_at = time.monotonic()
+            self._notify(utterance)
+            try:
+                self.backend.say(utterance.text, self._interrupt)
+                status = "interrupted" if self._interrupt.is_set() else "spoken"
+            except Exception as e:
+                print(f"Error during speech: {e}")
+                status = "failed"
+            with self._lock:
+                self._current = None
+            self._finish(utterance, status)
+
+        self.backend.close()
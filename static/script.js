@@ -1,7 +1,9 @@
 let isListening = false;
+// Id of the request this page is waiting on; events for other requests are ignored
+let activeRequest = null;
 
 const voiceBtn = document.getElementById('voiceBtn');
-const sendBtn = document.getElementById('sendBtn');
+const sendBtn = document.getElementById('executeBtn');
 const textInput = document.getElementById('textInput');
 const responseBox = document.getElementById('responseBox');
 const statusDot = document.getElementById('statusDot');
@@ -9,11 +11,75 @@ const statusText = document.getElementById('statusText');
 const avatarCircle = document.getElementById('avatarCircle');
 const soundWaves = document.getElementById('soundWaves');
 const micIcon = document.getElementById('micIcon');
+const suggestionList = document.getElementById('commandSuggestions');
+
+// Status shown for each stage event pushed by the server
+const STAGES = {
+    queued: 'Waiting',
+    listening: 'Listening',
+    speech_detected: 'Hearing you',
+    recognizing: 'Recognizing',
+    executing: 'Working',
+    speaking: 'Speaking',
+};
+
+function newRequestId() {
+    return Date.now().toString(36) + Math.random().toString(36).slice(2, 8);
+}
+
+// Server-pushed progress, so the page shows each stage as it happens
+// instead of waiting for the whole /listen round trip
+const events = new EventSource('/events');
+
+Object.keys(STAGES).forEach((stage) => {
+    events.addEventListener(stage, (e) => {
+        const event = JSON.parse(e.data);
+        if (event.request !== activeRequest) return;
+        statusText.textContent = STAGES[stage];
+        if (stage === 'speech_detected') {
+            responseBox.innerHTML = '<p class="greeting">🎤 Hearing you...</p>';
+        } else if (stage === 'recognizing') {
+            responseBox.innerHTML = '<p class="greeting">🧠 Recognizing...</p>';
+        } else if (stage === 'executing') {
+            showProcessing(event.command);
+        }
+    });
+});
+
+events.addEventListener('transcript', (e) => {
+    const event = JSON.parse(e.data);
+    if (event.request !== activeRequest) return;
+    showProcessing(event.text);
+});
+
+events.addEventListener('result', (e) => {
+    const event = JSON.parse(e.data);
+    if (event.request !== activeRequest) return;
+    if (isListening) stopListening();
+    displayResponse(event.result);
+});
+
+// Key presses and launches finish after the reply; only failures are shown
+events.addEventListener('action', (e) => {
+    const event = JSON.parse(e.data);
+    if (event.request !== activeRequest || event.state === 'done') return;
+    const line = document.createElement('p');
+    line.className = 'response';
+    line.textContent = `⚠️ ${event.name.replace(/_/g, ' ')} ${event.state.replace('_', ' ')}: ${event.error}`;
+    responseBox.appendChild(line);
+});
+
+events.addEventListener('spoken', (e) => {
+    const event = JSON.parse(e.data);
+    if (event.request !== activeRequest || isListening) return;
+    statusText.textContent = 'Ready';
+});
 
 // Voice button click
 voiceBtn.addEventListener('click', async () => {
     if (isListening) return;
     
+    activeRequest = newRequestId();
     startListening();
     
     try {
@@ -21,12 +87,17 @@ voiceBtn.addEventListener('click', async () => {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
-            }
+            },
+            body: JSON.stringify({ request_id: activeRequest })
         });
         
         const data = await response.json();
-        stopListening();
-        displayResponse(data);
+        if (isListening) stopListening();
+        if (response.status === 429) {
+            displayError(data.response);
+        } else {
+            displayResponse(data);
+        }
     } catch (error) {
         stopListening();
         displayError('Error connecting to assistant. Please try again.');
@@ -45,11 +116,58 @@ textInput.addEventListener('keypress', (e) => {
     }
 });
 
+// Autocomplete from past commands: one /suggest request once typing
+// pauses, an in-flight request is dropped when a newer one starts, and
+// answers are reused for prefixes already seen
+const SUGGEST_DELAY_MS = 120;
+const suggestionCache = new Map();
+let suggestTimer = null;
+let suggestController = null;
+
+textInput.addEventListener('input', () => {
+    clearTimeout(suggestTimer);
+    const prefix = textInput.value;
+    if (!prefix.trim()) {
+        showSuggestions([]);
+        return;
+    }
+    if (suggestionCache.has(prefix)) {
+        showSuggestions(suggestionCache.get(prefix));
+        return;
+    }
+    suggestTimer = setTimeout(() => fetchSuggestions(prefix), SUGGEST_DELAY_MS);
+});
+
+async function fetchSuggestions(prefix) {
+    suggestController?.abort();
+    suggestController = new AbortController();
+    try {
+        const response = await fetch(`/suggest?q=${encodeURIComponent(prefix)}`, { signal: suggestController.signal });
+        const data = await response.json();
+        suggestionCache.set(prefix, data.suggestions);
+        if (textInput.value === prefix) showSuggestions(data.suggestions);
+    } catch (error) {
+        // Aborted by newer input, or the server is busy; keep the old list
+    }
+}
+
+function showSuggestions(suggestions) {
+    suggestionList.replaceChildren(...suggestions.map((command) => {
+        const option = document.createElement('option');
+        option.value = command;
+        return option;
+    }));
+}
+
 // Execute command function
 async function executeCommand(command) {
     if (!command.trim()) return;
     
     textInput.value = '';
+    showSuggestions([]);
+    // The command is now in the history, so cached suggestions are stale
+    suggestionCache.clear();
+    activeRequest = newRequestId();
     showProcessing(command);
     
     try {
@@ -58,11 +176,15 @@ async function executeCommand(command) {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ command: command })
+            body: JSON.stringify({ command: command, request_id: activeRequest })
         });
         
         const data = await response.json();
-        displayResponse(data);
+        if (response.status === 429) {
+            displayError(data.response);
+        } else {
+            displayResponse(data);
+        }
     } catch (error) {
         displayError('Error executing command. Please try again.');
     }
@@ -75,8 +197,8 @@ function startListening() {
     statusDot.classList.add('listening');
     statusText.textContent = 'Listening';
     avatarCircle.classList.add('active');
-    soundWaves.classList.add('active');
-    micIcon.className = 'fas fa-circle-notch fa-spin';
+    soundWaves?.classList.add('active');
+    if (micIcon) micIcon.className = 'fas fa-circle-notch fa-spin';
     
     responseBox.innerHTML = '<p class="greeting">🎤 Listening to your command...</p>';
 }
@@ -88,8 +210,8 @@ function stopListening() {
     statusDot.classList.remove('listening');
     statusText.textContent = 'Ready';
     avatarCircle.classList.remove('active');
-    soundWaves.classList.remove('active');
-    micIcon.className = 'fas fa-microphone';
+    soundWaves?.classList.remove('active');
+    if (micIcon) micIcon.className = 'fas fa-microphone';
 }
 
 function showProcessing(command) {
@@ -0,0 +1,253 @@
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+from lazy import lazy_import
+
+psutil = lazy_import("psutil")
+
+# One reading. at is time.monotonic() (for windows), time is the wall clock
+# (for JSON); percentages are 0-100, disk I/O in bytes per second, and the
+# battery fields are None on machines without one.
+Sample = namedtuple("Sample", (
+    "at", "time", "cpu", "per_core", "memory", "memory_used", "memory_total",
+    "disk", "disk_read", "disk_write", "battery", "plugged",
+))
+
+AVERAGED = ("cpu", "memory", "disk", "disk_read", "disk_write", "battery")
+
+
+def default_disk():
+    """
+    Returns the disk to report on: the system drive on Windows, / elsewhere.
+    """
+    return os.environ.get("SystemDrive", "C:") + "\\" if os.name == "nt" else "/"
+
+
+class SystemMonitor:
+    """
+    Samples CPU (overall and per core), memory, disk and battery every
+    interval seconds on a background thread and keeps the last history
+    samples, so questions are answered from memory instead of blocking
+    on psutil.cpu_percent(interval=1).
+
+    The battery is read every battery_interval seconds (it is the slow
+    call on some systems). Sampling starts on first use unless start()
+    is called; the first reading takes about prime seconds.
+    """
+
+    def __init__(self, interval=1.0, history=300, battery_interval=30.0, disk_path=None, prime=0.25):
+        self.interval = interval
+        self.battery_interval = battery_interval
+        self.disk_path = disk_path or default_disk()
+        self.prime = prime
+        self._samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._error = None
+        self._last_io = None
+        self._battery = (None, None)
+        self._battery_read_at = None
+
+    def start(self):
+        """
+        Starts sampling in the background.
+        """
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            # cpu_percent measures since the previous call, so the first one only sets the baseline
+            psutil.cpu_percent(percpu=True)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            print(f"System monitoring unavailable: {e}")
+            return
+        self._stop.wait(self.prime)
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                self._error = e
+                print(f"Error sampling system telemetry: {e}")
+            self._ready.set()
+            self._stop.wait(self.interval)
+
+    def sample(self):
+        """
+        Takes one reading, adds it to the history and returns it.
+        """
+        now = time.monotonic()
+        per_core = tuple(psutil.cpu_percent(percpu=True))
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        disk_read = disk_write = None
+        io = psutil.disk_io_counters()
+        if io is not None:
+            if self._last_io is not None:
+                last_at, last = self._last_io
+                elapsed = max(now - last_at, 1e-6)
+                disk_read = (io.read_bytes - last.read_bytes) / elapsed
+                disk_write = (io.write_bytes - last.write_bytes) / elapsed
+            self._last_io = (now, io)
+
+        if self._battery_read_at is None or now - self._battery_read_at >= self.battery_interval:
+            battery = psutil.sensors_battery() if hasattr(psutil, "sensors_battery") else None
+            self._battery = (battery.percent, battery.power_plugged) if battery else (None, None)
+            self._battery_read_at = now
+
+        sample = Sample(
+            at=now,
+            time=time.time(),
+            cpu=sum(per_core) / len(per_core) if per_core else 0.0,
+            per_core=per_core,
+            memory=memory.percent,
+            memory_used=memory.used,
+            memory_total=memory.total,
+            disk=disk.percent,
+            disk_read=disk_read,
+            disk_write=disk_write,
+            battery=self._battery[0],
+            plugged=self._battery[1],
+        )
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def latest(self, timeout=1.0):
+        """
+        Returns the newest Sample, waiting up to timeout seconds for the
+        first one. Raises the psutil error (e.g. ImportError) if sampling
+        can't work at all; returns None if there is no sample yet.
+        """
+        self.start()
+        self._ready.wait(timeout)
+        with self._lock:
+            if self._samples:
+                return self._samples[-1]
+        if self._error is not None:
+            raise self._error
+        return None
+
+    def window(self, seconds):
+        """
+        Returns the samples from the last seconds, oldest first.
+        """
+        cutoff = time.monotonic() - seconds
+        with self._lock:
+            return [sample for sample in self._samples if sample.at >= cutoff]
+
+    def average(self, field, seconds=60):
+        """
+        Returns (mean of field, seconds covered) over the last seconds, or
+        (None, 0) without at least two readings.
+        """
+        samples = [sample for sample in self.window(seconds) if getattr(sample, field) is not None]
+        if len(samples) < 2:
+            return None, 0
+        values = [getattr(sample, field) for sample in samples]
+        return sum(values) / len(values), samples[-1].at - samples[0].at
+
+    def snapshot(self, seconds=60):
+        """
+        Returns the current reading, averages and the samples of the last
+        seconds as a JSON-ready dict.
+        """
+        current = self.latest()
+        samples = self.window(seconds)
+        averages = {}
+        for field in AVERAGED:
+            value, _ = self.average(field, seconds)
+            averages[field] = round(value, 1) if value is not None else None
+        return {
+            "current": as_dict(current) if current is not None else None,
+            "averages": averages,
+            "window_s": round(samples[-1].at - samples[0].at, 1) if len(samples) > 1 else 0,
+            "interval_s": self.interval,
+            "samples": [as_dict(sample) for sample in samples],
+        }
+
+
+def as_dict(sample):
+    """
+    Returns a Sample as a dict without the monotonic clock, floats rounded.
+    """
+    row = sample._asdict()
+    del row["at"]
+    for key, value in row.items():
+        if isinstance(value, float):
+            row[key] = round(value, 1)
+    row["per_core"] = [round(value, 1) for value in sample.per_core]
+    return row
+
+
+def describe_span(seconds):
+    if seconds >= 50:
+        minutes = round(seconds / 60)
+        return "the last minute" if minutes == 1 else f"the last {minutes} minutes"
+    return f"the last {seconds:.0f} seconds"
+
+
+def describe_cpu(monitor, seconds=60):
+    """
+    Returns the spoken CPU answer, e.g. "CPU usage is at 23 percent,
+    18 percent on average over the last minute."
+    """
+    sample = monitor.latest()
+    if sample is None:
+        return None
+    reply = f"CPU usage is at {sample.cpu:.0f} percent"
+    average, span = monitor.average("cpu", seconds)
+    if average is not None and span >= 5:
+        reply += f", {average:.0f} percent on average over {describe_span(span)}"
+    reply += "."
+    if len(sample.per_core) > 1 and max(sample.per_core) >= sample.cpu + 25:
+        reply += f" The busiest core is at {max(sample.per_core):.0f} percent."
+    return reply
+
+
+def describe_memory(monitor):
+    """
+    Returns the spoken memory answer.
+    """
+    sample = monitor.latest()
+    if sample is None:
+        return None
+    used = sample.memory_used / 2 ** 30
+    total = sample.memory_total / 2 ** 30
+    return f"Memory usage is at {sample.memory:.0f} percent, {used:.1f} of {total:.1f} gigabytes."
+
+
+def describe_disk(monitor):
+    """
+    Returns the spoken disk answer.
+    """
+    sample = monitor.latest()
+    if sample is None:
+        return None
+    return f"The disk is {sample.disk:.0f} percent full."
+
+
+def describe_battery(monitor):
+    """
+    Returns the spoken battery answer.
+    """
+    sample = monitor.latest()
+    if sample is None:
+        return None
+    if sample.battery is None:
+        return "Battery information not available. You might be on a desktop."
+    plugged = "plugged in" if sample.plugged else "not plugged in"
+    return f"Battery is at {sample.battery:.0f} percent and {plugged}."
@@ -1,39 +1,163 @@
-import speech_recognition as sr
-import pyttsx3
 import datetime
+import queue
 import webbrowser
-import wikipediaapi
 import time
 import sys
 import os
 import subprocess
-import pyautogui
-import requests
-import json
 from pathlib import Path
-import re
-import psutil
 import ctypes
 
+from lazy import lazy_import
+import calc
+from intents import KEYBOARD, IntentMatcher, text_after, tokenize
+from app_index import AppIndex
+from process_table import ProcessTable
+from speech import SpeechQueue
+from audio_cache import CachingBackend
+from capture import StreamingListener, MicrophoneSource
+from wiki_cache import WikiSummaryCache
+from noise import NoiseEstimator
+from metrics import Metrics
+from notes import NotesStore, parse_count, parse_date_range, describe
+from media_library import MediaLibrary, write_playlist
+from screenshots import BURST_MARGIN, ScreenshotSaver, parse_burst_count, parse_interval
+from wakeword import WakeWordListener, SphinxDetector
+from recognition import HedgedRecognizer, default_backends
+from telemetry import SystemMonitor, describe_cpu, describe_memory, describe_disk, describe_battery
+from history import CommandHistory
+from executor import ActionExecutor
+from plans import split_command, needs_window, describe_plan, not_understood
+from fuzzy import FuzzyMatcher, APP_CUTOFF, intent_phrases
+
+# Heavy dependencies load on first use by the commands that need them
+sr = lazy_import("speech_recognition")
+pyautogui = lazy_import("pyautogui")
+
+# Universal keyboard shortcuts: intent name -> (keys, spoken reply)
+HOTKEY_COMMANDS = {
+    "minimize": (('win', 'down'), "Minimizing current window."),
+    "maximize": (('win', 'up'), "Maximizing current window."),
+    "copy": (('ctrl', 'c'), "Copied."),
+    "paste": (('ctrl', 'v'), "Pasted."),
+    "cut": (('ctrl', 'x'), "Cut."),
+    "undo": (('ctrl', 'z'), "Undone."),
+    "redo": (('ctrl', 'y'), "Redone."),
+    "save": (('ctrl', 's'), "Saved."),
+    "select_all": (('ctrl', 'a'), "Selected all."),
+    "find": (('ctrl', 'f'), "Opening find dialog."),
+    "print": (('ctrl', 'p'), "Opening print dialog."),
+    "new_tab": (('ctrl', 't'), "Opening new tab."),
+    "close_tab": (('ctrl', 'w'), "Closing tab."),
+    "refresh": (('ctrl', 'r'), "Refreshing."),
+    "task_manager": (('ctrl', 'shift', 'esc'), "Opening task manager."),
+    "switch_application": (('alt', 'tab'), "Switching application."),
+}
+
+# Applications opened by name without a search: spoken name -> executable
+QUICK_APPS = {
+    "notepad": "notepad.exe",
+    "calculator": "calc.exe",
+    "paint": "mspaint.exe",
+    "chrome": "chrome.exe",
+    "edge": "msedge.exe",
+    "firefox": "firefox.exe",
+    "explorer": "explorer.exe",
+    "file explorer": "explorer.exe",
+    "word": "winword.exe",
+    "excel": "excel.exe",
+    "powerpoint": "powerpnt.exe",
+    "vs code": "code",
+    "visual studio code": "code",
+    "spotify": "spotify.exe",
+    "discord": "discord.exe",
+    "steam": "steam.exe",
+    "cmd": "cmd.exe",
+    "command prompt": "cmd.exe",
+    "powershell": "powershell.exe",
+    "control panel": "control.exe",
+    "settings": "ms-settings:",
+}
+
+# Seconds to wait for a program to start before carrying on; a slower
+# start keeps going on the action executor
+LAUNCH_WAIT = 2.0
+
+# In a compound command ("open notepad and type hello"), seconds to wait
+# for an opened application before typing into it, and for its window to
+# take focus once its process is up
+APP_WAIT = 8.0
+WINDOW_SETTLE = 0.5
+
+# While waiting for the wake word, seconds between checks for notices
+# from finished actions to speak
+NOTICE_POLL = 1.0
+
+# Websites opened by name: phrase -> (spoken name, url)
+WEBSITES = {
+    "open youtube": ("YouTube", "https://www.youtube.com"),
+    "open gmail": ("Gmail", "https://mail.google.com"),
+    "open email": ("Gmail", "https://mail.google.com"),
+    "open facebook": ("Facebook", "https://www.facebook.com"),
+    "open twitter": ("Twitter", "https://www.twitter.com"),
+    "open instagram": ("Instagram", "https://www.instagram.com"),
+}
+
+GREETING = "{} I am Chanakya, your voice assistant. How can I assist you today?"
+
+# Fixed replies whose audio is rendered once at startup and replayed from the cache
+STATIC_PHRASES = [GREETING.format(part) for part in ("Good morning!", "Good afternoon!", "Good evening!")] + [
+    reply for _, reply in HOTKEY_COMMANDS.values()
+] + [
+    "Hello! It's nice to hear from you.",
+    "Volume increased.",
+    "Volume decreased.",
+    "Volume muted.",
+    "Closing current window.",
+    "Switching window.",
+    "Locking computer.",
+    "What should I write?",
+    "Note saved successfully.",
+    "What topic would you like to search for on Wikipedia?",
+    "According to Wikipedia:",
+    "I'm not sure how to help with that. Can you try rephrasing?",
+    "Goodbye! Have a great day.",
+]
+
 class VoiceAssistant:
     """
     A simple voice assistant class for Python.
     """
     
-    def __init__(self):
+    def __init__(self, speech_backend=None, audio_source=None, wake_word_detector=None):
         """
         Initializes the TTS engine, recognizer, and Wikipedia API.
+        speech_backend replaces the pyttsx3 engine (e.g. speech.FakeBackend) and
+        audio_source, a factory for capture sources such as capture.WavSource,
+        replaces the microphone. With wake_word_detector (e.g.
+        wakeword.SphinxDetector()) the assistant listens continuously and
+        only acts on commands that start with "Chanakya".
         """
         print("Initializing assistant...")
+
+        # --- Metrics ---
+        # Stage timings are written to stderr as JSON lines (e.g. 2> metrics.log)
+        self.metrics = Metrics(log=lambda line: print(line, file=sys.stderr))
+        # Seconds spent waiting for replies to be spoken, kept apart from action time
+        self.speech_seconds = 0.0
+        # While a compound command runs, its replies are kept here and spoken together
+        self.replies = None
+        # What finished actions have to say ("Sorry, the shortcut didn't
+        # work."), queued from executor threads and spoken by the main
+        # thread between listens, so the microphone never hears it
+        self.notices = queue.Queue()
         
         # --- Text-to-Speech (TTS) Setup ---
+        # Speech runs on its own thread; pass voice=<voice id> to pick another voice
         try:
-            self.engine = pyttsx3.init()
-            # Optional: Adjust voice properties
-            voices = self.engine.getProperty('voices')
-            # You can change the index to try different voices
-            # self.engine.setProperty('voice', voices[1].id) 
-            self.engine.setProperty('rate', 180) # Speed of speech
+            backend = speech_backend if speech_backend is not None else CachingBackend(rate=180, prewarm=STATIC_PHRASES) # Speed of speech
+            self.speech = SpeechQueue(backend).start()
+            self.speech.on_status = self.record_speech
         except Exception as e:
             print(f"Error initializing TTS engine: {e}")
             print("Please ensure you have a compatible TTS engine installed (e.g., eSpeak, SAPI5 on Windows, NSSpeechSynthesizer on macOS)")
@@ -41,37 +165,192 @@ class VoiceAssistant:
 
         # --- Speech Recognition Setup ---
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = sr.Microphone() if audio_source is None else None
+        self.wake_listener = None
         
-        # Adjust for ambient noise once at the start
-        try:
-            with self.microphone as source:
+        # The noise level is saved between runs, so calibration only blocks
+        # the first start (or one after a week away); afterwards it adapts
+        # from the quiet stretches between commands
+        self.noise = NoiseEstimator()
+        if self.microphone is not None and not self.noise.calibrated:
+            try:
                 print("Calibrating microphone... Please wait a moment.")
-                self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
+                self.noise.calibrate(MicrophoneSource(self.microphone), duration=1.0)
                 print("Microphone calibrated.")
-        except Exception as e:
-            print(f"Could not access microphone: {e}")
-            self.speak("Error: Could not access the microphone. Please check your system settings.")
-            sys.exit(1)
+            except Exception as e:
+                print(f"Could not access microphone: {e}")
+                self.speak("Error: Could not access the microphone. Please check your system settings.")
+                sys.exit(1)
+        elif self.noise.calibrated:
+            print(f"Using saved noise calibration (threshold {self.noise.threshold:.0f}).")
+
+        # Each phrase goes to Google and, when pocketsphinx is installed, to
+        # offline Sphinx at the same time: the first confident transcript
+        # wins and no command waits past the deadline or is lost to an outage
+        self.recognition = HedgedRecognizer(default_backends(lambda: self.recognizer), metrics=self.metrics)
 
-        # --- Wikipedia API Setup ---
-        # Using 'wikipedia-api' for easier language handling and summaries
-        self.wiki_api = wikipediaapi.Wikipedia(
-            user_agent='VoiceAssistant/1.0',
-            language='en',
-            extract_format=wikipediaapi.ExtractFormat.WIKI
+        # Audio is segmented while it is captured and each finished phrase
+        # goes to recognition while capture continues
+        self.listener = StreamingListener(
+            audio_source or (lambda: MicrophoneSource(self.microphone)),
+            self.recognition.recognize,
+            energy_threshold=self.noise.threshold,
+            timeout=5, # max seconds it will wait for a phrase to start
+            phrase_time_limit=5, # max seconds it will listen for a phrase
+            metrics=self.metrics,
         )
+        self.listener.on_silence = self.noise.observe_frame
+        self.listener.on_no_match = self.noise.observe_segment
+        self.noise.on_update = self.set_energy_threshold
+
+        # --- Wake Word ---
+        # Keeps one audio stream open and checks each phrase for the wake word
+        # locally; only the audio from just before "Chanakya" to the end of
+        # the command is sent to Google
+        if wake_word_detector is not None:
+            self.wake_listener = WakeWordListener(
+                audio_source or (lambda: MicrophoneSource(self.microphone)),
+                wake_word_detector,
+                self.recognition.recognize,
+                energy_threshold=self.noise.threshold,
+                metrics=self.metrics,
+            )
+            self.wake_listener.on_silence = self.noise.observe_frame
+
+        # --- Wikipedia Setup ---
+        # Summaries are cached on disk and fetched over one keep-alive session
+        self.wiki_cache = WikiSummaryCache()
+
+        # --- Notes ---
+        # Notes are indexed for search; ones in the old Desktop text file are imported
+        self.notes = NotesStore()
+        try:
+            imported = self.notes.import_text(Path.home() / "Desktop" / "voice_notes.txt")
+            if imported:
+                print(f"Imported {imported} notes from voice_notes.txt.")
+        except Exception as e:
+            print(f"Could not import voice_notes.txt: {e}")
+
+        # --- Installed Applications Index ---
+        # Built and refreshed in the background so "open X" never walks the disk
+        self.app_index = AppIndex()
+        self.app_index.start()
+        # Misheard names ("crome") are matched to the closest known one
+        self.quick_apps = FuzzyMatcher([(name, name) for name in QUICK_APPS], cutoff=APP_CUTOFF)
+
+        # --- Music Library ---
+        # Scanned in the background (only changed folders after the first run),
+        # so "play song X" is answered from memory
+        self.media = MediaLibrary()
+        self.media.start()
+
+        # --- Screenshots ---
+        # Encoded and saved by worker threads; set CHANAKYA_SCREENSHOT_FORMAT=jpeg or webp for smaller files
+        self.screenshots = ScreenshotSaver(metrics=self.metrics)
+
+        # --- Running Processes ---
+        # Close/switch/list commands read this snapshot instead of scanning processes;
+        # it starts refreshing in the background on first use
+        self.processes = ProcessTable()
+
+        # --- System Telemetry ---
+        # CPU, memory, disk and battery are sampled in the background, so
+        # "cpu usage" answers at once with the current value and recent average
+        self.system = SystemMonitor().start()
+
+        # --- Command History ---
+        # Understood commands are remembered (shared with the web interface's suggestions)
+        self.history = CommandHistory()
+
+        # --- Action Executor ---
+        # Launches, key presses and system commands run off the dispatch
+        # thread with timeouts, one keyboard action at a time
+        self.actions = ActionExecutor(metrics=self.metrics)
+        # Name of the program the last launch() started, for compound commands
+        self.launched = None
+        # While a compound command runs, the actions its steps submitted,
+        # so a step that fails cancels only the ones after it
+        self.plan_actions = None
+
+        # --- Command Dispatch ---
+        self.intents = IntentMatcher()
+        self.fuzzy_intents = FuzzyMatcher(intent_phrases())
+        self.intent_handlers = self.build_intent_handlers()
 
     def speak(self, text):
         """
         Converts text to speech.
         """
+        if self.replies is not None:
+            self.replies.append(text)
+            return
         print(f"Assistant: {text}")
+        # Wait for the sentence so the microphone doesn't pick it up afterwards;
+        # an always-open stream ignores the audio meanwhile ("I am Chanakya")
+        start = time.perf_counter()
+        if self.wake_listener is not None:
+            self.wake_listener.muted.set()
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
-        except Exception as e:
-            print(f"Error during speech: {e}")
+            self.speech.say(text, wait=True)
+        finally:
+            if self.wake_listener is not None:
+                self.wake_listener.muted.clear()
+        self.speech_seconds += time.perf_counter() - start
+
+    def flush_replies(self):
+        """
+        Speaks the replies a compound command has collected so far as one.
+        """
+        if not self.replies:
+            return
+        text = " ".join(self.replies)
+        self.replies = None
+        try:
+            self.speak(text)
+        finally:
+            self.replies = []
+
+    def announce(self, text):
+        """
+        Queues text to be spoken between listens. Safe from any thread.
+        """
+        self.notices.put(text)
+
+    def speak_notices(self):
+        """
+        Speaks the queued notices as one reply, apart from the replies of
+        a compound command still running.
+        """
+        notices = []
+        while True:
+            try:
+                notices.append(self.notices.get_nowait())
+            except queue.Empty:
+                break
+        if not notices:
+            return
+        replies, self.replies = self.replies, None
+        try:
+            self.speak(" ".join(notices))
+        finally:
+            self.replies = replies
+
+    def set_energy_threshold(self, threshold):
+        """
+        Applies a new speech threshold from the noise estimator to the listeners.
+        """
+        self.listener.energy_threshold = threshold
+        if self.wake_listener is not None:
+            self.wake_listener.energy_threshold = threshold
+
+    def record_speech(self, utterance):
+        """
+        Records how long each reply took to speak.
+        """
+        if utterance.speaking_time is not None:
+            self.metrics.observe("tts", utterance.speaking_time)
+        if utterance.status == "failed":
+            self.metrics.error("tts", "failed")
 
     def greet_user(self):
         """
@@ -85,23 +364,35 @@ class VoiceAssistant:
         else:
             greeting = "Good evening!"
         
-        self.speak(f"{greeting} I am Chanakya, your voice assistant. How can I assist you today?")
+        self.speak(GREETING.format(greeting))
 
-    def listen_for_command(self):
+    def listen_for_command(self, wake_word=False):
         """
         Listens for a command from the user and returns it as text.
+        In wake-word mode, wake_word=False (follow-up answers such as a note's
+        text) takes the next phrase without waiting for "Chanakya".
         """
+        # A step of a compound command asking a question says what came before it first
+        self.flush_replies()
+        self.speak_notices()
         command = None
         try:
-            with self.microphone as source:
-                print("\nListening...")
-                # Timeout: max seconds it will wait for a phrase to start
-                # Phrase time limit: max seconds it will listen for a phrase
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-            
-            print("Recognizing...")
-            # Use Google's Web Speech API for recognition
-            command = self.recognizer.recognize_google(audio)
+            print("\nListening...")
+            if self.wake_listener is not None:
+                self.wake_listener.start()
+                if not wake_word:
+                    self.wake_listener.arm()
+                    command = self.wake_listener.listen(timeout=10)
+                else:
+                    # Waits in slices to speak what finished actions reported meanwhile
+                    command = self.wake_listener.listen(timeout=NOTICE_POLL)
+                    while command is None and not self.wake_listener.ended:
+                        self.speak_notices()
+                        command = self.wake_listener.listen(timeout=NOTICE_POLL)
+                if command is None:
+                    raise sr.WaitTimeoutError("no command after the wake word")
+            else:
+                command = self.listener.listen()
             command = command.lower()
             print(f"User said: {command}")
 
@@ -111,7 +402,7 @@ class VoiceAssistant:
             print("Sorry, I didn't catch that.")
             # self.speak("Sorry, I didn't catch that. Could you please repeat?")
         except sr.RequestError as e:
-            print(f"Could not request results from Google Speech Recognition service; {e}")
+            print(f"Could not request results from the speech recognition service; {e}")
             self.speak("Sorry, my speech service is down. Please check your internet connection.")
         except Exception as e:
             print(f"An unexpected error occurred during listening: {e}")
@@ -126,194 +417,235 @@ class VoiceAssistant:
         if command is None:
             return True # Continue running
 
-        # --- Core Commands ---
-        if "hello" in command or "hi" in command:
-            self.speak("Hello! It's nice to hear from you.")
-        
-        elif "what's the time" in command or "what time is it" in command:
-            now = datetime.datetime.now().strftime("%I:%M %p") # e.g., "02:30 PM"
-            self.speak(f"The current time is {now}.")
-        
-        # --- Wikipedia Search ---
-        elif "wikipedia" in command:
-            self.handle_wikipedia_search(command)
-        
-        # --- Web Search ---
-        elif "search for" in command:
-            self.handle_web_search(command, "search for")
-        elif "google" in command:
-            self.handle_web_search(command, "google")
-
-        # --- Open Applications ---
-        elif "open" in command:
-            self.handle_open_application(command)
-        
-        # --- Close Applications ---
-        elif "close" in command:
-            self.handle_close_application(command)
-        
-        # --- Window Management ---
-        elif "list windows" in command or "show windows" in command or "open windows" in command:
-            self.list_open_windows()
-        elif "switch to" in command or "switch window" in command:
-            self.switch_window(command)
-        elif "minimize window" in command or "minimize" in command:
-            self.speak("Minimizing current window.")
-            pyautogui.hotkey('win', 'down')
-        elif "maximize window" in command or "maximize" in command:
-            self.speak("Maximizing current window.")
-            pyautogui.hotkey('win', 'up')
-        
-        # --- Universal Keyboard Shortcuts ---
-        elif "copy" in command and "paste" not in command:
-            pyautogui.hotkey('ctrl', 'c')
-            self.speak("Copied.")
-        elif "paste" in command:
-            pyautogui.hotkey('ctrl', 'v')
-            self.speak("Pasted.")
-        elif "cut" in command:
-            pyautogui.hotkey('ctrl', 'x')
-            self.speak("Cut.")
-        elif "undo" in command:
-            pyautogui.hotkey('ctrl', 'z')
-            self.speak("Undone.")
-        elif "redo" in command:
-            pyautogui.hotkey('ctrl', 'y')
-            self.speak("Redone.")
-        elif "save" in command and "screenshot" not in command:
-            pyautogui.hotkey('ctrl', 's')
-            self.speak("Saved.")
-        elif "select all" in command:
-            pyautogui.hotkey('ctrl', 'a')
-            self.speak("Selected all.")
-        elif "find" in command or "search" in command and "google" not in command and "for" not in command:
-            pyautogui.hotkey('ctrl', 'f')
-            self.speak("Opening find dialog.")
-        elif "print" in command:
-            pyautogui.hotkey('ctrl', 'p')
-            self.speak("Opening print dialog.")
-        elif "new tab" in command:
-            pyautogui.hotkey('ctrl', 't')
-            self.speak("Opening new tab.")
-        elif "close tab" in command:
-            pyautogui.hotkey('ctrl', 'w')
-            self.speak("Closing tab.")
-        elif "refresh" in command or "reload" in command:
-            pyautogui.hotkey('ctrl', 'r')
-            self.speak("Refreshing.")
-        
-        # --- Task Manager ---
-        elif "task manager" in command or "open task manager" in command:
-            pyautogui.hotkey('ctrl', 'shift', 'esc')
-            self.speak("Opening task manager.")
-        
-        # --- Lock Computer ---
-        elif "lock" in command and "computer" in command:
-            self.speak("Locking computer.")
-            ctypes.windll.user32.LockWorkStation()
-        
-        # --- Alt+Tab ---
-        elif "switch application" in command or "next window" in command:
-            pyautogui.hotkey('alt', 'tab')
-            self.speak("Switching application.")
-        
-        # --- Volume Control ---
-        elif "volume up" in command or "increase volume" in command:
-            self.adjust_volume("up")
-        elif "volume down" in command or "decrease volume" in command:
-            self.adjust_volume("down")
-        elif "mute" in command:
-            self.adjust_volume("mute")
-        
-        # --- System Operations ---
-        elif "shutdown" in command:
-            self.speak("Shutting down the system in 10 seconds. Say cancel to stop.")
-            time.sleep(5)
-            os.system("shutdown /s /t 10")
-        elif "restart" in command:
-            self.speak("Restarting the system in 10 seconds.")
-            time.sleep(5)
-            os.system("shutdown /r /t 10")
-        elif "sleep" in command or "hibernate" in command:
-            self.speak("Putting the system to sleep.")
-            os.system("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
-        
-        # --- Screen Control ---
-        elif "screenshot" in command or "take screenshot" in command:
-            self.take_screenshot()
-        
-        # --- File Operations ---
-        elif "create file" in command or "make file" in command:
-            self.handle_create_file()
-        elif "create folder" in command or "make folder" in command:
-            self.handle_create_folder()
-        
-        # --- Notes ---
-        elif "take note" in command or "write note" in command or "remember this" in command:
-            self.take_note()
-        
-        # --- Weather ---
-        elif "weather" in command:
-            self.get_weather()
-        
-        # --- Calculator ---
-        elif "calculate" in command or "what is" in command and any(op in command for op in ["+", "-", "*", "/", "plus", "minus", "times", "divided"]):
-            self.calculate(command)
-        
-        # --- Date ---
-        elif "what's the date" in command or "what date is it" in command or "today's date" in command:
-            now = datetime.datetime.now().strftime("%B %d, %Y") # e.g., "December 24, 2025"
-            self.speak(f"Today is {now}.")
-        
-        # --- Play Music ---
-        elif "play music" in command or "play song" in command:
-            self.play_music(command)
-        
-        # --- Tell Joke ---
-        elif "tell joke" in command or "tell me a joke" in command:
-            self.tell_joke()
-        
-        # --- News ---
-        elif "news" in command or "headlines" in command:
-            self.get_news()
-        
-        # --- System Information ---
-        elif "battery" in command:
-            self.get_battery_status()
-        elif "cpu" in command or "processor" in command:
-            self.get_cpu_info()
-        
-        # --- Open Websites ---
-        elif "open youtube" in command:
-            self.speak("Opening YouTube.")
-            webbrowser.open("https://www.youtube.com")
-        elif "open gmail" in command or "open email" in command:
-            self.speak("Opening Gmail.")
-            webbrowser.open("https://mail.google.com")
-        elif "open facebook" in command:
-            self.speak("Opening Facebook.")
-            webbrowser.open("https://www.facebook.com")
-        elif "open twitter" in command:
-            self.speak("Opening Twitter.")
-            webbrowser.open("https://www.twitter.com")
-        elif "open instagram" in command:
-            self.speak("Opening Instagram.")
-            webbrowser.open("https://www.instagram.com")
-        
-        # --- Who are you ---
-        elif "who are you" in command or "what is your name" in command:
-            self.speak("I am Chanakya, your personal voice assistant. I'm here to help you with various tasks and control your PC.")
-        
-        # --- Exit Command ---
-        elif "exit" in command or "quit" in command or "stop" in command or "goodbye" in command:
-            self.speak("Goodbye! Have a great day.")
-            return False # Signal to stop
-            
-        else:
+        with self.metrics.time("dispatch"):
+            # "open notepad, type hello and save it" is one plan of three steps
+            plan = split_command(command, self.intents)
+            match = self.intents.match(command) if plan is None else None
+            if plan is None and match is None:
+                # A misheard phrase ("volume app") is read as the closest known one
+                corrected = self.fuzzy_intents.correct(command)
+                if corrected is not None and self.intents.match(corrected):
+                    print(f"Interpreting '{command}' as '{corrected}'.")
+                    command, match = corrected, self.intents.match(corrected)
+        if plan is not None and not_understood(plan):
+            # Running only the steps that were understood would leave the job half done
+            self.metrics.error("dispatch", "no_intent")
+            parts = " or ".join(f"'{text}'" for text in not_understood(plan))
+            self.speak(f"Sorry, I didn't understand {parts}, so I haven't done any of it.")
+            return True
+        if plan is not None:
+            self.history.record(command)
+            return self.run_plan(plan)
+        if match is None or match.name not in self.intent_handlers:
             # Fallback for unhandled commands
+            self.metrics.error("dispatch", "no_intent")
             self.speak("I'm not sure how to help with that. Can you try rephrasing?")
+            return True
+        self.history.record(command)
+        return self.run_handler(command, match)
+
+    def run_plan(self, plan):
+        """
+        Runs the steps of a compound command in order and speaks their
+        replies together at the end. Steps don't wait for each other's
+        actions to finish: key presses already run in the order asked. The
+        one wait is for an application opened by a step, before the key
+        presses of later steps, so they reach its window.
+        Returns False if a step asked the assistant to stop.
+        """
+        print(f"Plan: {describe_plan(plan)}")
+        self.replies = []
+        self.plan_actions = []
+        try:
+            for position, step in enumerate(plan):
+                waits = step.match.name == "open_app" and needs_window(plan, position, self.intents.resources)
+                before = self.processes.snapshot(max_age=0) if waits else None
+                self.launched = None
+                if not self.run_handler(step.text, step.match):
+                    return False
+                if waits and self.launched:
+                    self.wait_for_window(self.launched, before.find(self.launched))
+            return True
+        finally:
+            self.plan_actions = None
+            replies, self.replies = self.replies, None
+            if replies:
+                self.speak(" ".join(replies))
+
+    def run_handler(self, command, match):
+        """
+        Runs the handler of match, timing it. Returns False if the
+        assistant should stop.
+        """
+        handler = self.intent_handlers[match.name]
+        # Replies are spoken synchronously; that time counts as tts, not action
+        speech_before = self.speech_seconds
+        start = time.perf_counter()
+        try:
+            # Handlers return False only to signal that the assistant should stop
+            return handler(command, match) is not False
+        except Exception as e:
+            self.metrics.error("action", e, match.name)
+            raise
+        finally:
+            spoken = self.speech_seconds - speech_before
+            self.metrics.observe("action", time.perf_counter() - start - spoken, match.name)
+
+    def build_intent_handlers(self):
+        """
+        Maps every intent name from the intent table to its handler.
+        Each handler is called with the raw command and the IntentMatch.
+        """
+        handlers = {
+            "greeting": lambda command, match: self.speak("Hello! It's nice to hear from you."),
+            "time": lambda command, match: self.tell_time(),
+            "date": lambda command, match: self.tell_date(),
+            "wikipedia": lambda command, match: self.handle_wikipedia_search(command),
+            "web_search": lambda command, match: self.handle_web_search(command, match.phrase),
+            "open_app": lambda command, match: self.handle_open_application(command),
+            "close_app": lambda command, match: self.handle_close_application(command),
+            "list_windows": lambda command, match: self.list_open_windows(),
+            "switch_window": lambda command, match: self.switch_window(command),
+            "lock_computer": lambda command, match: self.lock_computer(),
+            "volume_up": lambda command, match: self.adjust_volume("up"),
+            "volume_down": lambda command, match: self.adjust_volume("down"),
+            "mute": lambda command, match: self.adjust_volume("mute"),
+            "shutdown": lambda command, match: self.power_action("shutdown"),
+            "restart": lambda command, match: self.power_action("restart"),
+            "sleep": lambda command, match: self.power_action("sleep"),
+            "screenshot": lambda command, match: self.take_screenshot(),
+            "screenshot_burst": lambda command, match: self.take_screenshot_burst(command),
+            "create_file": lambda command, match: self.handle_create_file(),
+            "create_folder": lambda command, match: self.handle_create_folder(),
+            "take_note": lambda command, match: self.take_note(),
+            "find_note": lambda command, match: self.find_note(" ".join(tokenize(command)[match.end:])),
+            "read_notes": lambda command, match: self.read_notes(parse_count(command)),
+            "notes_between": lambda command, match: self.read_notes_between(command),
+            "weather": lambda command, match: self.get_weather(),
+            "calculate": lambda command, match: self.calculate(command),
+            "play_music": lambda command, match: self.play_music(" ".join(tokenize(command)[match.end:])),
+            "play_artist": lambda command, match: self.play_artist(" ".join(tokenize(command)[match.end:])),
+            "shuffle_music": lambda command, match: self.shuffle_music(),
+            "joke": lambda command, match: self.tell_joke(),
+            "news": lambda command, match: self.get_news(),
+            "battery": lambda command, match: self.get_battery_status(),
+            "cpu": lambda command, match: self.get_cpu_info(),
+            "memory": lambda command, match: self.get_memory_info(),
+            "disk": lambda command, match: self.get_disk_info(),
+            "open_website": lambda command, match: self.open_website(match.phrase),
+            "who_are_you": lambda command, match: self.speak("I am Chanakya, your personal voice assistant. I'm here to help you with various tasks and control your PC."),
+            "type_text": lambda command, match: self.type_text(text_after(command, match.end)),
+            "cancel": lambda command, match: self.cancel_actions(),
+            "exit": lambda command, match: self.say_goodbye(),
+        }
+        for name in HOTKEY_COMMANDS:
+            handlers[name] = lambda command, match: self.press_hotkey(match.name)
+        return handlers
+
+    def tell_time(self):
+        """
+        Speaks the current time.
+        """
+        now = datetime.datetime.now().strftime("%I:%M %p") # e.g., "02:30 PM"
+        self.speak(f"The current time is {now}.")
+
+    def tell_date(self):
+        """
+        Speaks today's date.
+        """
+        now = datetime.datetime.now().strftime("%B %d, %Y") # e.g., "December 24, 2025"
+        self.speak(f"Today is {now}.")
+
+    def act(self, intent, fn, failure=None, timeout=None, delay=0.0, resources=None):
+        """
+        Runs fn on the action executor with the resources of intent (or
+        the given ones) and returns the Action. If it fails or times out,
+        failure is announced.
+        """
+        if resources is None:
+            resources = self.intents.resources.get(intent, ())
+        action = self.actions.submit(intent, fn, resources, timeout, delay)
+        if self.plan_actions is not None:
+            self.plan_actions.append(action)
+        if failure:
+            action.add_done_callback(
+                lambda action: self.announce(failure) if action.state in ("failed", "timed_out") else None)
+        return action
+
+    def press_hotkey(self, name):
+        """
+        Sends a universal keyboard shortcut and confirms it.
+        """
+        keys, reply = HOTKEY_COMMANDS[name]
+        self.act(name, lambda: pyautogui.hotkey(*keys), failure="Sorry, the shortcut didn't work.")
+        self.speak(reply)
 
-        return True # Signal to continue
+    def type_text(self, text):
+        """
+        Types text into the window in front.
+        """
+        if not text:
+            self.speak("What should I type?")
+            text = self.listen_for_command()
+            if not text:
+                return
+        self.act("type_text", lambda: pyautogui.write(text), failure="Sorry, I couldn't type that.")
+        self.speak(f"Typing {text}.")
+
+    def lock_computer(self):
+        """
+        Locks the workstation.
+        """
+        self.speak("Locking computer.")
+        self.act("lock_computer", lambda: ctypes.windll.user32.LockWorkStation(),
+                 failure="Sorry, I couldn't lock the computer.")
+
+    def power_action(self, action):
+        """
+        Shuts down, restarts or suspends the system. Shutdown and restart
+        wait 5 seconds first, during which "cancel" stops them.
+        """
+        if action == "shutdown":
+            self.speak("Shutting down the system in 10 seconds. Say cancel to stop.")
+            self.act("shutdown", lambda: os.system("shutdown /s /t 10"), delay=5)
+        elif action == "restart":
+            self.speak("Restarting the system in 10 seconds. Say cancel to stop.")
+            self.act("restart", lambda: os.system("shutdown /r /t 10"), delay=5)
+        elif action == "sleep":
+            self.speak("Putting the system to sleep.")
+            self.act("sleep", lambda: os.system("rundll32.exe powrprof.dll,SetSuspendState 0,1,0"))
+
+    def cancel_actions(self):
+        """
+        Cancels the actions that haven't started, such as a shutdown
+        still in its grace period.
+        """
+        cancelled = self.actions.cancel_pending()
+        if not cancelled:
+            self.speak("There is nothing to cancel.")
+            return
+        names = sorted({action.name.replace("_", " ") for action in cancelled})
+        self.speak(f"Cancelled {', '.join(names)}.")
+
+    def open_website(self, phrase):
+        """
+        Opens one of the well-known websites in the browser.
+        """
+        site_name, url = WEBSITES[phrase]
+        self.speak(f"Opening {site_name}.")
+        self.act("open_website", lambda: webbrowser.open(url), failure="Sorry, I couldn't open your web browser.")
+
+    def say_goodbye(self):
+        """
+        Says goodbye and signals the main loop to stop.
+        """
+        self.speak("Goodbye! Have a great day.")
+        cache = getattr(self.speech.backend, "cache", None)
+        if cache is not None:
+            print(f"Speech cache: {cache.stats()}")
+        # Buffered notes are written before exiting
+        self.notes.close()
+        return False # Signal to stop
 
     def handle_wikipedia_search(self, command):
         """
@@ -325,13 +657,13 @@ class VoiceAssistant:
             
             if query:
                 self.speak(f"Searching Wikipedia for {query}...")
-                page = self.wiki_api.page(query)
+                # First paragraph of the summary, or None if there is no page
+                summary = self.wiki_cache.summary(query)
+                print(f"Wikipedia cache: {self.wiki_cache.stats()}")
                 
-                if not page.exists():
+                if summary is None:
                     self.speak(f"Sorry, I couldn't find a Wikipedia page for {query}.")
                 else:
-                    # Get the first paragraph of the summary
-                    summary = page.summary.split('\n')[0]
                     self.speak("According to Wikipedia:")
                     self.speak(summary)
             else:
@@ -356,7 +688,7 @@ class VoiceAssistant:
             if query:
                 url = f"https://www.google.com/search?q={query}"
                 self.speak(f"Opening Google search for {query} in your browser.")
-                webbrowser.open(url)
+                self.act("web_search", lambda: webbrowser.open(url), failure="Sorry, I couldn't open your web browser.")
             else:
                 self.speak("I didn't hear a search query.")
         except Exception as e:
@@ -371,40 +703,12 @@ class VoiceAssistant:
             # Extract app name from command
             app_name = command.replace("open", "").strip()
             
-            # First try common quick apps
-            quick_apps = {
-                "notepad": "notepad.exe",
-                "calculator": "calc.exe",
-                "paint": "mspaint.exe",
-                "chrome": "chrome.exe",
-                "edge": "msedge.exe",
-                "firefox": "firefox.exe",
-                "explorer": "explorer.exe",
-                "file explorer": "explorer.exe",
-                "word": "winword.exe",
-                "excel": "excel.exe",
-                "powerpoint": "powerpnt.exe",
-                "vs code": "code",
-                "visual studio code": "code",
-                "spotify": "spotify.exe",
-                "discord": "discord.exe",
-                "steam": "steam.exe",
-                "cmd": "cmd.exe",
-                "command prompt": "cmd.exe",
-                "powershell": "powershell.exe",
-                "control panel": "control.exe",
-                "settings": "ms-settings:"
-            }
-            
             # Check quick apps first
-            for app_key, app_exe in quick_apps.items():
+            for app_key, app_exe in QUICK_APPS.items():
                 if app_key in app_name.lower():
                     self.speak(f"Opening {app_key}.")
                     try:
-                        if app_exe == "ms-settings:":
-                            os.system("start ms-settings:")
-                        else:
-                            subprocess.Popen(app_exe, shell=True)
+                        self.launch(app_exe).wait(timeout=LAUNCH_WAIT)
                         return
                     except Exception as e:
                         print(f"Error opening {app_key}: {e}")
@@ -412,11 +716,15 @@ class VoiceAssistant:
             # If not found in quick apps, search system
             self.speak(f"Searching for {app_name}.")
             found_app = self.find_application(app_name)
+            if not found_app:
+                closest = self.closest_application(app_name)
+                if closest:
+                    app_name, found_app = closest
             
             if found_app:
                 self.speak(f"Opening {app_name}.")
                 try:
-                    subprocess.Popen(found_app, shell=True)
+                    self.launch(found_app).wait(timeout=LAUNCH_WAIT)
                 except Exception as e:
                     print(f"Error opening {found_app}: {e}")
                     self.speak(f"Found {app_name} but couldn't open it.")
@@ -427,38 +735,65 @@ class VoiceAssistant:
             print(f"Error in handle_open_application: {e}")
             self.speak("Sorry, I encountered an error while trying to open the application.")
     
+    def launch(self, target):
+        """
+        Starts an executable, or the Settings app for "ms-settings:", on
+        the action executor. Returns the Action.
+        """
+        if target == "ms-settings:":
+            self.launched = "SystemSettings"
+            return self.act("open_app", lambda: os.system("start ms-settings:"))
+        self.launched = os.path.splitext(os.path.basename(target))[0]
+        return self.act("open_app", lambda: subprocess.Popen(target, shell=True))
+
+    def wait_for_window(self, name, running):
+        """
+        Holds the keyboard until a new name process is up, so the keys of
+        the next steps go to its window rather than the one in front now.
+        running are the pids it had before the launch. If it never comes
+        up, the actions the plan queued after this wait are cancelled
+        instead; actions from anything else are left alone.
+        """
+        plan_actions = self.plan_actions if self.plan_actions is not None else []
+        # This wait is the next action the plan submits; the ones after it are its later steps
+        later = len(plan_actions) + 1
+        def wait():
+            if not self.processes.wait_for(name, APP_WAIT, exclude=running):
+                for action in plan_actions[later:]:
+                    self.actions.cancel(action)
+                raise RuntimeError(f"{name} didn't start within {APP_WAIT:g} s")
+            time.sleep(WINDOW_SETTLE)
+        self.act("wait_for_window", wait, resources=KEYBOARD, timeout=APP_WAIT + WINDOW_SETTLE + 1,
+                 failure=f"{name} didn't open, so I stopped there.")
+    
     def find_application(self, app_name):
         """
-        Searches the system for an application by name.
+        Looks up an application by name in the installed-application index.
         """
         try:
-            # Common installation directories
-            search_paths = [
-                Path(os.environ.get('ProgramFiles', 'C:\\Program Files')),
-                Path(os.environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)')),
-                Path(os.environ.get('LOCALAPPDATA', '')),
-                Path(os.environ.get('APPDATA', '')),
-                Path.home() / 'AppData' / 'Local' / 'Programs',
-            ]
-            
-            # Search for .exe files matching the app name
-            for search_path in search_paths:
-                if not search_path.exists():
-                    continue
-                    
-                # Search up to 3 levels deep
-                for depth in range(3):
-                    pattern = '*/' * depth + '*.exe'
-                    for exe_file in search_path.glob(pattern):
-                        exe_name = exe_file.stem.lower()
-                        if app_name.lower() in exe_name or exe_name in app_name.lower():
-                            return str(exe_file)
-            
-            return None
+            found = self.app_index.lookup(app_name, timeout=30)
+            if found is None:
+                # The app may have been installed since the last refresh;
+                # the index catches up off the dispatch thread for next time
+                self.app_index.refresh_in_background()
+            return found
         except Exception as e:
             print(f"Error searching for application: {e}")
             return None
     
+    def closest_application(self, app_name):
+        """
+        Returns (name, executable) of the known application whose name is
+        closest to a misheard one ("crome" -> chrome), or None.
+        """
+        quick = self.quick_apps.match(app_name)
+        indexed = self.app_index.closest(app_name)
+        if indexed and (quick is None or indexed.score > quick.score):
+            return indexed.label, self.app_index.lookup(indexed.label)
+        if quick:
+            return quick.label, QUICK_APPS[quick.label]
+        return None
+    
     def handle_close_application(self, command):
         """
         Closes an application by name.
@@ -468,24 +803,15 @@ class VoiceAssistant:
             
             if not app_name or app_name == "window":
                 # Close current window
-                pyautogui.hotkey('alt', 'f4')
+                self.act("close_app", lambda: pyautogui.hotkey('alt', 'f4'), resources=KEYBOARD,
+                         failure="Sorry, I couldn't close the window.")
                 self.speak("Closing current window.")
                 return
             
             # Find and close process
-            closed = False
-            for proc in psutil.process_iter(['name']):
-                try:
-                    proc_name = proc.info['name'].lower()
-                    if app_name.lower() in proc_name:
-                        proc.terminate()
-                        self.speak(f"Closed {app_name}.")
-                        closed = True
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            
-            if not closed:
+            if self.act("close_app", lambda: self.processes.terminate(app_name), timeout=5).wait():
+                self.speak(f"Closed {app_name}.")
+            else:
                 self.speak(f"Couldn't find {app_name} running.")
                 
         except Exception as e:
@@ -497,19 +823,14 @@ class VoiceAssistant:
         Lists all open windows/applications.
         """
         try:
-            windows = []
-            for proc in psutil.process_iter(['name']):
-                try:
-                    proc_name = proc.info['name']
-                    if proc_name.endswith('.exe') and proc_name not in windows:
-                        windows.append(proc_name.replace('.exe', ''))
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+            snapshot = self.processes.snapshot()
+            print(f"Process snapshot is {snapshot.age:.1f}s old.")
+            # Unique application names, system processes excluded
+            windows = snapshot.applications()
             
             if windows:
-                # Get first 5 most relevant apps (exclude system processes)
-                filtered = [w for w in windows if w.lower() not in ['svchost', 'system', 'registry', 'csrss', 'winlogon', 'services']]
-                top_windows = filtered[:5]
+                # Get first 5 most relevant apps
+                top_windows = windows[:5]
                 
                 self.speak(f"Open applications: {', '.join(top_windows)}")
             else:
@@ -528,26 +849,23 @@ class VoiceAssistant:
             
             if not app_name:
                 # Just alt+tab if no specific app mentioned
-                pyautogui.hotkey('alt', 'tab')
+                self.act("switch_window", lambda: pyautogui.hotkey('alt', 'tab'),
+                         failure="Sorry, I couldn't switch windows.")
                 self.speak("Switching window.")
                 return
             
             # Try to bring window to front
-            found = False
-            for proc in psutil.process_iter(['name', 'pid']):
-                try:
-                    proc_name = proc.info['name'].lower()
-                    if app_name.lower() in proc_name:
-                        # Use alt+tab multiple times to cycle through windows
-                        pyautogui.hotkey('alt', 'tab')
-                        time.sleep(0.2)
-                        self.speak(f"Switching to {app_name}.")
-                        found = True
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            
-            if not found:
+            pids, age = self.processes.find(app_name)
+            print(f"Process snapshot is {age:.1f}s old.")
+            if pids:
+                def switch():
+                    pyautogui.hotkey('alt', 'tab')
+                    # Holds the keyboard until the switch settles, so the
+                    # next keys go to the new window
+                    time.sleep(0.2)
+                self.act("switch_window", switch, failure="Sorry, I couldn't switch windows.")
+                self.speak(f"Switching to {app_name}.")
+            else:
                 self.speak(f"Couldn't find {app_name} running.")
                 
         except Exception as e:
@@ -558,38 +876,52 @@ class VoiceAssistant:
         """
         Adjusts system volume.
         """
-        try:
-            if action == "up":
-                for _ in range(5):
-                    pyautogui.press("volumeup")
-                self.speak("Volume increased.")
-            elif action == "down":
-                for _ in range(5):
-                    pyautogui.press("volumedown")
-                self.speak("Volume decreased.")
-            elif action == "mute":
-                pyautogui.press("volumemute")
-                self.speak("Volume muted.")
-        except Exception as e:
-            print(f"Error adjusting volume: {e}")
-            self.speak("Sorry, I couldn't adjust the volume.")
+        def press(key, times):
+            for _ in range(times):
+                pyautogui.press(key)
+
+        failure = "Sorry, I couldn't adjust the volume."
+        if action == "up":
+            self.act("volume_up", lambda: press("volumeup", 5), failure=failure)
+            self.speak("Volume increased.")
+        elif action == "down":
+            self.act("volume_down", lambda: press("volumedown", 5), failure=failure)
+            self.speak("Volume decreased.")
+        elif action == "mute":
+            self.act("mute", lambda: press("volumemute", 1), failure=failure)
+            self.speak("Volume muted.")
 
     def take_screenshot(self):
         """
-        Takes a screenshot and saves it.
+        Takes a screenshot; it is saved to the desktop in the background.
         """
         try:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            desktop = Path.home() / "Desktop"
-            screenshot_path = desktop / f"screenshot_{timestamp}.png"
-            
-            screenshot = pyautogui.screenshot()
-            screenshot.save(screenshot_path)
-            self.speak(f"Screenshot saved to desktop as screenshot_{timestamp}.png")
+            shot = self.screenshots.capture()
+            self.speak(f"Screenshot saved to desktop as {shot.name}")
         except Exception as e:
             print(f"Error taking screenshot: {e}")
             self.speak("Sorry, I couldn't take a screenshot.")
 
+    def take_screenshot_burst(self, command):
+        """
+        Takes several screenshots at a fixed interval ("take 5 screenshots every 2 seconds").
+        """
+        count = parse_burst_count(command)
+        interval = parse_interval(command)
+        # Replies avoid the burst's own phrases, which would start another
+        # burst if the microphone caught them
+        self.speak(f"Capturing the screen {count} times, once every {calc.format_number(interval)} seconds.")
+
+        # On the action executor, so the assistant keeps listening during the
+        # burst; "done" is announced between listens
+        def burst():
+            shots = self.screenshots.burst(count, interval)
+            print(f"Captured {len(shots)} screenshots: {', '.join(shot.name for shot in shots)}")
+        action = self.act("screenshot_burst", burst, failure="Sorry, I couldn't capture the screen.",
+                          timeout=count * interval + BURST_MARGIN)
+        action.add_done_callback(lambda action: self.announce(
+            f"Done. The {count} captures are being saved to the desktop.") if action.state == "done" else None)
+
     def handle_create_file(self):
         """
         Creates a new file.
@@ -637,20 +969,14 @@ class VoiceAssistant:
 
     def take_note(self):
         """
-        Takes notes and saves them to a file.
+        Takes a note and adds it to the notes store.
         """
         try:
             self.speak("What should I write?")
             note = self.listen_for_command()
             
             if note:
-                desktop = Path.home() / "Desktop"
-                notes_file = desktop / "voice_notes.txt"
-                
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                with open(notes_file, 'a') as f:
-                    f.write(f"\n[{timestamp}] {note}\n")
-                
+                self.notes.add(note)
                 self.speak("Note saved successfully.")
             else:
                 self.speak("I didn't hear anything to note.")
@@ -658,6 +984,59 @@ class VoiceAssistant:
             print(f"Error taking note: {e}")
             self.speak("Sorry, I couldn't save the note.")
 
+    def find_note(self, query):
+        """
+        Reads out the notes that best match query.
+        """
+        words = query.split()
+        while words and words[0] in ("about", "for", "on", "with", "mentioning"):
+            words.pop(0)
+        query = " ".join(words)
+        if not query:
+            self.speak("What should I look for in your notes?")
+            query = self.listen_for_command()
+            if not query:
+                return
+        found = self.notes.search(query, limit=3)
+        if not found:
+            self.speak(f"I couldn't find a note about {query}.")
+            return
+        self.speak(f"I found {len(found)} {'note' if len(found) == 1 else 'notes'} about {query}.")
+        for note in found:
+            self.speak(describe(note))
+
+    def read_notes(self, count):
+        """
+        Reads out the most recent notes, newest first.
+        """
+        found = self.notes.latest(count)
+        if not found:
+            self.speak("You don't have any notes yet.")
+            return
+        self.speak(f"Your last {len(found)} {'note' if len(found) == 1 else 'notes'}:")
+        for note in found:
+            self.speak(describe(note))
+
+    def read_notes_between(self, command):
+        """
+        Reads out notes from a period such as "yesterday" or "last week".
+        """
+        period = parse_date_range(command)
+        if period is None:
+            self.speak("Which day or week should I read notes from?")
+            return
+        total = self.notes.count(*period)
+        if not total:
+            self.speak("You didn't take any notes then.")
+            return
+        found = self.notes.between(*period, limit=5)
+        if total > len(found):
+            self.speak(f"You took {total} notes then. Here are the first {len(found)}.")
+        else:
+            self.speak(f"You took {total} {'note' if total == 1 else 'notes'} then.")
+        for note in found:
+            self.speak(describe(note))
+
     def get_weather(self):
         """
         Gets weather information (requires API key).
@@ -672,48 +1051,79 @@ class VoiceAssistant:
 
     def calculate(self, command):
         """
-        Performs basic calculations.
+        Performs basic calculations, written or spoken ("twenty five times four").
         """
         try:
-            # Extract the mathematical expression
-            command = command.replace("calculate", "").replace("what is", "").strip()
-            command = command.replace("plus", "+").replace("minus", "-")
-            command = command.replace("times", "*").replace("multiplied by", "*")
-            command = command.replace("divided by", "/").replace("divide", "/")
-            
-            # Remove non-mathematical characters
-            allowed_chars = "0123456789+-*/.()"
-            expression = ''.join(c for c in command if c in allowed_chars or c.isspace())
-            expression = expression.replace(" ", "")
-            
-            if expression:
-                result = eval(expression)
-                self.speak(f"The result is {result}")
-            else:
-                self.speak("I couldn't understand the calculation.")
-        except Exception as e:
+            result = calc.calculate(command)
+            self.speak(f"The result is {calc.format_number(result)}")
+        except calc.CalculationError as e:
             print(f"Error calculating: {e}")
-            self.speak("Sorry, I couldn't perform that calculation.")
+            self.speak(str(e))
+
+    def play_music(self, query):
+        """
+        Plays the song best matching query ("bohemian rhapsody", "yesterday
+        by the beatles"), or the whole library shuffled if query is empty.
+        """
+        if not query:
+            self.shuffle_music()
+            return
+        if not self.music_ready():
+            return
+        track = self.media.find_track(query)
+        if track is None:
+            self.speak(f"I couldn't find {query} in your music.")
+            return
+        self.act("play_music", lambda: os.startfile(track.path), failure="Sorry, I couldn't play music.")
+        self.speak(f"Playing {track.title} by {track.artist}." if track.artist else f"Playing {track.title}.")
 
-    def play_music(self, command):
+    def play_artist(self, query):
         """
-        Plays music from a default music directory.
+        Plays every song by the artist best matching query, shuffled.
+        """
+        if not query:
+            self.speak("Which artist should I play?")
+            return
+        if not self.music_ready():
+            return
+        artist, tracks = self.media.find_artist(query)
+        if not tracks:
+            self.speak(f"I couldn't find any songs by {query}.")
+            return
+        self.play_playlist(self.media.shuffled(tracks), f"Playing {len(tracks)} songs by {artist}.")
+
+    def shuffle_music(self):
+        """
+        Plays the music library in random order.
+        """
+        if not self.music_ready():
+            return
+        self.play_playlist(self.media.shuffled(), "Shuffling your music.")
+
+    def music_ready(self):
+        """
+        Waits briefly for the first library scan; says why if there is no music.
+        """
+        if not self.media.wait_ready(timeout=3) and not self.media.tracks:
+            self.speak("I'm still indexing your music. Please try again in a moment.")
+            return False
+        if not self.media.tracks:
+            self.speak("No music files found in the Music folder. You can also say 'open YouTube' for music.")
+            return False
+        return True
+
+    def play_playlist(self, tracks, reply):
+        """
+        Opens tracks as a playlist in the default player.
         """
         try:
-            music_dir = Path.home() / "Music"
-            if music_dir.exists():
-                songs = list(music_dir.glob("*.mp3"))
-                if songs:
-                    song = str(songs[0])
-                    os.startfile(song)
-                    self.speak("Playing music.")
-                else:
-                    self.speak("No music files found in the Music folder.")
-            else:
-                self.speak("Music folder not found. You can also say 'open YouTube' for music.")
+            playlist = write_playlist(tracks)
         except Exception as e:
             print(f"Error playing music: {e}")
             self.speak("Sorry, I couldn't play music.")
+            return
+        self.act("play_music", lambda: os.startfile(playlist), failure="Sorry, I couldn't play music.")
+        self.speak(reply)
 
     def tell_joke(self):
         """
@@ -745,34 +1155,38 @@ class VoiceAssistant:
         """
         Gets battery status.
         """
-        try:
-            import psutil
-            battery = psutil.sensors_battery()
-            if battery:
-                percent = battery.percent
-                plugged = "plugged in" if battery.power_plugged else "not plugged in"
-                self.speak(f"Battery is at {percent} percent and {plugged}.")
-            else:
-                self.speak("Battery information not available. You might be on a desktop.")
-        except ImportError:
-            self.speak("Battery monitoring requires the psutil library. Install it with: pip install psutil")
-        except Exception as e:
-            print(f"Error getting battery status: {e}")
-            self.speak("Sorry, I couldn't check the battery status.")
+        self.report_system(describe_battery, "Battery monitoring", "the battery status")
 
     def get_cpu_info(self):
         """
         Gets CPU usage information.
         """
+        self.report_system(describe_cpu, "CPU monitoring", "the CPU usage")
+
+    def get_memory_info(self):
+        """
+        Gets memory usage information.
+        """
+        self.report_system(describe_memory, "Memory monitoring", "the memory usage")
+
+    def get_disk_info(self):
+        """
+        Gets disk usage information.
+        """
+        self.report_system(describe_disk, "Disk monitoring", "the disk usage")
+
+    def report_system(self, describe, feature, subject):
+        """
+        Speaks a reading from the system monitor.
+        """
         try:
-            import psutil
-            cpu_percent = psutil.cpu_percent(interval=1)
-            self.speak(f"CPU usage is at {cpu_percent} percent.")
+            reply = describe(self.system)
+            self.speak(reply or f"Sorry, I couldn't check {subject}.")
         except ImportError:
-            self.speak("CPU monitoring requires the psutil library. Install it with: pip install psutil")
+            self.speak(f"{feature} requires the psutil library. Install it with: pip install psutil")
         except Exception as e:
-            print(f"Error getting CPU info: {e}")
-            self.speak("Sorry, I couldn't check the CPU usage.")
+            print(f"Error getting {subject}: {e}")
+            self.speak(f"Sorry, I couldn't check {subject}.")
 
     def run(self):
         """
@@ -781,9 +1195,14 @@ class VoiceAssistant:
         self.greet_user()
         running = True
         while running:
-            command = self.listen_for_command()
+            command = self.listen_for_command(wake_word=True)
+            if self.wake_listener is not None and self.wake_listener.ended:
+                break
             running = self.process_command(command)
 
 if __name__ == "__main__":
-    assistant = VoiceAssistant()
+    # --wake-word keeps the microphone open and waits for "Chanakya ..."
+    # (needs pocketsphinx for local detection)
+    detector = SphinxDetector() if "--wake-word" in sys.argv[1:] else None
+    assistant = VoiceAssistant(wake_word_detector=detector)
     assistant.run()
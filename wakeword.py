@@ -0,0 +1,342 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+
+from capture import FRAME_MS, VoiceActivitySegmenter
+from lazy import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+WAKE_WORDS = ("chanakya",)
+
+# Words people put in front of the name: "hey chanakya", "ok chanakya"
+WAKE_PREFIXES = ("hey", "hi", "ok", "okay", "hello")
+
+
+def _similarity(a, b):
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def find_wake_word(text, wake_words=WAKE_WORDS, cutoff=0.7):
+    """
+    Looks for a wake word in a transcript, allowing for how a recognizer
+    may spell a name it doesn't know ("china kia" for "chanakya").
+    Returns the index of the first word after it, or None.
+    """
+    words = text.lower().replace(",", " ").replace(".", " ").split()
+    best, best_end = cutoff, None
+    for start in range(len(words)):
+        for end in range(start + 1, min(len(words), start + 3) + 1):
+            joined = "".join(words[start:end])
+            for wake_word in wake_words:
+                score = _similarity(joined, wake_word)
+                if score >= best and (best_end is None or score > best):
+                    best, best_end = score, end
+    return best_end
+
+
+def strip_wake_word(text, wake_words=WAKE_WORDS, cutoff=0.7):
+    """
+    Returns the command in "chanakya, open notepad": the words after the
+    wake word if it starts the transcript, else the whole transcript.
+    """
+    words = text.split()
+    while words and words[0].lower().strip(",.!") in WAKE_PREFIXES:
+        words = words[1:]
+    end = find_wake_word(" ".join(words[:3]), wake_words, cutoff)
+    return " ".join(words[end:] if end is not None else words).strip(" ,.")
+
+
+class TranscriptDetector:
+    """
+    Wake-word detector that transcribes audio with a local recognizer and
+    looks for the wake word in the text. transcribe(audio_data) returns
+    text ("" for nothing); it must not call a cloud service.
+    """
+
+    def __init__(self, transcribe, wake_words=WAKE_WORDS, cutoff=0.7):
+        self.transcribe = transcribe
+        self.wake_words = tuple(word.lower() for word in wake_words)
+        self.cutoff = cutoff
+
+    def detect(self, audio):
+        """
+        Returns True if the sr.AudioData contains the wake word.
+        """
+        return find_wake_word(self.transcribe(audio), self.wake_words, self.cutoff) is not None
+
+
+class SphinxDetector(TranscriptDetector):
+    """
+    Offline detection with CMU Sphinx (pip install pocketsphinx).
+
+    "Chanakya" isn't in Sphinx's English dictionary, so by default the
+    short utterance is decoded freely and matched by spelling. For wake
+    words that are in the dictionary, keyword_entries ([("computer", 1e-20)])
+    switches Sphinx to keyword spotting, which is faster and stricter.
+    """
+
+    def __init__(self, wake_words=WAKE_WORDS, keyword_entries=None, cutoff=0.7):
+        super().__init__(self._transcribe, wake_words, cutoff)
+        self.keyword_entries = keyword_entries
+        self._recognizer = None
+
+    def _transcribe(self, audio):
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        try:
+            text = self._recognizer.recognize_sphinx(audio, keyword_entries=self.keyword_entries)
+        except sr.UnknownValueError:
+            return ""
+        if self.keyword_entries:
+            # Keyword spotting only ever outputs the keywords it found
+            return " ".join(self.wake_words) if text.strip() else ""
+        return text
+
+
+class RingBuffer:
+    """
+    The last seconds of audio as (time, frame) pairs, time in seconds of audio.
+    """
+
+    def __init__(self, seconds, frame_ms=FRAME_MS):
+        self._frames = deque(maxlen=max(1, int(seconds * 1000 / frame_ms)))
+        self._lock = threading.Lock()
+
+    def append(self, at, frame):
+        with self._lock:
+            self._frames.append((at, frame))
+
+    def between(self, start, end):
+        """
+        Returns the (time, frame) pairs that arrived after start, up to end.
+        """
+        with self._lock:
+            return [(at, frame) for at, frame in self._frames if start < at <= end]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+class WakeWordListener:
+    """
+    Listens continuously on one open audio stream and only sends speech
+    that follows the wake word to recognition.
+
+    Captured frames go into a ring buffer and through the speech
+    segmenter. The start (max_wake_s) of every segment is checked by the
+    local detector on a worker thread, so capture never waits for it.
+    When the wake word is found, the command is the rest of that segment
+    or, after a pause, the next segment within command_timeout seconds.
+    The audio sent to recognize() runs from preroll_ms before the wake
+    word to the end of the command (taken from the ring buffer as each
+    segment ends, so a slow worker never loses it), and the wake word is
+    removed from the transcript.
+
+    Times are in seconds of audio read, so a WavSource behaves exactly
+    like the microphone.
+    """
+
+    def __init__(self, source_factory, detector, recognize, energy_threshold=300, wake_words=WAKE_WORDS,
+                 preroll_ms=300, buffer_s=15.0, max_wake_s=1.5, command_timeout=5.0, max_command_s=8.0,
+                 metrics=None):
+        self.source_factory = source_factory
+        self.detector = detector
+        self.recognize = recognize
+        self.energy_threshold = energy_threshold
+        self.wake_words = wake_words
+        self.preroll_s = preroll_ms / 1000
+        self.buffer_s = buffer_s
+        self.max_wake_s = max_wake_s
+        self.command_timeout = command_timeout
+        self.max_command_s = max_command_s
+        self.metrics = metrics
+
+        # While muted (the assistant is speaking) captured audio is dropped
+        self.muted = threading.Event()
+
+        self._commands = queue.Queue()
+        self._worker = ThreadPoolExecutor(max_workers=1)
+        self._stop = threading.Event()
+        self._thread = None
+        self._ended = False
+        self._onset_s = 0.0
+        self._sample_rate = None
+        self._sample_width = None
+
+        # Set on the worker while a command is awaited after a lone wake word:
+        # the audio so far, and the time the command has to start by
+        self._pending = None
+        self._armed_until = 0.0
+        self._arm_next = threading.Event()
+
+        self.segments = 0
+        self.wakes = 0
+        self.recognized = 0
+
+        # Optional callbacks: on_wake() when the wake word is heard and
+        # on_silence(frame, energy) for non-speech frames (noise tracking)
+        self.on_wake = None
+        self.on_silence = None
+
+    def start(self):
+        """
+        Opens the audio source and starts listening in the background.
+        """
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._capture, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def arm(self):
+        """
+        Treats the next segment as a command without waiting for the wake
+        word, for follow-up questions ("What should I write?").
+        """
+        self._arm_next.set()
+
+    @property
+    def ended(self):
+        """
+        True once the source has run dry (or failed) and every command was returned.
+        """
+        return self._ended
+
+    def listen(self, timeout=None):
+        """
+        Returns the next command, or None if the source ended or timeout
+        seconds passed. Raises speech_recognition errors from recognize().
+        """
+        if self._ended:
+            return None
+        try:
+            kind, value = self._commands.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if kind == "end":
+            self._ended = True
+        elif kind == "error":
+            raise value
+        return value
+
+    def _capture(self):
+        error = None
+        try:
+            with self.source_factory() as source:
+                self._sample_rate = source.sample_rate
+                self._sample_width = source.sample_width
+                ring = RingBuffer(self.buffer_s, source.frame_ms)
+                segmenter = VoiceActivitySegmenter(
+                    source.sample_rate, source.sample_width, source.frame_ms,
+                    energy_threshold=self.energy_threshold, max_segment_s=self.max_command_s,
+                )
+                segmenter.on_silence = self.on_silence
+                frame_s = source.frame_ms / 1000
+                self._onset_s = segmenter.start_frames * frame_s
+                now = last_end = 0.0
+                while not self._stop.is_set():
+                    frame = source.read()
+                    if not frame:
+                        break
+                    now += frame_s
+                    if self.muted.is_set():
+                        segmenter.flush()
+                        continue
+                    segmenter.energy_threshold = self.energy_threshold
+                    ring.append(now, frame)
+                    segment = segmenter.feed(frame, now)
+                    if segment is not None:
+                        # The audio since the last segment goes with it: the
+                        # pre-roll, and the pause after a lone wake word
+                        self._worker.submit(self._handle, segment, ring.between(last_end, now))
+                        last_end = now
+                segment = segmenter.flush()
+                if segment is not None:
+                    self._worker.submit(self._handle, segment, ring.between(last_end, now))
+        except Exception as e:
+            error = e
+            print(f"Wake-word listener stopped: {e}")
+        # Queued behind the segments, so listen() sees them first
+        if error is not None:
+            self._worker.submit(self._commands.put, ("error", error))
+        self._worker.submit(self._commands.put, ("end", None))
+
+    def _handle(self, segment, frames):
+        """
+        Runs on the worker thread for every finished segment, with the
+        (time, frame) pairs captured since the previous one.
+        """
+        self.segments += 1
+        onset = segment.speech_started_at - self._onset_s
+        end = segment.speech_ended_at + 0.1
+        if self._arm_next.is_set():
+            self._arm_next.clear()
+            self._pending = []
+            self._armed_until = onset
+
+        if self._pending is not None and onset <= self._armed_until:
+            pending, self._pending = self._pending, None
+            if not pending:
+                frames = [(at, frame) for at, frame in frames if at >= onset - self.preroll_s]
+            self._recognize_command(pending + frames, end)
+            return
+        self._pending = None
+
+        start = time.perf_counter()
+        wake_bytes = int(self.max_wake_s * segment.sample_rate) * segment.sample_width
+        try:
+            detected = self.detector.detect(sr.AudioData(segment.data[:wake_bytes], segment.sample_rate,
+                                                         segment.sample_width))
+        except Exception as e:
+            print(f"Wake-word detection failed: {e}")
+            if self.metrics is not None:
+                self.metrics.error("wake", e)
+            return
+        if self.metrics is not None:
+            self.metrics.observe("wake", time.perf_counter() - start)
+        if not detected:
+            return
+
+        self.wakes += 1
+        print("Wake word detected.")
+        if self.on_wake is not None:
+            self.on_wake()
+        frames = [(at, frame) for at, frame in frames if at >= onset - self.preroll_s]
+        if segment.duration > self.max_wake_s:
+            # "Chanakya, open notepad" in one breath
+            self._recognize_command(frames, end)
+        else:
+            self._pending = frames
+            self._armed_until = end + self.command_timeout
+
+    def _recognize_command(self, frames, end):
+        frames = [(at, frame) for at, frame in frames if at <= end]
+        audio = sr.AudioData(b"".join(frame for _, frame in frames), self._sample_rate, self._sample_width)
+        start = time.perf_counter()
+        try:
+            transcript = self.recognize(audio)
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.observe("recognition", time.perf_counter() - start)
+                self.metrics.error("recognition", e)
+            if not isinstance(e, sr.UnknownValueError):
+                self._commands.put(("error", e))
+            return
+        if self.metrics is not None:
+            self.metrics.observe("recognition", time.perf_counter() - start)
+        self.recognized += 1
+        command = strip_wake_word(transcript, self.wake_words)
+        if command:
+            self._commands.put(("command", command))
+        else:
+            # Only the wake word was recognized; the command may follow
+            self._pending = frames
+            self._armed_until = end + self.command_timeout
@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from lazy import lazy_import
+from settings import data_path
+
+requests = lazy_import("requests")
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed_at);
+"""
+
+
+def normalize_title(title):
+    """
+    Returns the cache key for a spoken topic: lowercase, single-spaced.
+    """
+    return " ".join(title.split()).lower()
+
+
+class WikiSummaryCache:
+    """
+    Persistent cache of Wikipedia first-paragraph summaries.
+
+    Entries expire after ttl seconds; pages that don't exist are cached too
+    (for negative_ttl) so repeated misses skip the network. The cache holds
+    at most max_entries, evicting the least recently used. All fetches share
+    one keep-alive HTTP session.
+    """
+
+    def __init__(self, db_path=None, api_url=WIKIPEDIA_API_URL, ttl=7 * 24 * 3600,
+                 negative_ttl=24 * 3600, max_entries=5000, timeout=5.0, session=None):
+        self.api_url = api_url
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        # Created on the first fetch, so cache hits never import requests
+        self._session = session
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path or data_path("wiki_cache.sqlite3")), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+        self.fetch_latencies = deque(maxlen=200)
+
+    def summary(self, query):
+        """
+        Returns the first paragraph of the Wikipedia page for query, or None
+        if there is no such page. Raises requests errors if the fetch fails.
+        """
+        key = normalize_title(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT summary, fetched_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                summary, fetched_at = row
+                ttl = self.ttl if summary is not None else self.negative_ttl
+                if now - fetched_at < ttl:
+                    self._db.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    if summary is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return summary
+            self.misses += 1
+
+        start = time.perf_counter()
+        try:
+            summary = self._fetch(query)
+        except Exception:
+            with self._lock:
+                self.fetch_errors += 1
+            raise
+        latency = time.perf_counter() - start
+        print(f"Fetched Wikipedia summary for '{query}' in {latency * 1000:.0f} ms.")
+
+        with self._lock:
+            self.fetch_latencies.append(latency)
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now),
+            )
+            self._evict()
+            self._db.commit()
+        return summary
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    session.headers['User-Agent'] = 'VoiceAssistant/1.0'
+                    session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+                    session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+                    self._session = session
+        return self._session
+
+    def _fetch(self, title):
+        response = self.session.get(self.api_url, timeout=self.timeout, params={
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "prop": "extracts",
+            "exintro": 1,
+            "explaintext": 1,
+            "redirects": 1,
+            "titles": title,
+        })
+        response.raise_for_status()
+        pages = response.json().get("query", {}).get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            return None
+        extract = pages[0].get("extract", "").strip()
+        if not extract:
+            return None
+        return extract.split('\n')[0]
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self):
+        """
+        Returns hit/miss counters and fetch latencies in milliseconds.
+        """
+        with self._lock:
+            latencies = sorted(self.fetch_latencies)
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "fetch_errors": self.fetch_errors,
+                "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                "fetches": len(latencies),
+                "fetch_ms_p50": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "fetch_ms_max": round(latencies[-1] * 1000, 1) if latencies else None,
+            }
+
+    def close(self):
+        """
+        Closes the database and the HTTP session.
+        """
+        with self._lock:
+            self._db.close()
+        if self._session is not None:
+            self._session.close()